@@ -1,8 +1,12 @@
-import React, { useState, useEffect, type FC } from 'react';
+import React, { useState, useEffect, useCallback, type FC } from 'react';
 import './InnovationRankMenu.css';
 
 interface RankItem {
   innovation_id: string;
+  nama_inovasi: string;
+  nama_inovator: string;
+  rank: number;
+  percentile: number | null;
   substansi_orisinalitas: number;
   substansi_urgensi: number;
   substansi_kedalaman: number;
@@ -17,31 +21,45 @@ const formatDate = (iso: string) => {
   return d.toLocaleString('id-ID', { dateStyle: 'medium', timeStyle: 'short' });
 };
 
+const PAGE_SIZE = 50;
+
 const InnovationRankMenu: FC = () => {
   const [ranking, setRanking] = useState<RankItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState(0);
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
 
-  useEffect(() => {
+  const loadPage = useCallback((cursor: string | null) => {
     setLoading(true);
     setError(null);
-    fetch('http://localhost:8000/get_rank?table_name=innovations')
+    const params = new URLSearchParams({ table_name: 'innovations', limit: String(PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    fetch(`http://localhost:8000/get_rank?${params}`)
       .then(res => {
         if (!res.ok) throw new Error('Failed to fetch ranking');
         return res.json();
       })
-      .then(data => setRanking(data.ranking || []))
+      .then(data => {
+        setRanking(prev => (cursor ? [...prev, ...(data.ranking || [])] : data.ranking || []));
+        setNextCursor(data.next_cursor ?? null);
+        setTotal(data.total ?? 0);
+      })
       .catch(err => setError(err.message))
       .finally(() => setLoading(false));
   }, []);
 
+  useEffect(() => {
+    loadPage(null);
+  }, [loadPage]);
+
   return (
     <div className="card rank-card">
       <h2 style={{display:'flex',alignItems:'center',gap:8}}>
         <span role="img" aria-label="Trophy" style={{fontSize:28}}>🏆</span>
         Ranking Inovasi
       </h2>
-      {loading && <div>Loading...</div>}
+      {loading && ranking.length === 0 && <div>Loading...</div>}
       {error && <p className="error-message">{error}</p>}
       {ranking.length > 0 && (
         <div className="rank-table-wrapper">
@@ -49,32 +67,46 @@ const InnovationRankMenu: FC = () => {
             <thead>
               <tr>
                 <th>#</th>
-                <th>Judul/ID</th>
+                <th>Judul</th>
+                <th>Inovator</th>
                 <th>Orisinalitas</th>
                 <th>Urgensi</th>
                 <th>Kedalaman</th>
                 <th>Dampak</th>
                 <th>Kelayakan</th>
                 <th>Total</th>
+                <th>Persentil</th>
                 <th>Tanggal</th>
               </tr>
             </thead>
             <tbody>
-              {ranking.map((item, i) => (
-                <tr key={item.innovation_id} className={i === 0 ? 'rank-top' : ''}>
-                  <td style={{fontWeight:'bold'}}>{i+1}</td>
-                  <td style={{maxWidth:220,wordBreak:'break-all'}}>{item.innovation_id}</td>
+              {ranking.map(item => (
+                <tr key={item.innovation_id} className={item.rank === 1 ? 'rank-top' : ''}>
+                  <td style={{fontWeight:'bold'}}>{item.rank}</td>
+                  <td style={{maxWidth:220,wordBreak:'break-all'}} title={item.innovation_id}>
+                    {(item.nama_inovasi || item.innovation_id).replace(/_/g, ' ')}
+                  </td>
+                  <td>{(item.nama_inovator || '-').replace(/_/g, ' ')}</td>
                   <td>{item.substansi_orisinalitas}</td>
                   <td>{item.substansi_urgensi}</td>
                   <td>{item.substansi_kedalaman}</td>
                   <td>{item.analisis_dampak}</td>
                   <td>{item.analisis_kelayakan}</td>
                   <td style={{fontWeight:'bold',color:'#1a7f37'}}>{item.total_score ?? '-'}</td>
+                  <td>{item.percentile != null ? `${item.percentile}%` : '-'}</td>
                   <td>{formatDate(item.created_at)}</td>
                 </tr>
               ))}
             </tbody>
           </table>
+          <div className="rank-footer">
+            <span>Menampilkan {ranking.length} dari {total} inovasi</span>
+            {nextCursor && (
+              <button onClick={() => loadPage(nextCursor)} disabled={loading}>
+                {loading ? 'Loading...' : 'Muat lagi'}
+              </button>
+            )}
+          </div>
         </div>
       )}
       {ranking.length === 0 && !loading && <div>Tidak ada data ranking.</div>}
@@ -1,5 +1,39 @@
 import React, { useState, type FC, type FormEvent } from 'react';
-import type { User, Innovation, UploadResponse } from '../types';
+import type { User, Innovation, UploadResponse, UploadJobResponse, IngestionJobStatus } from '../types';
+
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const STAGE_LABELS: Record<string, string> = {
+    extract: 'Mengekstrak bagian dokumen',
+    stored: 'Menyimpan dokumen',
+    chunked: 'Memecah dokumen',
+    embedded: 'Membuat embedding',
+    indexed: 'Membangun indeks',
+    summary: 'Membuat ringkasan AI',
+};
+
+const waitForJob = async (
+    statusUrl: string,
+    onProgress: (job: IngestionJobStatus) => void
+): Promise<UploadResponse> => {
+    for (;;) {
+        const response = await fetch(`http://localhost:8000${statusUrl}`, {
+            headers: { 'accept': 'application/json' },
+        });
+        if (!response.ok) {
+            throw new Error('Failed to get upload status.');
+        }
+        const job: IngestionJobStatus = await response.json();
+        onProgress(job);
+        if (job.status === 'done' && job.result) {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Failed to process innovation.');
+        }
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+};
 
 const InnovationUploader: FC<{ 
     user: User, 
@@ -11,6 +45,7 @@ const InnovationUploader: FC<{
     const [success, setSuccess] = useState<string | null>(null);
     const [loading, setLoading] = useState(false);
     const [uploadResult, setUploadResult] = useState<UploadResponse | null>(null);
+    const [stage, setStage] = useState<string | null>(null);
 
     const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         if (e.target.files && e.target.files[0]) {
@@ -28,6 +63,7 @@ const InnovationUploader: FC<{
         setError(null);
         setSuccess(null);
         setUploadResult(null);
+        setStage(null);
         setLoading(true);
 
         const formData = new FormData();
@@ -50,9 +86,13 @@ const InnovationUploader: FC<{
                 throw new Error(errorData.detail || errorData.message || 'Failed to upload innovation.');
             }
             
-            const result: UploadResponse = await response.json();
+            // Upload diterima (202); pemrosesan berjalan di background
+            const job: UploadJobResponse = await response.json();
+            const result = await waitForJob(job.status_url, (status) => setStage(status.stage));
             setUploadResult(result);
-            setSuccess('Inovasi berhasil diupload!');
+            setSuccess(result.dedup
+                ? `Inovasi berhasil diupload! Dokumen identik dengan "${result.dedup.duplicate_of}", hasil ekstraksi dan embedding dipakai ulang.`
+                : 'Inovasi berhasil diupload!');
             
             // Create Innovation object for compatibility
             const innovation: Innovation = {
@@ -73,6 +113,7 @@ const InnovationUploader: FC<{
             setError(err.message || 'Failed to upload innovation.');
         } finally {
             setLoading(false);
+            setStage(null);
         }
     };
 
@@ -112,6 +153,7 @@ const InnovationUploader: FC<{
                 {loading && (
                     <div style={{ marginTop: '1rem', textAlign: 'center' }}>
                         <p>📤 Sedang mengupload dan memproses dokumen...</p>
+                        {stage && <p data-testid="upload-stage">{STAGE_LABELS[stage] || stage}...</p>}
                         <p style={{ fontSize: '0.9rem', color: 'var(--text-secondary-color)' }}>
                             Mohon tunggu, sistem sedang menganalisis dokumen dengan AI
                         </p>
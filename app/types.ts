@@ -21,15 +21,44 @@ export interface AiSummary {
   keunikan_inovasi: string;
 }
 
+export interface UploadDedup {
+  duplicate_of: string;
+  document_sha256?: string;
+}
+
 export interface UploadResponse {
   status: string;
   code: number;
   table: string;
   extracted_sections: ExtractedSections;
   ai_summary: AiSummary;
+  dedup?: UploadDedup | null;
   innovation_id: string;
 }
 
+export interface UploadJobResponse {
+  status: 'queued';
+  code: number;
+  job_id: string;
+  table: string;
+  innovation_id: string;
+  document_sha256?: string;
+  dedup?: UploadDedup | null;
+  status_url: string;
+}
+
+export interface IngestionJobStatus {
+  job_id: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  stage: string | null;
+  stages: Record<string, string>;
+  attempts: number;
+  error: string | null;
+  result: UploadResponse | null;
+  created_at: string | null;
+  finished_at: string | null;
+}
+
 export interface Innovation {
   innovation_id: string;
   judul_inovasi: string;
@@ -0,0 +1,128 @@
+"""
+Benchmark: MinHash/LSH near-duplicate lookup vs a brute-force signature scan.
+
+Membuat korpus sintetis (dokumen acak dari kosakata tetap) dengan sejumlah salinan yang
+sedikit diubah, lalu mengukur waktu pembuatan signature, latensi query LSH (bucket lookup)
+dibanding scan seluruh signature, serta recall salinan yang ditanam. Dengan --postgres
+indeks juga dimuat ke tabel {table}_minhash / {table}_lsh_bands (variabel PG_* di .env)
+dan latensi MinHashIndex.candidates diukur.
+
+    python -m benchmarks.bench_minhash --docs 10000 100000 --queries 200
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from module.minhash import InMemoryLSH, MinHasher, MinHashIndex
+
+TABLE = "bench_minhash"
+VOCABULARY = [f"kata{i}" for i in range(5000)]
+
+
+def make_corpus(n_docs: int, n_queries: int, words: int, seed: int = 42):
+    """Random documents plus near copies (~5% of words replaced) of the first n_queries"""
+    rng = np.random.default_rng(seed)
+    docs = [" ".join(rng.choice(VOCABULARY, size=words)) for _ in range(n_docs)]
+    queries = []
+    for i in range(n_queries):
+        tokens = docs[i].split()
+        for pos in rng.choice(len(tokens), size=max(1, len(tokens) // 20), replace=False):
+            tokens[pos] = rng.choice(VOCABULARY)
+        queries.append(" ".join(tokens))
+    return docs, queries
+
+
+def bench_memory(hasher: MinHasher, docs, queries, threshold: float):
+    started = time.perf_counter()
+    signatures = [hasher.signature(doc) for doc in docs]
+    sign_seconds = time.perf_counter() - started
+
+    lsh = InMemoryLSH(hasher)
+    started = time.perf_counter()
+    for i, sig in enumerate(signatures):
+        lsh.add(str(i), sig)
+    index_seconds = time.perf_counter() - started
+
+    query_sigs = [hasher.signature(q) for q in queries]
+    matrix = np.vstack(signatures)
+
+    started = time.perf_counter()
+    lsh_hits = [lsh.query(sig, threshold) for sig in query_sigs]
+    lsh_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    started = time.perf_counter()
+    brute_hits = []
+    for sig in query_sigs:
+        scores = (matrix == sig).mean(axis=1)
+        brute_hits.append(np.flatnonzero(scores >= threshold))
+    brute_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    recall = np.mean([any(key == str(i) for key, _ in hits) for i, hits in enumerate(lsh_hits)])
+    brute_recall = np.mean([i in hits for i, hits in enumerate(brute_hits)])
+    candidates = np.mean([len(hits) for hits in lsh_hits])
+    print(f"docs={len(docs):7d} sign={sign_seconds:6.1f}s ({len(docs)/sign_seconds:6.0f} docs/s) "
+          f"index={index_seconds:5.1f}s")
+    print(f"  LSH query   {lsh_ms:8.3f} ms  recall={recall:.3f}  avg hits={candidates:.1f}")
+    print(f"  brute scan  {brute_ms:8.3f} ms  recall={brute_recall:.3f}  ({brute_ms/lsh_ms:.0f}x slower)")
+    return signatures
+
+
+async def bench_postgres(hasher: MinHasher, signatures, queries, threshold: float):
+    from module.vector import PostgreDB
+
+    db = PostgreDB()
+    await db.init_pool()
+    index = MinHashIndex(db, hasher)
+    index.config.threshold = threshold
+    try:
+        async with db.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}_lsh_bands, {TABLE}_minhash, {TABLE}")
+            await conn.execute(f"CREATE TABLE {TABLE} (id VARCHAR(1024) PRIMARY KEY)")
+            await conn.copy_records_to_table(TABLE, records=[(str(i),) for i in range(len(signatures))])
+        await index.create_tables(TABLE)
+        started = time.perf_counter()
+        async with db.acquire() as conn:
+            await conn.copy_records_to_table(
+                f"{TABLE}_minhash",
+                records=[(str(i), sig.astype(np.int64).tolist()) for i, sig in enumerate(signatures)],
+                columns=["innovation_id", "signature"],
+            )
+            await conn.copy_records_to_table(
+                f"{TABLE}_lsh_bands",
+                records=[
+                    (band, key, str(i))
+                    for i, sig in enumerate(signatures)
+                    for band, key in enumerate(hasher.band_keys(sig))
+                ],
+                columns=["band", "bucket", "innovation_id"],
+            )
+            await conn.execute(f"ANALYZE {TABLE}_lsh_bands")
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        hits = [await index.candidates(q, table_name=TABLE) for q in queries]
+        query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([any(c["innovation_id"] == str(i) for c in found) for i, found in enumerate(hits)])
+        print(f"  postgres    {query_ms:8.3f} ms  recall={recall:.3f}  (load {load_seconds:.1f}s)")
+    finally:
+        async with db.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}_lsh_bands, {TABLE}_minhash, {TABLE}")
+        await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--words", type=int, default=150, help="words per synthetic document")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--postgres", action="store_true", help="also load and query the Postgres band index")
+    args = parser.parse_args()
+    hasher = MinHasher.from_config()
+    for n_docs in args.docs:
+        docs, queries = make_corpus(n_docs, min(args.queries, n_docs), args.words)
+        signatures = bench_memory(hasher, docs, queries, args.threshold)
+        if args.postgres:
+            asyncio.run(bench_postgres(hasher, signatures, queries, args.threshold))
@@ -0,0 +1,72 @@
+"""
+Benchmark: per-row upsert loop vs binary COPY for chunk embeddings.
+
+Membutuhkan Postgres + pgvector (variabel PG_* di .env). Tidak memanggil Vertex AI;
+embedding dibuat acak dengan dimensi 768.
+
+    python -m benchmarks.bench_vector_ingest --chunks 300 --repeat 3
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from module.vector import PostgreDB
+
+TABLE = "bench_ingest"
+
+
+def make_chunks(n_chunks: int, doc_id: str = "bench_doc") -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "id": [doc_id] * n_chunks,
+        "content": [f"chunk {i} " + "lorem ipsum " * 20 for i in range(n_chunks)],
+        "embedding": list(rng.random((n_chunks, 768), dtype=np.float32)),
+    })
+
+
+async def teardown(db: PostgreDB):
+    async with db.acquire() as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}_embeddings CASCADE")
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE} CASCADE")
+
+
+async def setup(db: PostgreDB):
+    await teardown(db)
+    async with db.acquire() as conn:
+        await conn.execute(f"CREATE TABLE {TABLE} (id VARCHAR(1024) PRIMARY KEY)")
+        await conn.execute(f"INSERT INTO {TABLE} (id) VALUES ('bench_doc')")
+
+
+async def run(n_chunks: int, repeat: int):
+    db = PostgreDB()
+    await setup(db)
+    vector_query = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE}_embeddings (
+        id VARCHAR(1024) NOT NULL REFERENCES {TABLE}(id),
+        content TEXT,
+        embedding vector(768),
+        PRIMARY KEY (id, content)
+    )
+    """
+    df = make_chunks(n_chunks)
+    for label, bulk in (("row loop", False), ("binary COPY", True)):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await db.generateVectorTable(df, TABLE, vector_query, bulk=bulk)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"{label:12s} chunks={n_chunks:5d} best={best*1000:8.1f} ms  ({n_chunks/best:8.0f} chunks/s)")
+    await teardown(db)
+    await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.repeat))
@@ -15,6 +15,94 @@ class GeminiConfig:
         self.location = os.getenv('GEMINI_LOCATION', 'us-central1')
         self.api_key = os.getenv('GEMINI_API_KEY', None)
 
+class EmbeddingConfig:
+    def __init__(self):
+        self.model_name = os.getenv('EMBEDDING_MODEL', 'textembedding-gecko@003')
+        self.batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', 16))
+        self.max_concurrency = int(os.getenv('EMBEDDING_MAX_CONCURRENCY', 4))
+        self.max_batch_tokens = int(os.getenv('EMBEDDING_MAX_BATCH_TOKENS', 15000))
+        self.max_retries = int(os.getenv('EMBEDDING_MAX_RETRIES', 5))
+        self.query_cache_size = int(os.getenv('EMBEDDING_QUERY_CACHE_SIZE', 1024))
+        self.query_cache_ttl = float(os.getenv('EMBEDDING_QUERY_CACHE_TTL', 3600))
+
+class VectorSearchConfig:
+    def __init__(self):
+        self.ef_search = int(os.getenv('HNSW_EF_SEARCH', 100))
+        self.candidate_multiplier = int(os.getenv('VECTOR_CANDIDATE_MULTIPLIER', 10))
+        # Build parameters of the {table}_embeddings HNSW index
+        self.hnsw_m = int(os.getenv('HNSW_M', 24))
+        self.hnsw_ef_construction = int(os.getenv('HNSW_EF_CONSTRUCTION', 100))
+
+class ChatRagConfig:
+    def __init__(self):
+        self.top_k = int(os.getenv('CHAT_RAG_TOP_K', 5))
+        self.min_similarity = float(os.getenv('CHAT_RAG_MIN_SIMILARITY', 0.6))
+        self.max_context_chars = int(os.getenv('CHAT_RAG_MAX_CONTEXT_CHARS', 8000))
+
+class ChatSearchConfig:
+    def __init__(self):
+        # Text search configuration for chat history; 'simple' is used when it is not installed
+        self.ts_config = os.getenv('CHAT_SEARCH_TS_CONFIG', 'indonesian')
+        self.page_size = int(os.getenv('CHAT_SEARCH_PAGE_SIZE', 100))
+        self.max_page_size = int(os.getenv('CHAT_SEARCH_MAX_PAGE_SIZE', 200))
+
+class LSAConfig:
+    def __init__(self):
+        self.n_components = int(os.getenv('LSA_COMPONENTS', 100))
+        self.max_features = int(os.getenv('LSA_MAX_FEATURES', 50000))
+        self.min_documents = int(os.getenv('LSA_MIN_DOCUMENTS', 3))
+        self.refit_ratio = float(os.getenv('LSA_REFIT_RATIO', 0.2))
+
+class MinHashConfig:
+    def __init__(self):
+        self.num_perm = int(os.getenv('MINHASH_NUM_PERM', 128))
+        self.bands = int(os.getenv('MINHASH_BANDS', 32))
+        self.shingle_size = int(os.getenv('MINHASH_SHINGLE_SIZE', 3))
+        self.threshold = float(os.getenv('MINHASH_THRESHOLD', 0.5))
+
+class JobQueueConfig:
+    def __init__(self):
+        self.workers = int(os.getenv('INGEST_WORKERS', 2))
+        self.poll_interval = float(os.getenv('INGEST_POLL_INTERVAL', 2))
+        self.max_attempts = int(os.getenv('INGEST_JOB_MAX_ATTEMPTS', 3))
+        self.stale_after = float(os.getenv('INGEST_JOB_STALE_SECONDS', 1800))
+        self.retry_base_delay = float(os.getenv('INGEST_JOB_RETRY_BASE_SECONDS', 30))
+        self.retry_max_delay = float(os.getenv('INGEST_JOB_RETRY_MAX_SECONDS', 600))
+
+class BatchIngestConfig:
+    def __init__(self):
+        self.max_files = int(os.getenv('BATCH_MAX_FILES', 500))
+        self.queue_size = int(os.getenv('BATCH_QUEUE_SIZE', 8))
+        self.store_concurrency = int(os.getenv('BATCH_STORE_CONCURRENCY', 4))
+        self.extract_concurrency = int(os.getenv('BATCH_EXTRACT_CONCURRENCY', 4))
+        self.chunk_concurrency = int(os.getenv('BATCH_CHUNK_CONCURRENCY', 2))
+        self.embed_concurrency = int(os.getenv('BATCH_EMBED_CONCURRENCY', 4))
+        self.persist_concurrency = int(os.getenv('BATCH_PERSIST_CONCURRENCY', 2))
+
+class LeaderboardConfig:
+    def __init__(self):
+        self.page_size = int(os.getenv('RANK_PAGE_SIZE', 50))
+        self.max_page_size = int(os.getenv('RANK_MAX_PAGE_SIZE', 200))
+
+class PdfCacheConfig:
+    def __init__(self):
+        self.max_bytes = int(os.getenv('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+class UploadConfig:
+    def __init__(self):
+        self.max_bytes = int(os.getenv('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+        # MinIO/S3 multipart parts must be at least 5 MiB
+        self.part_size = max(int(os.getenv('UPLOAD_PART_SIZE', 8 * 1024 * 1024)), 5 * 1024 * 1024)
+        self.staging_prefix = os.getenv('UPLOAD_STAGING_PREFIX', 'staging').strip('/')
+
+class ExecutorConfig:
+    def __init__(self):
+        self.gemini_threads = int(os.getenv('GEMINI_THREADS', 8))
+        self.embedding_threads = int(os.getenv('EMBEDDING_THREADS', 4))
+        self.minio_threads = int(os.getenv('MINIO_THREADS', 8))
+        self.bcrypt_threads = int(os.getenv('BCRYPT_THREADS', 4))
+        self.cpu_threads = int(os.getenv('CPU_THREADS', 2))
+
 class PgCredential:
     def __init__(self):
         self.hostname = os.getenv('PG_HOST', 'localhost')
@@ -22,6 +110,11 @@ class PgCredential:
         self.username = os.getenv('PG_USER', 'postgres')
         self.password = os.getenv('PG_PASSWORD', '')
         self.database = os.getenv('PG_DATABASE', 'postgres')
+        self.pool_min_size = int(os.getenv('PG_POOL_MIN_SIZE', 2))
+        self.pool_max_size = int(os.getenv('PG_POOL_MAX_SIZE', 10))
+        self.pool_acquire_timeout = float(os.getenv('PG_POOL_ACQUIRE_TIMEOUT', 10))
+        self.pool_max_inactive_lifetime = float(os.getenv('PG_POOL_MAX_INACTIVE_LIFETIME', 300))
+        self.command_timeout = float(os.getenv('PG_COMMAND_TIMEOUT', 60))
 
 class MinioConfig:
     def __init__(self):
@@ -1,24 +1,37 @@
 # main.py
 import uuid
 import json
+import hashlib
+import time
+import asyncio
 import re
+import zipfile
 from pathlib import Path
+from typing import List, Optional
 import pandas as pd
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile, Header, Request, status
 from starlette.responses import JSONResponse
 from module.vector import PostgreDB
+from module.jobs import JobQueue
+from module.lsa import LSAIndex, innovation_text
+from module.minhash import MinHashIndex
+from module.executors import get_executors, run_blocking, stream_blocking
+from module.uploads import UploadTooLarge
+from module.pipeline import StagedPipeline
+from module import chat_analytics
+from module.ingest import (
+    INGEST_SECTIONS, parse_extraction_result, has_extracted_sections, generate_inovasi_id, build_inovasi_dataframe
+)
+from config.config import JobQueueConfig, ChatRagConfig, UploadConfig, BatchIngestConfig, LeaderboardConfig, ChatSearchConfig
 import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import TruncatedSVD
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from passlib.context import CryptContext
 from fastapi import FastAPI, Form, Header, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os, json, re
+from contextlib import asynccontextmanager
 
 # Load env variables
 load_dotenv()
@@ -42,12 +55,27 @@ logger = logging.getLogger(__name__)
 
 pd.set_option('display.max_columns', None)
 
-app = FastAPI()
 db = PostgreDB()
 
-# Ensure the upload directory exists
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Satu pool koneksi Postgres per proses, dibuat saat startup
+    try:
+        await db.init_pool()
+        await job_queue.start()
+    except Exception as e:
+        logger.error(f"Failed to initialize Postgres pool / ingestion workers at startup: {e}")
+    yield
+    await job_queue.stop()
+    await db.close_pool()
+    get_executors().shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+upload_config = UploadConfig()
+batch_config = BatchIngestConfig()
+leaderboard_config = LeaderboardConfig()
+chat_search_config = ChatSearchConfig()
 
 # CORS middleware
 app.add_middleware(
@@ -66,88 +94,6 @@ async def log_requests(request: Request, call_next):
         logging.warning(f"405 Method Not Allowed: {request.method} {request.url.path}")
     return response
 
-def parse_extraction_result(extracted_data, sections):
-    """
-    Parse the extraction result, handling cases where JSON parsing failed
-    but raw_response contains valid JSON data.
-    """
-    result = {}
-    
-    # If sections are already properly extracted, return them
-    if all(sec in extracted_data and extracted_data[sec] != "TIDAK DITEMUKAN" for sec in sections):
-        return {sec: extracted_data[sec] for sec in sections}
-    
-    # Try to parse from raw_response if available
-    raw_response = extracted_data.get('raw_response', '')
-    if raw_response:
-        # Extract JSON from markdown code block
-        json_match = re.search(r'```json\s*\n(.*?)\n```', raw_response, re.DOTALL)
-        if json_match:
-            try:
-                json_data = json.loads(json_match.group(1))
-                for sec in sections:
-                    result[sec] = json_data.get(sec, "TIDAK DITEMUKAN")
-                logger.info("Successfully parsed JSON from markdown code block")
-                return result
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON from markdown: {e}")
-        
-        # Try to find raw JSON
-        json_start = raw_response.find('{')
-        json_end = raw_response.rfind('}') + 1
-        if json_start != -1 and json_end > json_start:
-            try:
-                json_str = raw_response[json_start:json_end]
-                json_data = json.loads(json_str)
-                for sec in sections:
-                    result[sec] = json_data.get(sec, "TIDAK DITEMUKAN")
-                logger.info("Successfully parsed JSON from raw text")
-                return result
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse raw JSON: {e}")
-    
-    # Fallback to original data or "TIDAK DITEMUKAN"
-    for sec in sections:
-        result[sec] = extracted_data.get(sec, "TIDAK DITEMUKAN")
-    
-    return result
-
-def lsa_similarity(query_text, documents):
-    # Jika tidak ada dokumen pembanding, kembalikan array kosong
-    if not documents:
-        return np.array([])
-    # Gabungkan query dan dokumen pembanding ke dalam satu list
-    all_texts = [query_text] + documents
-    # Ubah teks menjadi matriks TF-IDF
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(all_texts)
-    # Jika fitur terlalu sedikit, kembalikan matriks identitas
-    if tfidf_matrix.shape[1] < 2:
-        return np.eye(len(all_texts))
-    # Tentukan jumlah topik untuk LSA (maksimal 10 atau jumlah dokumen)
-    n_topics = min(10, len(all_texts))
-    # Reduksi dimensi dengan LSA (TruncatedSVD)
-    lsa = TruncatedSVD(n_components=n_topics)
-    lsa_matrix = lsa.fit_transform(tfidf_matrix)
-    # Hitung cosine similarity antar dokumen
-    return cosine_similarity(lsa_matrix, lsa_matrix)
-
-def generate_inovasi_id(judul_inovasi: str, nama_inovator: str) -> str:
-    """Generate unique id for inovasi based on judul and inovator."""
-    return f"{judul_inovasi.lower().replace(' ', '_')}_{nama_inovator.lower().replace(' ', '_')}"
-
-def build_inovasi_dataframe(local_path, judul_inovasi, x_inovator, extracted):
-    """Build DataFrame for inovasi upload."""
-    return pd.DataFrame([{
-        "pdf_path": str(local_path),
-        "nama_inovasi": judul_inovasi.lower().replace(" ", "_"),
-        "nama_inovator": x_inovator.lower().replace(" ", "_"),
-        "id": generate_inovasi_id(judul_inovasi, x_inovator),
-        "latar_belakang": extracted.get("latar_belakang", "TIDAK DITEMUKAN"),
-        "tujuan_inovasi": extracted.get("tujuan_inovasi", "TIDAK DITEMUKAN"),
-        "deskripsi_inovasi": extracted.get("deskripsi_inovasi", "TIDAK DITEMUKAN"),
-    }])
-
 def generate_ai_summary(extracted_sections, judul_inovasi):
     """Generate AI summary from extracted sections"""
     try:
@@ -199,73 +145,132 @@ def generate_ai_summary(extracted_sections, judul_inovasi):
         logger.error(f"Failed to generate AI summary: {e}")
         return {"error": f"Gagal membuat ringkasan: {str(e)}"}
 
-@app.post("/innovations/")
-async def upload_innovation(
-    judul_inovasi: str = Form(...),
-    file: UploadFile = File(...),
-    table_name: str = Form("innovations"),
-    x_inovator: str = Header(..., alias="X-Inovator")
-):
+async def get_or_create_summary(innovation_id: str, judul_inovasi: str, sections: dict, table_name: str, refresh: bool = False):
     """
-    Endpoint untuk upload PDF inovasi dan judulnya.
-    User login inovator diambil dari header X-Inovator.
+    Ringkasan AI dari tabel {table}_summaries. Gemini hanya dipanggil bila ringkasan belum ada,
+    isi section berubah (hash berbeda), atau refresh=True. Return (ringkasan, cached).
+    """
+    sections_hash = db.sections_hash(sections)
+    if not refresh:
+        stored = await db.get_summary(innovation_id, sections_hash, table_name)
+        if stored:
+            return stored["summary"], True
+    ai_summary = await run_blocking("gemini", generate_ai_summary, sections, judul_inovasi)
+    if isinstance(ai_summary, dict) and "error" not in ai_summary:
+        await db.save_summary(innovation_id, sections_hash, ai_summary, table_name)
+    return ai_summary, False
+
+async def ingest_innovation(payload: dict, report):
+    """
+    Pipeline ingestion yang dijalankan oleh worker background (job 'ingest_innovation').
+    PDF sudah di-stream ke MinIO (objek staging) saat upload; objek dipindah ke lokasi
+    final di build_table dan staging dihapus setelah pipeline berhasil.
     Alur:
-    1. Simpan file PDF ke disk lokal.
-    2. Ekstrak section penting dari PDF (latar belakang, tujuan inovasi, deskripsi inovasi).
-    3. Buat DataFrame dari hasil ekstraksi.
-    4. Simpan data ke database dan upload file ke MinIO, serta generate vector embeddings.
-    5. Generate ringkasan AI dari dokumen.
-    6. Return ringkasan dan status code.
-    """
-    # 1. Save the uploaded PDF
-    ext = Path(file.filename).suffix
-    tmp_name = f"{uuid.uuid4()}{ext}"
-    local_path = UPLOAD_DIR / tmp_name
-    try:
-        contents = await file.read()
-        local_path.write_bytes(contents)
-        logger.info(f"File saved successfully: {local_path}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file '{file.filename}': {e}")
-
-    # 2. Extract sections via GeminiPDFExtractor
+    1. Ekstrak section penting dari PDF (latar belakang, tujuan inovasi, deskripsi inovasi).
+    2. Buat DataFrame dari hasil ekstraksi.
+    3. Simpan data ke database dan upload file ke MinIO, serta generate vector embeddings.
+    4. Generate ringkasan AI dari dokumen.
+    Kandidat near-duplicate (MinHash/LSH atas section) dicari sebelum embedding dan
+    ikut disimpan di result job bersama ringkasan dan status ekstraksi.
+    Bila sha256 PDF sama dengan dokumen yang sudah tersimpan, ekstraksi dan embedding
+    dilewati: section, chunk dan vektor dokumen tersebut dipakai ulang (field dedup).
+    """
+    upload = payload["upload"]
+    judul_inovasi = payload["judul_inovasi"]
+    x_inovator = payload["x_inovator"]
+    table_name = payload["table_name"]
     sections = ["latar_belakang", "tujuan_inovasi", "deskripsi_inovasi"]
-    try:
-        extracted_raw = db.extractor.extract_multiple_sections(str(local_path), sections)
+    duplicate = await db.find_by_document_sha256(
+        upload["sha256"], table_name, prefer_id=generate_inovasi_id(judul_inovasi, x_inovator)
+    )
+    if duplicate and not has_extracted_sections(duplicate):
+        # Earlier extraction of this document failed; nothing worth reusing
+        duplicate = None
+
+    if duplicate:
+        # 1. Identical PDF already ingested: reuse its stored sections
+        logger.info(f"Upload {upload['sha256']} duplicates {duplicate['id']}; skipping extraction and embedding")
+        extracted = {sec: duplicate[sec] for sec in sections}
+        await report("extract", "skipped")
+    else:
+        # 1. Extract sections via GeminiPDFExtractor, straight from the in-memory PDF
+        await report("extract", "running")
+        pdf_bytes = await db.read_object(upload["object_name"])
+        extracted_raw = await run_blocking("gemini", db.extractor.extract_multiple_sections, None, sections, data=pdf_bytes)
         logger.info(f"Raw extraction result: {extracted_raw}")
-        
+
         # Parse the extraction result properly
         extracted = parse_extraction_result(extracted_raw, sections)
         logger.info(f"Parsed sections: {extracted}")
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Extraction error for file '{local_path}': {e}")
+        await report("extract")
+
+    # 2. Build a pandas DataFrame in the expected shape
+    df = build_inovasi_dataframe(
+        None, judul_inovasi, x_inovator, extracted,
+        source_object=upload["object_name"], document_sha256=upload["sha256"]
+    )
 
-    # 3. Build a pandas DataFrame in the expected shape
-    df = build_inovasi_dataframe(local_path, judul_inovasi, x_inovator, extracted)
-    
     logger.info(f"DataFrame created with extracted data:")
     for col in ["latar_belakang", "tujuan_inovasi", "deskripsi_inovasi"]:
         logger.info(f"  {col}: {df[col].iloc[0][:100]}...")
-    
-    logger.info(f"PDF will be uploaded to MinIO and local file will be deleted after processing")
 
-    # 4. Invoke build_table to persist and index
+    # Near-duplicate candidates from shingle overlap, before any embedding call
+    innovation_id = df['id'].iloc[0]
+    try:
+        near_duplicates = await minhash_index.candidates(
+            innovation_text(extracted), exclude=innovation_id, table_name=table_name
+        )
+    except Exception as e:
+        logger.error(f"Near-duplicate lookup failed for {innovation_id}: {e}")
+        near_duplicates = []
+    await report("near_duplicates")
+
+    # 3. Invoke build_table to persist and index (reports stored/chunked/embedded/indexed)
+    build_status = await db.build_table(
+        df, table_name, progress=report,
+        reuse_embeddings_from=duplicate["id"] if duplicate else None
+    )
+    logger.info(f'Build table status: {build_status}')
     try:
-        status = await db.build_table(df, table_name)
-        logger.info(f'Build table status: {status}')
+        await db.remove_object(upload["object_name"])
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"build_table failed for '{table_name}': {e}")
+        logger.warning(f"Could not remove staging object {upload['object_name']}: {e}")
 
-    # 5. Generate AI summary
+    async with db.acquire() as conn:
+        row = await conn.fetchrow(
+            f"SELECT latar_belakang, tujuan_inovasi, deskripsi_inovasi FROM {table_name} WHERE id = $1",
+            innovation_id
+        )
+    stored_sections = dict(row) if row else extracted
+
+    # Store the MinHash signature + LSH bands of the cleaned sections
     try:
-        ai_summary = generate_ai_summary(extracted, judul_inovasi)
+        await minhash_index.add(innovation_id, innovation_text(stored_sections), table_name)
+        await report("minhash")
+    except Exception as e:
+        logger.error(f"Failed to update MinHash index for {innovation_id}: {e}")
+        await report("minhash", "failed")
+
+    # 4. Generate AI summary from the stored sections and persist it in {table}_summaries
+    await report("summary", "running")
+    try:
+        ai_summary, _ = await get_or_create_summary(innovation_id, judul_inovasi, stored_sections, table_name)
     except Exception as e:
         logger.error(f"Failed to generate AI summary: {e}")
         ai_summary = "Ringkasan tidak dapat dibuat"
+    await report("summary")
 
-    return JSONResponse({
-        "status": "success", 
+    # 5. Fold the document into the corpus LSA model; schedule a full refit when due
+    try:
+        if await lsa_index.add_document(innovation_id, stored_sections, table_name):
+            await job_queue.enqueue("lsa_refit", {"table_name": table_name}, unique=True)
+        await report("lsa")
+    except Exception as e:
+        logger.error(f"Failed to update LSA index for {innovation_id}: {e}")
+        await report("lsa", "failed")
+
+    return {
+        "status": "success",
         "code": 200,
         "table": table_name,
         "extracted_sections": {
@@ -273,7 +278,373 @@ async def upload_innovation(
             for sec in sections
         },
         "ai_summary": ai_summary,
+        "near_duplicates": near_duplicates,
+        "dedup": {"duplicate_of": duplicate["id"], "document_sha256": upload["sha256"]} if duplicate else None,
         "innovation_id": df['id'].iloc[0]
+    }
+
+async def refit_lsa(payload: dict, report):
+    """Job 'lsa_refit': fit ulang model LSA atas seluruh korpus inovasi"""
+    await report("refit", "running")
+    result = await lsa_index.refit(payload.get("table_name", "innovations"))
+    await report("refit")
+    return result
+
+async def discard_ingest_upload(payload: dict, error: str):
+    """Job 'ingest_innovation' gagal permanen: hapus objek staging PDF-nya dari MinIO"""
+    object_name = payload["upload"]["object_name"]
+    try:
+        await db.remove_object(object_name)
+    except Exception as e:
+        logger.warning(f"Could not remove staging object {object_name}: {e}")
+
+lsa_index = LSAIndex(db)
+minhash_index = MinHashIndex(db)
+job_config = JobQueueConfig()
+job_queue = JobQueue(
+    db,
+    handlers={"ingest_innovation": ingest_innovation, "lsa_refit": refit_lsa},
+    workers=job_config.workers,
+    poll_interval=job_config.poll_interval,
+    max_attempts=job_config.max_attempts,
+    stale_after=job_config.stale_after,
+    retry_base_delay=job_config.retry_base_delay,
+    retry_max_delay=job_config.retry_max_delay,
+    failure_handlers={"ingest_innovation": discard_ingest_upload},
+)
+
+@app.post("/innovations/", status_code=202)
+async def upload_innovation(
+    judul_inovasi: str = Form(...),
+    file: UploadFile = File(...),
+    table_name: str = Form("innovations"),
+    x_inovator: str = Header(..., alias="X-Inovator")
+):
+    """
+    Endpoint untuk upload PDF inovasi dan judulnya.
+    User login inovator diambil dari header X-Inovator.
+    File di-stream per chunk langsung ke MinIO (multipart) sambil menghitung sha256,
+    tanpa ditampung utuh di memori atau ditulis ke uploads/; ukuran di atas
+    UPLOAD_MAX_BYTES ditolak dengan 413. Worker background memproses file tersebut;
+    response 202 berisi job_id yang statusnya bisa dipantau lewat GET /innovations/jobs/{job_id}.
+    Bila PDF identik (sha256) sudah ada, field dedup menyebut inovasi asalnya dan job
+    memakai ulang hasil ekstraksi serta embedding-nya.
+    """
+    if file.size is not None and file.size > upload_config.max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds the maximum size of {upload_config.max_bytes} bytes")
+
+    # Stream the uploaded PDF to a staging object
+    ext = Path(file.filename).suffix or ".pdf"
+    staging_object = f"{upload_config.staging_prefix}/{uuid.uuid4()}{ext}"
+    try:
+        upload = await db.stream_upload(file.file, staging_object, upload_config.max_bytes, upload_config.part_size)
+        logger.info(f"File streamed to MinIO: {staging_object} ({upload['size']} bytes)")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file '{file.filename}': {e}")
+
+    innovation_id = generate_inovasi_id(judul_inovasi, x_inovator)
+    duplicate = await db.find_by_document_sha256(upload["sha256"], table_name, prefer_id=innovation_id)
+
+    try:
+        job_id = await job_queue.enqueue("ingest_innovation", {
+            "upload": upload,
+            "judul_inovasi": judul_inovasi,
+            "x_inovator": x_inovator,
+            "table_name": table_name,
+        })
+    except Exception as e:
+        try:
+            await db.remove_object(staging_object)
+        except Exception:
+            logger.warning(f"Could not remove staging object {staging_object}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue ingestion job: {e}")
+
+    return JSONResponse({
+        "status": "queued",
+        "code": 202,
+        "job_id": job_id,
+        "table": table_name,
+        "innovation_id": innovation_id,
+        "document_sha256": upload["sha256"],
+        "size": upload["size"],
+        "dedup": {"duplicate_of": duplicate["id"]} if duplicate else None,
+        "status_url": f"/innovations/jobs/{job_id}"
+    }, status_code=202)
+
+
+def parse_batch_manifest(raw) -> dict:
+    """
+    Manifest judul untuk batch upload: objek JSON {"nama_file.pdf": "Judul"} atau list
+    [{"file": "nama_file.pdf", "judul_inovasi": "Judul", "inovator": "opsional"}].
+    Return dict nama file -> {"judul_inovasi", "inovator"}.
+    """
+    if not raw:
+        return {}
+    data = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    if isinstance(data, dict):
+        return {name: {"judul_inovasi": title} for name, title in data.items()}
+    if isinstance(data, list):
+        return {
+            entry["file"]: {"judul_inovasi": entry.get("judul_inovasi"), "inovator": entry.get("inovator")}
+            for entry in data if isinstance(entry, dict) and entry.get("file")
+        }
+    raise ValueError("Manifest must be a JSON object or list")
+
+def collect_batch_items(files, archive, manifest: dict, x_inovator: str, table_name: str) -> list:
+    """Satu item pipeline per PDF (file multipart dan/atau anggota arsip zip)"""
+    sources = []
+    for upload in files or []:
+        sources.append((upload.filename, upload.size, lambda upload=upload: upload.file))
+    if archive is not None:
+        zf = zipfile.ZipFile(archive.file)
+        names = zf.namelist()
+        if not manifest:
+            manifest_name = next((n for n in names if Path(n).name.lower() == "manifest.json"), None)
+            if manifest_name:
+                manifest = parse_batch_manifest(zf.read(manifest_name))
+        for info in zf.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith(".pdf") or name.startswith("__MACOSX/"):
+                continue
+            sources.append((name, info.file_size, lambda info=info: zf.open(info)))
+
+    items = []
+    for name, size, opener in sources:
+        entry = manifest.get(name) or manifest.get(Path(name).name) or {}
+        judul_inovasi = entry.get("judul_inovasi") or Path(name).stem.replace("_", " ").strip()
+        inovator = entry.get("inovator") or x_inovator
+        items.append({
+            "key": name,
+            "size": size,
+            "open": opener,
+            "judul_inovasi": judul_inovasi,
+            "x_inovator": inovator,
+            "table_name": table_name,
+            "innovation_id": generate_inovasi_id(judul_inovasi, inovator),
+        })
+    return items
+
+def build_batch_pipeline(table_name: str) -> StagedPipeline:
+    """
+    Pipeline batch upload: store -> extract -> chunk -> embed -> persist, masing-masing
+    dengan jumlah worker sendiri sehingga MinIO, Gemini, embedding Vertex dan Postgres
+    bekerja bersamaan. Ringkasan AI tidak dibuat di sini (dibuat saat GET summary).
+    """
+    seen = {}
+    first_by_hash = {}
+
+    async def store(item):
+        if "upload" not in item:
+            if item["size"] is not None and item["size"] > upload_config.max_bytes:
+                raise UploadTooLarge(upload_config.max_bytes)
+            staging_object = f"{upload_config.staging_prefix}/{uuid.uuid4()}.pdf"
+            source = item["open"]()
+            try:
+                item["upload"] = await db.stream_upload(source, staging_object, upload_config.max_bytes, upload_config.part_size)
+            finally:
+                if isinstance(source, zipfile.ZipExtFile):
+                    source.close()
+            item["document_sha256"] = item["upload"]["sha256"]
+            identity = (item["document_sha256"], item["innovation_id"])
+            if identity in seen:
+                # Same PDF under the same id earlier in this batch
+                await db.remove_object(staging_object)
+                item.update(status="skipped", dedup={"duplicate_of": item["innovation_id"], "batch_file": seen[identity]}, done=True)
+                return item
+            seen[identity] = item["key"]
+            first_file = first_by_hash.setdefault(item["document_sha256"], item["key"])
+            if first_file != item["key"]:
+                # Same PDF under another id earlier in this batch: skip extraction now and
+                # re-run once that file is persisted, so its chunks and vectors are reused
+                item.update(status="deferred", batch_duplicate_of=first_file, done=True)
+                return item
+        duplicate = await db.find_by_document_sha256(item["document_sha256"], table_name, prefer_id=item["innovation_id"])
+        if duplicate and has_extracted_sections(duplicate):
+            item["duplicate"] = duplicate
+        return item
+
+    async def extract(item):
+        if item.get("duplicate"):
+            item["sections"] = {sec: item["duplicate"][sec] for sec in INGEST_SECTIONS}
+            return item
+        pdf_bytes = await db.read_object(item["upload"]["object_name"])
+        extracted_raw = await run_blocking("gemini", db.extractor.extract_multiple_sections, None, INGEST_SECTIONS, data=pdf_bytes)
+        item["sections"] = parse_extraction_result(extracted_raw, INGEST_SECTIONS)
+        return item
+
+    async def chunk(item):
+        if not item.get("duplicate"):
+            df = pd.DataFrame([{"id": item["innovation_id"], **item["sections"]}])
+            item["chunks"] = await db.chunk_sections(df, INGEST_SECTIONS)
+        return item
+
+    async def embed(item):
+        if item.get("chunks"):
+            item["chunks"] = await db.embed_chunks(item["chunks"])
+        return item
+
+    async def persist(item):
+        innovation_id = item["innovation_id"]
+        text = innovation_text(item["sections"])
+        item["near_duplicates"] = await minhash_index.candidates(text, exclude=innovation_id, table_name=table_name)
+        df = build_inovasi_dataframe(
+            None, item["judul_inovasi"], item["x_inovator"], item["sections"],
+            document_sha256=item["document_sha256"], source_object=item["upload"]["object_name"]
+        ).drop(columns=["source_object"])
+        df["bucket_name"] = db.bucket_name
+        df["link_document"] = await db.promote_upload(item["upload"]["object_name"], innovation_id, table_name)
+        await db.generateSourceTable(df, table_name, db.default_create_query(table_name))
+        if item.get("duplicate"):
+            item["chunk_count"] = await db.copy_embeddings(item["duplicate"]["id"], innovation_id, table_name)
+            item["dedup"] = {"duplicate_of": item["duplicate"]["id"], "document_sha256": item["document_sha256"]}
+        else:
+            chunks = item.get("chunks") or []
+            if chunks:
+                await db.generateVectorTable(pd.DataFrame(chunks), table_name, db.default_vector_query(table_name), bulk=True)
+            item["chunk_count"] = len(chunks)
+        await minhash_index.add(innovation_id, text, table_name)
+        item["lsa_refit_due"] = await lsa_index.add_document(innovation_id, item["sections"], table_name)
+        try:
+            await db.remove_object(item["upload"]["object_name"])
+        except Exception as e:
+            logger.warning(f"Could not remove staging object {item['upload']['object_name']}: {e}")
+        return item
+
+    return StagedPipeline([
+        ("store", store, batch_config.store_concurrency),
+        ("extract", extract, batch_config.extract_concurrency),
+        ("chunk", chunk, batch_config.chunk_concurrency),
+        ("embed", embed, batch_config.embed_concurrency),
+        ("persist", persist, batch_config.persist_concurrency),
+    ], queue_size=batch_config.queue_size)
+
+def batch_result_line(item: dict) -> dict:
+    """Satu baris NDJSON hasil per file"""
+    line = {
+        "file": item["key"],
+        "status": item.get("status", "success"),
+        "innovation_id": item["innovation_id"],
+        "judul_inovasi": item["judul_inovasi"],
+        "document_sha256": item.get("document_sha256"),
+        "timings_ms": item.get("timings", {}),
+    }
+    if line["status"] == "failed":
+        line.update(stage=item.get("stage"), error=item.get("error"))
+    else:
+        line.update(
+            extracted_sections={
+                sec: "✓" if (item.get("sections") or {}).get(sec) not in (None, "", "TIDAK DITEMUKAN") else "✗"
+                for sec in INGEST_SECTIONS
+            },
+            chunks=item.get("chunk_count"),
+            dedup=item.get("dedup"),
+            near_duplicates=item.get("near_duplicates", []),
+        )
+    return line
+
+@app.post("/innovations/batch")
+async def upload_innovation_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    manifest: Optional[str] = Form(None),
+    table_name: str = Form("innovations"),
+    x_inovator: str = Header(..., alias="X-Inovator")
+):
+    """
+    Endpoint batch upload: banyak PDF (field files) dan/atau satu arsip zip (field archive),
+    dengan manifest judul opsional (JSON; atau manifest.json di dalam zip). Tanpa manifest,
+    judul diambil dari nama file. Hasil per file di-stream sebagai NDJSON begitu file
+    tersebut selesai, ditutup satu baris {"summary": ...}.
+    """
+    try:
+        items = collect_batch_items(files, archive, parse_batch_manifest(manifest), x_inovator, table_name)
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch upload: {e}")
+    if not items:
+        raise HTTPException(status_code=400, detail="No PDF files in batch")
+    if len(items) > batch_config.max_files:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds the maximum of {batch_config.max_files} files")
+
+    try:
+        await db.create_innovation_tables(table_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to prepare tables: {e}")
+
+    pipeline = build_batch_pipeline(table_name)
+
+    async def event_stream():
+        started = time.perf_counter()
+        counts = {"success": 0, "failed": 0, "skipped": 0}
+        refit_due = False
+        pending = items
+        while pending:
+            # Files deferred as in-batch duplicates go through a second pass
+            deferred = []
+            async for item in pipeline.run(pending):
+                if item.get("status") == "deferred":
+                    del item["status"], item["done"]
+                    deferred.append(item)
+                    continue
+                line = batch_result_line(item)
+                counts[line["status"]] = counts.get(line["status"], 0) + 1
+                refit_due = refit_due or bool(item.get("lsa_refit_due"))
+                if line["status"] == "failed" and item.get("upload"):
+                    try:
+                        await db.remove_object(item["upload"]["object_name"])
+                    except Exception as e:
+                        logger.warning(f"Could not remove staging object {item['upload']['object_name']}: {e}")
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            pending = deferred
+        if counts["success"]:
+            await db.generateHNSWIndexing(table_name)
+        if refit_due:
+            await job_queue.enqueue("lsa_refit", {"table_name": table_name}, unique=True)
+        yield json.dumps({"summary": {
+            "files": len(items),
+            **counts,
+            "lsa_refit_queued": refit_due,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "stages": {
+                name: {**stats, "seconds": round(stats["seconds"], 3)}
+                for name, stats in pipeline.stats.items()
+            },
+        }}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.post("/lsa/refit", status_code=202)
+async def schedule_lsa_refit(table_name: str = Form("innovations")):
+    """
+    Jadwalkan fit ulang model LSA korpus di worker background (mis. setelah impor massal).
+    Status job dapat dipantau lewat GET /innovations/jobs/{job_id}.
+    """
+    job_id = await job_queue.enqueue("lsa_refit", {"table_name": table_name}, unique=True)
+    return {"status": "queued", "code": 202, "job_id": job_id, "status_url": f"/innovations/jobs/{job_id}"}
+
+@app.get("/innovations/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Endpoint untuk memantau status job ingestion (queued / running / done / failed)
+    beserta progress per tahap. Saat status 'done', field result berisi ringkasan upload.
+    """
+    try:
+        job = await job_queue.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get job status: {e}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse({
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "stages": job["stages"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "result": job["result"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"]
     })
 
 
@@ -283,79 +654,115 @@ async def upload_innovation(
 async def get_score(
     id: str = Form(...),
     table_name: str = Form("innovations"),
+    force: bool = Form(False),
     x_inovator: str = Header(..., alias="X-Inovator")
 ):
     """
     Endpoint untuk menilai inovasi berdasarkan komponen penilaian dari env.
     File diambil dari MinIO, tidak upload ulang.
-    Juga melakukan LSA similarity check dan menyimpan hasil ke database.
+    Skor yang tersimpan dipakai ulang bila sha256 PDF dan fingerprint penilaian (model +
+    prompt/bobot) sama; model hanya dipanggil bila berbeda atau force=true.
+    Juga melakukan LSA similarity check dan menyimpan hasil ke database, serta mengembalikan
+    kandidat near-duplicate dari indeks MinHash/LSH (near_duplicates).
     """
     # ----- Ambil data inovasi dari DB -----
     try:
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"""SELECT link_document, nama_inovasi, nama_inovator, \
-                      latar_belakang, tujuan_inovasi, deskripsi_inovasi \
-               FROM {table_name} WHERE id = $1""", 
-            id
-        )
-        await conn.close()
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""SELECT link_document, nama_inovasi, nama_inovator, \
+                          latar_belakang, tujuan_inovasi, deskripsi_inovasi \
+                   FROM {table_name} WHERE id = $1""", 
+                id
+            )
         if not row or not row["link_document"]:
             raise HTTPException(status_code=404, detail="Innovation not found or link_document missing")
         innovation_data = dict(row)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get innovation data: {e}")
 
-    # ----- Download PDF dari MinIO -----
-    try:
-        from urllib.parse import urlparse
-        parsed = urlparse(innovation_data["link_document"])
-        bucket_name, object_name = parsed.path.lstrip("/").split("/", 1)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to parse object path: {e}")
+    # ----- Skor tersimpan untuk dokumen + penilaian yang sama (tanpa unduh PDF) -----
+    prompt = db.extractor.build_scoring_prompt()
+    scoring_fingerprint = db.extractor.scoring_fingerprint(prompt)
+    document_sha256 = await db.get_document_sha256(id, table_name)
+    cached_score = None
+    if document_sha256 and not force:
+        cached_score = await db.get_cached_score(id, document_sha256, scoring_fingerprint, table_name)
+    if cached_score:
+        logger.info(f"Score cache hit for {id}")
+        score_json = cached_score["score"]
+    else:
+        # ----- Ambil PDF dari MinIO (lewat cache PDF per inovasi) hanya bila perlu dinilai -----
+        try:
+            pdf_bytes = await db.get_pdf_bytes(id, innovation_data["link_document"])
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to parse object path: {e}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to download file: {e}")
+        if not document_sha256:
+            # PDF diunggah sebelum sha256 disimpan: catat agar panggilan berikutnya bisa cache hit
+            document_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+            await db.set_document_sha256(id, document_sha256, table_name)
+        try:
+            result = await run_blocking("gemini", db.extractor.extract_with_custom_prompt, None, prompt, data=pdf_bytes)
+            if result:
+                cleaned = result.replace("'", '"')
+                try:
+                    score_json = json.loads(cleaned)
+                except:
+                    match = re.search(r"\{.*\}", result, re.DOTALL)
+                    score_json = json.loads(match.group().replace("'", '"')) if match else {"raw": result, "error": "Invalid JSON"}
+                if isinstance(score_json, dict) and "error" not in score_json:
+                    await db.save_scoring_results(
+                        id, score_json, table_name,
+                        document_sha256=document_sha256, scoring_fingerprint=scoring_fingerprint
+                    )
+            else:
+                score_json = {"error": "No result from model"}
+        except Exception as e:
+            score_json = {"error": str(e)}
 
-    local_path = UPLOAD_DIR / f"{id}.pdf"
-    try:
-        db.minio_client.fget_object(bucket_name, object_name, str(local_path))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to download file: {e}")
+    query_text = (
+        f"{innovation_data['latar_belakang']} "
+        f"{innovation_data['tujuan_inovasi']} "
+        f"{innovation_data['deskripsi_inovasi']}"
+    )
 
-    # ----- Scoring model -----
+    # ----- Near-duplicate (MinHash/LSH): lookup bucket, tanpa scan seluruh korpus -----
+    near_duplicates = []
     try:
-        prompt = db.extractor.build_scoring_prompt()
-        result = db.extractor.extract_with_custom_prompt(str(local_path), prompt)
-        if result:
-            cleaned = result.replace("'", '"')
-            try:
-                score_json = json.loads(cleaned)
-            except:
-                match = re.search(r"\{.*\}", result, re.DOTALL)
-                score_json = json.loads(match.group().replace("'", '"')) if match else {"raw": result, "error": "Invalid JSON"}
-            if isinstance(score_json, dict) and "error" not in score_json:
-                await db.save_scoring_results(id, score_json)
-        else:
-            score_json = {"error": "No result from model"}
+        candidates = await minhash_index.candidates(query_text, exclude=id, table_name=table_name)
+        if candidates:
+            async with db.acquire() as conn:
+                rows = await conn.fetch(
+                    f"SELECT id, nama_inovasi, nama_inovator FROM {table_name} WHERE id = ANY($1::text[])",
+                    [c["innovation_id"] for c in candidates]
+                )
+            records = {r["id"]: dict(r) for r in rows}
+            near_duplicates = [
+                {**c, "nama_inovasi": records[c["innovation_id"]]["nama_inovasi"],
+                 "nama_inovator": records[c["innovation_id"]]["nama_inovator"]}
+                for c in candidates if c["innovation_id"] in records
+            ]
     except Exception as e:
-        score_json = {"error": str(e)}
+        logger.error(f"Near-duplicate lookup failed: {e}")
 
     # ----- LSA Similarity Check -----
     lsa_results = []
     try:
-        query_text = (
-            f"{innovation_data['latar_belakang']} "
-            f"{innovation_data['tujuan_inovasi']} "
-            f"{innovation_data['deskripsi_inovasi']}"
-        )
-        raw_results = await db.similarity_search_plagiarisme(query_text, 0.7, 10, table_name)
-        candidates = [r for r in (raw_results if isinstance(raw_results, list) else []) if r.get('id') != id]
-        if candidates:
-            texts = [
-                f"{r['latar_belakang']} {r['tujuan_inovasi']} {r['deskripsi_inovasi']}"
-                for r in candidates
-            ]
-            sim_matrix = lsa_similarity(query_text, texts)
-            for idx, rec in enumerate(candidates):
-                score = float(sim_matrix[0, idx+1]) if sim_matrix.shape[0] > 1 else 0.0
+        # Model LSA seluruh korpus: similarity = dot product terhadap vektor tersimpan.
+        # Sebelum fit korpus pertama (dokumen masih terlalu sedikit) hasil LSA kosong.
+        lsa_matches = await lsa_index.similar(id, query_text, 10, table_name) or []
+        if lsa_matches:
+            async with db.acquire() as conn:
+                rows = await conn.fetch(
+                    f"SELECT id, nama_inovasi, nama_inovator, deskripsi_inovasi FROM {table_name} WHERE id = ANY($1::text[])",
+                    [match_id for match_id, _ in lsa_matches]
+                )
+            records = {r["id"]: dict(r) for r in rows}
+            for match_id, score in lsa_matches:
+                rec = records.get(match_id)
+                if rec is None:
+                    continue
                 lsa_results.append({
                     "similarity_score": round(score, 4),
                     "nama_inovasi": rec.get("nama_inovasi", "Unknown"),
@@ -365,16 +772,10 @@ async def get_score(
         # Hapus duplikat berdasarkan nama_inovasi
         unique = {item['nama_inovasi']: item for item in lsa_results}
         lsa_results = list(unique.values())
-        await db.save_lsa_results(id, lsa_results)
+        await db.save_lsa_results(id, lsa_results, table_name)
     except Exception as e:
         logger.error(f"LSA similarity check failed: {e}")
 
-    # ----- Hapus file lokal -----
-    try:
-        os.remove(local_path)
-    except:
-        pass
-
     # ----- Siapkan response -----
     # Hitung nilai tertinggi LSA
     max_lsa = max((r['similarity_score'] for r in lsa_results), default=0)
@@ -389,7 +790,14 @@ async def get_score(
         "component_scores": {},
         "total_score": 0,
         # Placeholder plagiarism_check, akan diisi sesuai threshold
-        "plagiarism_check": None
+        "plagiarism_check": None,
+        "near_duplicates": near_duplicates,
+        "score_cache": {
+            "hit": cached_score is not None,
+            "forced": force,
+            "document_sha256": document_sha256,
+            "scored_at": cached_score["created_at"] if cached_score else None
+        }
     }
 
     # Isi component_scores
@@ -416,52 +824,38 @@ async def get_score(
 
 
 @app.get("/get_rank")
-async def get_rank(table_name: str = "innovations"):
+async def get_rank(table_name: str = "innovations", limit: Optional[int] = None, cursor: Optional[str] = None):
     """
-    Endpoint untuk mendapatkan ranking inovasi berdasarkan total_score.
-    Data diambil dari table scoring (misal: innovations_scoring), diurutkan dari skor tertinggi.
+    Endpoint untuk mendapatkan ranking inovasi berdasarkan total_score, per halaman.
+    Data diambil dari materialized view leaderboard (misal: innovations_leaderboard) yang sudah
+    berisi nama inovasi, rank dan percentile; halaman berikutnya diminta dengan next_cursor.
     """
+    limit = min(max(limit or leaderboard_config.page_size, 1), leaderboard_config.max_page_size)
     try:
-        conn = await db.connect_to_db()
-        rows = await conn.fetch(
-            f"""
-            SELECT  innovation_id,
-                    substansi_orisinalitas, 
-                    substansi_urgensi, 
-                    substansi_kedalaman, 
-                    analisis_dampak, 
-                    analisis_kelayakan, 
-                    analisis_data, 
-                    sistematika_struktur, 
-                    sistematika_bahasa, 
-                    sistematika_referensi, 
-                    total_score, 
-                    created_at
-            FROM public.{table_name}_scoring
-            ORDER BY total_score DESC
-            """
-        )
-        await conn.close()
-        ranking = [
-            {
-                "innovation_id": r["innovation_id"],
-                "substansi_orisinalitas": r["substansi_orisinalitas"],
-                "substansi_urgensi": r["substansi_urgensi"],
-                "substansi_kedalaman": r["substansi_kedalaman"],
-                "analisis_dampak": r["analisis_dampak"],
-                "analisis_kelayakan": r["analisis_kelayakan"],
-                "analisis_data": r["analisis_data"],
-                "sistematika_struktur": r["sistematika_struktur"],
-                "sistematika_bahasa": r["sistematika_bahasa"],
-                "sistematika_referensi": r["sistematika_referensi"],
-                "total_score": r["total_score"],
-                "created_at": r["created_at"].isoformat() if r["created_at"] else None
-            }
-            for r in rows
-        ]
-        return JSONResponse({"ranking": ranking, "total": len(ranking)})
+        page = await db.get_leaderboard(table_name, limit, cursor)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+    return JSONResponse({"ranking": page["items"], "next_cursor": page["next_cursor"], "total": page["total"]})
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Endpoint monitoring: statistik pool koneksi Postgres, embedding service, thread pool
+    untuk panggilan blocking (Gemini, MinIO, bcrypt), dan cache PDF.
+    """
+    return JSONResponse({
+        "db_pool": db.pool_stats(),
+        "embedding": db.embedding_stats(),
+        "executors": get_executors().stats(),
+        "pdf_cache": db.pdf_cache.stats(),
+        "chat_stream": {
+            **CHAT_STREAM_METRICS,
+            "ttft_seconds_avg": round(CHAT_STREAM_METRICS["ttft_seconds_total"] / CHAT_STREAM_METRICS["first_tokens"], 4)
+            if CHAT_STREAM_METRICS["first_tokens"] else 0.0,
+        },
+    })
 
 @app.get("/innovations/{innovation_id}/lsa_results")
 async def get_innovation_lsa_results(
@@ -494,42 +888,46 @@ async def get_innovation_lsa_results(
 @app.get("/innovations/{innovation_id}/summary")
 async def get_innovation_summary(
     innovation_id: str,
-    table_name: str = "innovations"
+    table_name: str = "innovations",
+    refresh: bool = False
 ):
     """
-    Endpoint untuk mendapatkan ringkasan inovasi berdasarkan data yang tersimpan
+    Endpoint untuk mendapatkan ringkasan inovasi berdasarkan data yang tersimpan.
+    Ringkasan diambil dari tabel {table}_summaries dan hanya dibuat ulang bila isi section
+    berubah; gunakan ?refresh=true untuk memaksa pembuatan ulang.
     """
     try:
         # Get innovation data from database
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"""SELECT nama_inovasi, nama_inovator, latar_belakang, 
-                      tujuan_inovasi, deskripsi_inovasi, link_document
-               FROM {table_name} WHERE id = $1""", 
-            innovation_id
-        )
-        await conn.close()
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""SELECT nama_inovasi, nama_inovator, latar_belakang, 
+                          tujuan_inovasi, deskripsi_inovasi, link_document
+                   FROM {table_name} WHERE id = $1""", 
+                innovation_id
+            )
         
         if not row:
             raise HTTPException(status_code=404, detail="Innovation not found")
         
         innovation_data = dict(row)
         
-        # Generate fresh summary
         extracted = {
             'latar_belakang': innovation_data['latar_belakang'],
             'tujuan_inovasi': innovation_data['tujuan_inovasi'],
             'deskripsi_inovasi': innovation_data['deskripsi_inovasi']
         }
         
-        ai_summary = generate_ai_summary(extracted, innovation_data['nama_inovasi'])
+        ai_summary, cached = await get_or_create_summary(
+            innovation_id, innovation_data['nama_inovasi'], extracted, table_name, refresh=refresh
+        )
         
         return JSONResponse({
             "innovation_id": innovation_id,
             "nama_inovasi": innovation_data['nama_inovasi'],
             "nama_inovator": innovation_data['nama_inovator'],
             "link_document": innovation_data['link_document'],
-            "ai_summary": ai_summary
+            "ai_summary": ai_summary,
+            "cached": cached
         })
         
     except HTTPException:
@@ -537,61 +935,37 @@ async def get_innovation_summary(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate summary: {e}")
 
-@app.post("/innovations/{innovation_id}/chat")
-async def chat_about_innovation(
-    innovation_id: str,
-    question: str = Form(...),
-    table_name: str = Form("innovations"),
-    x_inovator: str = Header(..., alias="X-Inovator")
-):
-    """
-    Endpoint untuk tanya jawab terkait data inovasi yang sudah disubmit.
-    Menyimpan riwayat percakapan dan memberikan jawaban berdasarkan dokumen PDF.
-    """
-    try:
-        # Validate innovation exists and get data
-        conn = await db.connect_to_db()
+async def load_chat_innovation(innovation_id: str, table_name: str, x_inovator: str) -> dict:
+    """Ambil data inovasi untuk chat dan pastikan inovator berhak mengaksesnya"""
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             f"""SELECT nama_inovasi, nama_inovator, latar_belakang, 
                       tujuan_inovasi, deskripsi_inovasi, link_document, bucket_name
                FROM {table_name} WHERE id = $1""", 
             innovation_id
         )
-        
-        if not row:
-            await conn.close()
-            raise HTTPException(status_code=404, detail="Innovation not found")
-        
-        innovation_data = dict(row)
-        
-        # Check if user has access to this innovation (optional security check)
-        if innovation_data['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
-            await conn.close()
-            raise HTTPException(status_code=403, detail="Access denied to this innovation")
-        
-        await conn.close()
-        
-        # Get the PDF from MinIO for context
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(innovation_data["link_document"])
-            object_path = parsed.path.lstrip("/")
-            parts = object_path.split("/", 1)
-            if len(parts) != 2:
-                raise Exception("Invalid link_document format")
-            bucket_name, object_name = parts
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to parse document link: {e}")
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Innovation not found")
+    
+    innovation_data = dict(row)
+    
+    # Check if user has access to this innovation (optional security check)
+    if innovation_data['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
+        raise HTTPException(status_code=403, detail="Access denied to this innovation")
+    return innovation_data
 
-        # Download PDF temporarily for AI processing
-        local_path = UPLOAD_DIR / f"chat_{innovation_id}_{uuid.uuid4().hex[:8]}.pdf"
-        try:
-            db.minio_client.fget_object(bucket_name, object_name, str(local_path))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to download PDF: {e}")
+async def load_chat_pdf(innovation_id: str, innovation_data: dict) -> bytes:
+    """PDF inovasi dari MinIO (di-cache per inovasi + ETag antar pertanyaan)"""
+    try:
+        return await db.get_pdf_bytes(innovation_id, innovation_data["link_document"])
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse document link: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to download PDF: {e}")
 
-        # Prepare context-aware prompt
-        context_prompt = f"""
+def build_chat_prompt(innovation_data: dict, question: str) -> str:
+    return f"""
         Anda adalah asisten AI yang membantu menjawab pertanyaan tentang dokumen inovasi.
         
         **Informasi Inovasi:**
@@ -616,9 +990,100 @@ async def chat_about_innovation(
         jika user minta meminta saran berikan saran yg relevan dengan inovasi ini.
         """
 
+def build_rag_chat_prompt(innovation_data: dict, question: str, chunks: list) -> str:
+    context = "\n\n".join(f"[Bagian {i + 1}]\n{chunk['content']}" for i, chunk in enumerate(chunks))
+    return f"""
+        Anda adalah asisten AI yang membantu menjawab pertanyaan tentang dokumen inovasi.
+        
+        **Informasi Inovasi:**
+        - Nama Inovasi: {innovation_data['nama_inovasi']}
+        - Nama Inovator: {innovation_data['nama_inovator']}
+        
+        **Potongan Dokumen yang Relevan:**
+        {context}
+        
+        **Pertanyaan User:** {question}
+        
+        **Instruksi:**
+        1. Jawab pertanyaan hanya berdasarkan potongan dokumen di atas
+        2. Jika informasi tidak tersedia di potongan dokumen, jelaskan dengan jelas
+        3. Berikan jawaban yang informatif dan akurat
+        4. Gunakan bahasa Indonesia yang baik dan benar
+        
+        Jawab pertanyaan dengan format yang jelas dan terstruktur.
+        jika user minta meminta saran berikan saran yg relevan dengan inovasi ini.
+        """
+
+CHAT_MODES = ("pdf", "rag")
+rag_config = ChatRagConfig()
+
+def select_rag_chunks(chunks: list, max_chars: int) -> list:
+    """Potongan teratas yang muat dalam batas karakter konteks (minimal satu potongan)"""
+    selected, used = [], 0
+    for chunk in chunks:
+        if selected and used + len(chunk["content"]) > max_chars:
+            break
+        selected.append(chunk)
+        used += len(chunk["content"])
+    return selected
+
+async def prepare_chat_prompt(innovation_id: str, innovation_data: dict, question: str, mode: str, table_name: str):
+    """
+    Siapkan prompt chat sesuai mode:
+    - 'pdf': seluruh PDF dikirim ke Gemini bersama prompt.
+    - 'rag': pertanyaan di-embed, potongan paling relevan diambil dari {table}_embeddings,
+      dan hanya potongan itu yang dikirim. Jika kemiripan potongan teratas di bawah
+      CHAT_RAG_MIN_SIMILARITY (atau retrieval gagal), kembali ke mode 'pdf'.
+    Return (prompt, pdf_bytes atau None, info konteks untuk response).
+    """
+    if mode not in CHAT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid chat mode '{mode}', expected one of {list(CHAT_MODES)}")
+
+    context = {"requested_mode": mode, "mode": "pdf"}
+    if mode == "rag":
+        try:
+            chunks = await db.retrieve_innovation_chunks(innovation_id, question, rag_config.top_k, table_name)
+        except Exception as e:
+            logger.warning(f"RAG retrieval failed for {innovation_id}, falling back to PDF: {e}")
+            chunks = []
+        top_similarity = chunks[0]["similarity"] if chunks else None
+        context["top_similarity"] = round(top_similarity, 4) if top_similarity is not None else None
+        if top_similarity is not None and top_similarity >= rag_config.min_similarity:
+            selected = select_rag_chunks(chunks, rag_config.max_context_chars)
+            context.update({
+                "mode": "rag",
+                "chunks": [round(c["similarity"], 4) for c in selected],
+                "context_chars": sum(len(c["content"]) for c in selected),
+            })
+            return build_rag_chat_prompt(innovation_data, question, selected), None, context
+        context["fallback"] = "low_retrieval_confidence"
+
+    pdf_bytes = await load_chat_pdf(innovation_id, innovation_data)
+    return build_chat_prompt(innovation_data, question), pdf_bytes, context
+
+@app.post("/innovations/{innovation_id}/chat")
+async def chat_about_innovation(
+    innovation_id: str,
+    question: str = Form(...),
+    table_name: str = Form("innovations"),
+    mode: str = Form("pdf"),
+    x_inovator: str = Header(..., alias="X-Inovator")
+):
+    """
+    Endpoint untuk tanya jawab terkait data inovasi yang sudah disubmit.
+    Menyimpan riwayat percakapan dan memberikan jawaban berdasarkan dokumen PDF
+    (mode='pdf') atau potongan dokumen yang relevan dari embeddings (mode='rag').
+    """
+    try:
+        # Validate innovation exists and get data
+        innovation_data = await load_chat_innovation(innovation_id, table_name, x_inovator)
+
+        # Prepare context-aware prompt (full PDF or retrieved chunks)
+        context_prompt, pdf_bytes, context = await prepare_chat_prompt(innovation_id, innovation_data, question, mode, table_name)
+
         # Get AI response using the PDF
         try:
-            ai_response = db.extractor.extract_with_custom_prompt(str(local_path), context_prompt)
+            ai_response = await run_blocking("gemini", db.extractor.extract_with_custom_prompt, None, context_prompt, data=pdf_bytes)
             if not ai_response:
                 ai_response = "Maaf, saya tidak dapat memproses pertanyaan Anda saat ini."
         except Exception as e:
@@ -632,35 +1097,113 @@ async def chat_about_innovation(
             innovation_id=innovation_id,
             user_question=question,
             ai_response=ai_response,
-            user_name=x_inovator
+            user_name=x_inovator,
+            table_name=table_name
         )
 
-        # Clean up temporary file
-        try:
-            os.remove(local_path)
-        except Exception:
-            pass
-
         return JSONResponse({
             "chat_id": chat_id,
             "innovation_id": innovation_id,
             "question": question,
             "answer": ai_response,
             "timestamp": pd.Timestamp.now().isoformat(),
-            "innovation_name": innovation_data['nama_inovasi']
+            "innovation_name": innovation_data['nama_inovasi'],
+            "context": context
         })
 
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file in case of error
-        try:
-            if 'local_path' in locals():
-                os.remove(local_path)
-        except:
-            pass
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {e}")
 
+# Statistik streaming chat (time-to-first-token), dilaporkan di /metrics
+CHAT_STREAM_METRICS = {"streams": 0, "completed": 0, "disconnected": 0, "failed": 0, "first_tokens": 0, "ttft_seconds_total": 0.0, "ttft_seconds_max": 0.0}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/innovations/{innovation_id}/chat/stream")
+async def chat_about_innovation_stream(
+    request: Request,
+    innovation_id: str,
+    question: str = Form(...),
+    table_name: str = Form("innovations"),
+    mode: str = Form("pdf"),
+    x_inovator: str = Header(..., alias="X-Inovator")
+):
+    """
+    Versi streaming dari endpoint chat (Server-Sent Events), mendukung mode 'pdf' dan 'rag'.
+    Event: 'start' (chat_id), 'token' (potongan jawaban), lalu 'done' (jawaban lengkap,
+    ttft_ms, total_ms) atau 'error'. Jawaban lengkap disimpan ke riwayat chat setelah
+    stream selesai; jika client memutus koneksi, panggilan model ikut dihentikan.
+    """
+    innovation_data = await load_chat_innovation(innovation_id, table_name, x_inovator)
+    context_prompt, pdf_bytes, context = await prepare_chat_prompt(innovation_id, innovation_data, question, mode, table_name)
+    chat_id = str(uuid.uuid4())
+
+    async def events():
+        CHAT_STREAM_METRICS["streams"] += 1
+        started = time.perf_counter()
+        ttft = None
+        parts = []
+        disconnected = False
+        yield sse_event("start", {"chat_id": chat_id, "innovation_id": innovation_id, "context": context})
+        tokens = stream_blocking("gemini", db.extractor.stream_with_custom_prompt, None, context_prompt, data=pdf_bytes)
+        try:
+            async for text in tokens:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    CHAT_STREAM_METRICS["first_tokens"] += 1
+                    CHAT_STREAM_METRICS["ttft_seconds_total"] += ttft
+                    CHAT_STREAM_METRICS["ttft_seconds_max"] = max(CHAT_STREAM_METRICS["ttft_seconds_max"], ttft)
+                    logger.info(f"Chat stream {chat_id}: first token after {ttft * 1000:.0f} ms")
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+                if await request.is_disconnected():
+                    disconnected = True
+                    break
+        except (asyncio.CancelledError, GeneratorExit):
+            # Server cancelled / closed the response because the client went away
+            disconnected = True
+            raise
+        except Exception as e:
+            CHAT_STREAM_METRICS["failed"] += 1
+            logger.error(f"Chat stream {chat_id} failed: {e}")
+            yield sse_event("error", {"detail": "Terjadi kesalahan saat memproses pertanyaan Anda."})
+            return
+        finally:
+            await tokens.aclose()
+            if disconnected:
+                CHAT_STREAM_METRICS["disconnected"] += 1
+                logger.info(f"Chat stream {chat_id}: client disconnected, model call cancelled")
+        if disconnected:
+            return
+
+        ai_response = "".join(parts).strip() or "Maaf, saya tidak dapat memproses pertanyaan Anda saat ini."
+        await db.save_chat_history(
+            chat_id=chat_id,
+            innovation_id=innovation_id,
+            user_question=question,
+            ai_response=ai_response,
+            user_name=x_inovator,
+            table_name=table_name
+        )
+        CHAT_STREAM_METRICS["completed"] += 1
+        yield sse_event("done", {
+            "chat_id": chat_id,
+            "answer": ai_response,
+            "ttft_ms": round(ttft * 1000) if ttft is not None else None,
+            "total_ms": round((time.perf_counter() - started) * 1000),
+            "timestamp": pd.Timestamp.now().isoformat(),
+            "innovation_name": innovation_data['nama_inovasi']
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/innovations/{innovation_id}/chat_history")
 async def get_chat_history(
     innovation_id: str,
@@ -673,22 +1216,18 @@ async def get_chat_history(
     """
     try:
         # Verify innovation exists and user has access
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
-            innovation_id
-        )
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
+                innovation_id
+            )
         
         if not row:
-            await conn.close()
             raise HTTPException(status_code=404, detail="Innovation not found")
         
         # Check access
         if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
-            await conn.close()
             raise HTTPException(status_code=403, detail="Access denied to this innovation")
-        
-        await conn.close()
 
         # Get chat history
         chat_history = await db.get_chat_history(innovation_id, limit)
@@ -737,29 +1276,41 @@ async def search_chat_history(
     search_query: str = Form(...),
     innovation_id: str = Form(None),
     table_name: str = Form("innovations"),
+    limit: Optional[int] = Form(None),
+    cursor: Optional[str] = Form(None),
     x_inovator: str = Header(..., alias="X-Inovator")
 ):
     """
     Endpoint untuk mencari dalam riwayat percakapan berdasarkan kata kunci.
+    Pencarian full-text (tsvector + GIN), hasil diurutkan berdasarkan relevansi dengan
+    potongan teks yang disorot; halaman berikutnya diminta dengan next_cursor.
     """
     try:
         if not search_query.strip():
             raise HTTPException(status_code=400, detail="Search query cannot be empty")
 
+        limit = min(max(limit or chat_search_config.page_size, 1), chat_search_config.max_page_size)
         # Search chat history
-        search_results = await db.search_chat_history(
-            search_query=search_query,
-            user_name=x_inovator,
-            innovation_id=innovation_id,
-            table_name=table_name
-        )
+        try:
+            page = await db.search_chat_history(
+                search_query=search_query,
+                user_name=x_inovator,
+                innovation_id=innovation_id,
+                table_name=table_name,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        search_results = page["results"]
         
         return JSONResponse({
             "search_query": search_query,
             "user_name": x_inovator,
             "innovation_id": innovation_id,
             "total_results": len(search_results),
-            "results": search_results
+            "results": search_results,
+            "next_cursor": page["next_cursor"]
         })
 
     except HTTPException:
@@ -778,28 +1329,26 @@ async def delete_chat_history(
     """
     try:
         # Verify innovation exists and user has access
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
-            innovation_id
-        )
-        
-        if not row:
-            await conn.close()
-            raise HTTPException(status_code=404, detail="Innovation not found")
-        
-        # Check access
-        if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
-            await conn.close()
-            raise HTTPException(status_code=403, detail="Access denied to this innovation")
-        
-        # Delete chat history
-        result = await conn.execute(
-            f"DELETE FROM {table_name}_chat_history WHERE innovation_id = $1", 
-            innovation_id
-        )
-        
-        await conn.close()
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
+                innovation_id
+            )
+            
+            if not row:
+                raise HTTPException(status_code=404, detail="Innovation not found")
+            
+            # Check access
+            if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
+                raise HTTPException(status_code=403, detail="Access denied to this innovation")
+            
+            # Delete chat history (and its analytics)
+            async with conn.transaction():
+                result = await conn.execute(
+                    f"DELETE FROM {table_name}_chat_history WHERE innovation_id = $1", 
+                    innovation_id
+                )
+                await chat_analytics.delete_innovation(conn, table_name, innovation_id)
         
         # Extract number of deleted rows
         deleted_count = int(result.split()[-1]) if result and result.split()[-1].isdigit() else 0
@@ -826,65 +1375,25 @@ async def get_chat_analytics(
     """
     try:
         # Verify access
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"SELECT nama_inovator, nama_inovasi FROM {table_name} WHERE id = $1", 
-            innovation_id
-        )
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT nama_inovator, nama_inovasi FROM {table_name} WHERE id = $1", 
+                innovation_id
+            )
         
-        if not row:
-            await conn.close()
-            raise HTTPException(status_code=404, detail="Innovation not found")
+            if not row:
+                raise HTTPException(status_code=404, detail="Innovation not found")
         
-        if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
-            await conn.close()
-            raise HTTPException(status_code=403, detail="Access denied")
+            if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
+                raise HTTPException(status_code=403, detail="Access denied")
         
-        # Get chat analytics
-        analytics = await conn.fetchrow(f"""
-            SELECT 
-                COUNT(*) as total_conversations,
-                COUNT(DISTINCT DATE(created_at)) as active_days,
-                AVG(LENGTH(user_question)) as avg_question_length,
-                AVG(LENGTH(ai_response)) as avg_response_length,
-                MIN(created_at) as first_conversation,
-                MAX(created_at) as last_conversation
-            FROM {table_name}_chat_history 
-            WHERE innovation_id = $1
-        """, innovation_id)
-        
-        # Get most common question patterns (simple word frequency)
-        common_words = await conn.fetch(f"""
-            SELECT word, COUNT(*) as frequency
-            FROM (
-                SELECT unnest(string_to_array(lower(user_question), ' ')) as word
-                FROM {table_name}_chat_history 
-                WHERE innovation_id = $1
-            ) words
-            WHERE LENGTH(word) > 3
-              AND word NOT IN ('yang', 'adalah', 'untuk', 'dari', 'dengan', 'pada', 'dalam', 'atau', 'dan', 'ini', 'itu', 'akan', 'dapat', 'tidak', 'ada', 'juga', 'saya', 'anda', 'bagaimana', 'mengapa', 'apakah')
-            GROUP BY word
-            ORDER BY frequency DESC
-            LIMIT 10
-        """, innovation_id)
-        
-        await conn.close()
+            # Analitik dipelihara secara inkremental saat chat disimpan (module/chat_analytics.py)
+            analytics = await chat_analytics.get_analytics(conn, table_name, innovation_id)
         
         return JSONResponse({
             "innovation_id": innovation_id,
             "innovation_name": row['nama_inovasi'],
-            "analytics": {
-                "total_conversations": analytics['total_conversations'] if analytics else 0,
-                "active_days": analytics['active_days'] if analytics else 0,
-                "avg_question_length": round(float(analytics['avg_question_length']) if analytics and analytics['avg_question_length'] else 0, 2),
-                "avg_response_length": round(float(analytics['avg_response_length']) if analytics and analytics['avg_response_length'] else 0, 2),
-                "first_conversation": analytics['first_conversation'].isoformat() if analytics and analytics['first_conversation'] else None,
-                "last_conversation": analytics['last_conversation'].isoformat() if analytics and analytics['last_conversation'] else None
-            },
-            "common_question_words": [
-                {"word": row['word'], "frequency": row['frequency']} 
-                for row in common_words
-            ]
+            **analytics
         })
 
     except HTTPException:
@@ -919,44 +1428,41 @@ async def get_innovations_by_inovator(
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 async def ensure_user_table():
-    conn = await db.connect_to_db()
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS user_login (
-            id SERIAL PRIMARY KEY,
-            username VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    await conn.close()
+    async with db.acquire() as conn:
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_login (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
 
 @app.post("/register")
 async def register_user(username: str = Form(...), password: str = Form(...)):
     await ensure_user_table()
-    conn = await db.connect_to_db()
-    # Cek apakah username sudah ada
-    user = await conn.fetchrow("SELECT * FROM user_login WHERE username = $1", username)
+    async with db.acquire() as conn:
+        # Cek apakah username sudah ada
+        user = await conn.fetchrow("SELECT * FROM user_login WHERE username = $1", username)
     if user:
-        await conn.close()
         raise HTTPException(status_code=400, detail="Username already exists")
-    # Hash password
-    password_hash = pwd_context.hash(password)
-    await conn.execute(
-        "INSERT INTO user_login (username, password_hash) VALUES ($1, $2)",
-        username, password_hash
-    )
-    await conn.close()
+    # Hash password di thread pool bcrypt (tanpa menahan koneksi pool / event loop)
+    password_hash = await run_blocking("bcrypt", pwd_context.hash, password)
+    async with db.acquire() as conn:
+        await conn.execute(
+            "INSERT INTO user_login (username, password_hash) VALUES ($1, $2)",
+            username, password_hash
+        )
     return {"status": "success", "message": "User registered successfully"}
 
 @app.post("/login")
 async def login_user(username: str = Form(...), password: str = Form(...)):
     await ensure_user_table()
-    conn = await db.connect_to_db()
-    user = await conn.fetchrow("SELECT * FROM user_login WHERE username = $1", username)
-    await conn.close()
+    async with db.acquire() as conn:
+        user = await conn.fetchrow("SELECT * FROM user_login WHERE username = $1", username)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Username not found")
-    if not pwd_context.verify(password, user["password_hash"]):
+    if not await run_blocking("bcrypt", pwd_context.verify, password, user["password_hash"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
     return {"status": "success", "message": "Login successful"}
 
@@ -992,7 +1498,7 @@ async def search_inovasi(
         # Gunakan model AI untuk membuat penjelasan
         ai_explanation = None
         try:
-            ai_result = db.extractor.model.generate_content([agent_prompt])
+            ai_result = await run_blocking("gemini", db.extractor.model.generate_content, [agent_prompt])
             if ai_result and ai_result.text:
                 ai_explanation = ai_result.text.strip()
         except Exception as e:
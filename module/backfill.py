@@ -0,0 +1,300 @@
+"""
+Resumable bulk backfill: load a directory of proposal PDFs through PostgreDB.build_table.
+
+Judul dan inovator tiap file dibaca dari CSV (kolom file, judul_inovasi, inovator). Setiap
+file melewati tahap uploaded -> extracted -> embedded -> indexed (HNSW, MinHash, LSA); tahap
+yang selesai dicatat di {table}_backfill_state sehingga run yang terputus dilanjutkan tanpa
+mengulang ekstraksi Gemini. Throughput (docs/min) dan kegagalan dicetak selama proses berjalan.
+
+    python -m module.backfill --dir arsip/ --csv judul.csv --table innovations --workers 4
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.config import UploadConfig
+from module.executors import run_blocking
+from module.lsa import innovation_text
+from module.ingest import (
+    INGEST_SECTIONS, build_inovasi_dataframe, generate_inovasi_id, has_extracted_sections, parse_extraction_result
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+STAGES = ("uploaded", "extracted", "embedded", "indexed")
+CSV_COLUMNS = {
+    "file": ("file", "filename", "nama_file"),
+    "judul_inovasi": ("judul_inovasi", "judul"),
+    "inovator": ("inovator", "nama_inovator", "x_inovator"),
+}
+
+
+def read_manifest(csv_path) -> List[dict]:
+    """Rows of the title CSV as {"file", "judul_inovasi", "inovator"} (column aliases allowed)"""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        header = {name.strip().lower(): name for name in reader.fieldnames or []}
+        columns = {}
+        for key, aliases in CSV_COLUMNS.items():
+            match = next((header[a] for a in aliases if a in header), None)
+            if match is None:
+                raise ValueError(f"CSV {csv_path} needs a '{key}' column (one of {', '.join(aliases)})")
+            columns[key] = match
+        return [
+            {key: (row.get(column) or "").strip() for key, column in columns.items()}
+            for row in reader
+            if (row.get(columns["file"]) or "").strip()
+        ]
+
+
+class BackfillState:
+    """Per-file stage checkpoints in ``{table}_backfill_state``"""
+
+    FIELDS = ("innovation_id", "stage", "document_sha256", "object_name", "sections",
+              "reuse_from", "file_size", "file_mtime", "attempts", "error")
+
+    def __init__(self, db, table_name: str):
+        self.db = db
+        self.table = f"{table_name}_backfill_state"
+
+    async def create_table(self):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    file_name TEXT PRIMARY KEY,
+                    innovation_id VARCHAR(1024),
+                    stage VARCHAR(32),
+                    document_sha256 CHAR(64),
+                    object_name TEXT,
+                    sections JSONB,
+                    reuse_from VARCHAR(1024),
+                    file_size BIGINT,
+                    file_mtime DOUBLE PRECISION,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+    async def load(self) -> Dict[str, dict]:
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(f"SELECT * FROM {self.table}")
+        state = {}
+        for row in rows:
+            entry = dict(row)
+            if isinstance(entry.get("sections"), str):
+                entry["sections"] = json.loads(entry["sections"])
+            state[entry["file_name"]] = entry
+        return state
+
+    async def save(self, file_name: str, entry: dict):
+        values = [entry.get(field) for field in self.FIELDS]
+        values[self.FIELDS.index("sections")] = json.dumps(entry["sections"]) if entry.get("sections") is not None else None
+        columns = ", ".join(self.FIELDS)
+        placeholders = ", ".join(f"${i + 2}" for i in range(len(self.FIELDS)))
+        updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in self.FIELDS)
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                INSERT INTO {self.table} (file_name, {columns}) VALUES ($1, {placeholders})
+                ON CONFLICT (file_name) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+            """, file_name, *values)
+
+    async def reset(self):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+
+class Backfill:
+    """Drive every manifest entry through the checkpointed stages with parallel workers"""
+
+    def __init__(self, db, table_name: str, directory, state: BackfillState, lsa_index=None, minhash_index=None):
+        self.db = db
+        self.table_name = table_name
+        self.directory = Path(directory)
+        self.state = state
+        self.lsa_index = lsa_index
+        self.minhash_index = minhash_index
+        self.staging_prefix = UploadConfig().staging_prefix
+        self.checkpoints: Dict[str, dict] = {}
+        self.lsa_refit_due = False
+
+    async def _checkpoint(self, file_name: str, entry: dict, stage: str):
+        entry.update(stage=stage, error=None)
+        await self.state.save(file_name, entry)
+
+    async def process(self, item: dict) -> dict:
+        """Run the remaining stages of one file; returns its checkpoint entry"""
+        file_name = item["file"]
+        path = self.directory / file_name
+        if not path.is_file():
+            raise FileNotFoundError(f"{path} not found")
+        stat = path.stat()
+        innovation_id = generate_inovasi_id(item["judul_inovasi"], item["inovator"])
+        entry = self.checkpoints.get(file_name) or {}
+        if (entry.get("file_size"), entry.get("file_mtime"), entry.get("innovation_id")) != (stat.st_size, stat.st_mtime, innovation_id):
+            # New file, or the file / its manifest row changed since the checkpoint: start over
+            entry = {"innovation_id": innovation_id, "file_size": stat.st_size, "file_mtime": stat.st_mtime, "stage": None}
+        entry["attempts"] = (entry.get("attempts") or 0) + 1
+        self.checkpoints[file_name] = entry
+        done = STAGES.index(entry["stage"]) + 1 if entry.get("stage") in STAGES else 0
+        entry["skipped"] = STAGES[:done]
+
+        if done < 1:
+            with open(path, "rb") as f:
+                upload = await self.db.stream_upload(f, f"{self.staging_prefix}/backfill/{self.table_name}/{innovation_id}.pdf")
+            entry.update(object_name=upload["object_name"], document_sha256=upload["sha256"])
+            await self._checkpoint(file_name, entry, "uploaded")
+
+        if done < 2:
+            duplicate = await self.db.find_by_document_sha256(entry["document_sha256"], self.table_name, prefer_id=innovation_id)
+            if duplicate and has_extracted_sections(duplicate):
+                sections, entry["reuse_from"] = {sec: duplicate[sec] for sec in INGEST_SECTIONS}, duplicate["id"]
+            else:
+                data = await asyncio.to_thread(path.read_bytes)
+                raw = await run_blocking("gemini", self.db.extractor.extract_multiple_sections, None, INGEST_SECTIONS, data=data)
+                sections, entry["reuse_from"] = parse_extraction_result(raw, INGEST_SECTIONS), None
+                if not has_extracted_sections(sections):
+                    raise RuntimeError("no sections extracted")
+            entry["sections"] = sections
+            await self._checkpoint(file_name, entry, "extracted")
+
+        if done < 3:
+            df = build_inovasi_dataframe(
+                None, item["judul_inovasi"], item["inovator"], entry["sections"],
+                source_object=entry["object_name"], document_sha256=entry["document_sha256"]
+            )
+            # Stored, chunked and embedded; the HNSW index is built in the "indexed" stage
+            status = await self.db.build_table(
+                df, self.table_name, reuse_embeddings_from=entry.get("reuse_from"), build_index=False
+            )
+            if status == "success but embedding failed for all chunks":
+                raise RuntimeError(status)
+            await self._checkpoint(file_name, entry, "embedded")
+
+        if done < 4:
+            await self.db.generateHNSWIndexing(self.table_name)
+            text = innovation_text(entry["sections"])
+            if self.minhash_index is not None:
+                await self.minhash_index.add(innovation_id, text, self.table_name)
+            if self.lsa_index is not None and await self.lsa_index.add_document(innovation_id, entry["sections"], self.table_name):
+                self.lsa_refit_due = True
+            try:
+                await self.db.remove_object(entry["object_name"])
+            except Exception as e:
+                logger.warning(f"Could not remove staging object {entry['object_name']}: {e}")
+            await self._checkpoint(file_name, entry, "indexed")
+        return entry
+
+    async def run(self, manifest: List[dict], workers: int = 4, limit: Optional[int] = None) -> dict:
+        await self.state.create_table()
+        self.checkpoints = await self.state.load()
+        pending = [item for item in manifest if (self.checkpoints.get(item["file"]) or {}).get("stage") != "indexed"]
+        already = len(manifest) - len(pending)
+        if limit is not None:
+            pending = pending[:limit]
+        print(f"{len(manifest)} files in manifest, {already} already indexed, {len(pending)} to process "
+              f"with {workers} worker(s)")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        started = time.perf_counter()
+        totals = {"done": 0, "failed": 0}
+        failures = []
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    entry = await self.process(item)
+                    totals["done"] += 1
+                    skipped = f" (resumed after {entry['skipped'][-1]})" if entry["skipped"] else ""
+                    outcome = f"indexed{skipped}" + (f", reused {entry['reuse_from']}" if entry.get("reuse_from") else "")
+                except Exception as e:
+                    totals["failed"] += 1
+                    failures.append((item["file"], str(e)))
+                    entry = self.checkpoints.get(item["file"]) or {}
+                    entry["error"] = str(e)
+                    try:
+                        await self.state.save(item["file"], entry)
+                    except Exception as save_error:
+                        logger.error(f"Could not record failure of {item['file']}: {save_error}")
+                    outcome = f"FAILED at {STAGES[STAGES.index(entry['stage']) + 1] if entry.get('stage') in STAGES[:-1] else STAGES[0]}: {e}"
+                finished = totals["done"] + totals["failed"]
+                rate = totals["done"] / max(time.perf_counter() - started, 1e-9) * 60
+                print(f"[{finished:>{len(str(len(pending)))}}/{len(pending)}] {item['file']} -> {outcome} | "
+                      f"{rate:.1f} docs/min, {totals['failed']} failed", flush=True)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        elapsed = time.perf_counter() - started
+        return {
+            "processed": totals["done"],
+            "failed": totals["failed"],
+            "already_indexed": already,
+            "seconds": round(elapsed, 1),
+            "docs_per_minute": round(totals["done"] / elapsed * 60, 1) if elapsed else 0.0,
+            "failures": failures,
+            "lsa_refit_due": self.lsa_refit_due,
+        }
+
+
+async def backfill(args) -> int:
+    from module.lsa import LSAIndex
+    from module.minhash import MinHashIndex
+    from module.vector import PostgreDB
+
+    manifest = read_manifest(args.csv)
+    directory = Path(args.dir)
+    listed = {item["file"] for item in manifest}
+    unlisted = [p.name for p in directory.glob("*.pdf") if p.name not in listed]
+    if unlisted:
+        print(f"Warning: {len(unlisted)} PDF(s) in {directory} have no CSV row and are skipped")
+
+    db = PostgreDB()
+    await db.init_pool()
+    try:
+        state = BackfillState(db, args.table)
+        if args.reset:
+            await state.reset()
+        await db.create_innovation_tables(args.table)
+        lsa_index = LSAIndex(db)
+        runner = Backfill(db, args.table, directory, state, lsa_index, MinHashIndex(db))
+        summary = await runner.run(manifest, args.workers, args.limit)
+        print(f"Done: {summary['processed']} indexed, {summary['failed']} failed, "
+              f"{summary['already_indexed']} already indexed, {summary['docs_per_minute']} docs/min "
+              f"over {summary['seconds']}s")
+        for file_name, error in summary["failures"]:
+            print(f"  failed: {file_name}: {error}")
+        if summary["lsa_refit_due"] and not args.no_lsa_refit:
+            print(f"LSA refit: {await lsa_index.refit(args.table)}")
+        return 1 if summary["failed"] else 0
+    finally:
+        await db.close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable bulk load of proposal PDFs into an innovations table")
+    parser.add_argument("--dir", required=True, help="directory containing the PDFs")
+    parser.add_argument("--csv", required=True, help="CSV with file, judul_inovasi and inovator columns")
+    parser.add_argument("--table", default="innovations")
+    parser.add_argument("--workers", type=int, default=4, help="files processed in parallel")
+    parser.add_argument("--limit", type=int, default=None, help="process at most this many pending files")
+    parser.add_argument("--reset", action="store_true", help="forget all checkpoints and start over")
+    parser.add_argument("--no-lsa-refit", action="store_true", help="do not refit the corpus LSA model at the end")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(backfill(args)))
+
+
+if __name__ == "__main__":
+    main()
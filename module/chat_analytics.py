@@ -0,0 +1,207 @@
+"""
+Incrementally maintained chat analytics per innovation.
+
+Setiap percakapan yang disimpan memperbarui {table}_chat_stats (jumlah percakapan, hari
+aktif, total panjang pertanyaan/jawaban, waktu pertama/terakhir), {table}_chat_active_days
+dan frekuensi kata pertanyaan di {table}_chat_words, sehingga endpoint analitik cukup
+membaca beberapa baris ber-index. Perintah ini membangun ulang semuanya dari riwayat yang
+sudah ada (misalnya setelah upgrade).
+
+    python -m module.chat_analytics --table innovations
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+import asyncpg
+
+from config.config import PgCredential
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Words of a question counted by the analytics (same rules for incremental updates and backfill)
+STOPWORDS = [
+    'yang', 'adalah', 'untuk', 'dari', 'dengan', 'pada', 'dalam', 'atau', 'dan', 'ini', 'itu', 'akan',
+    'dapat', 'tidak', 'ada', 'juga', 'saya', 'anda', 'bagaimana', 'mengapa', 'apakah'
+]
+MIN_WORD_LENGTH = 4
+TOP_WORDS = 10
+
+
+async def create_tables(conn, table_name: str):
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_chat_stats (
+            innovation_id VARCHAR(1024) PRIMARY KEY,
+            total_conversations BIGINT NOT NULL DEFAULT 0,
+            active_days INTEGER NOT NULL DEFAULT 0,
+            question_length_sum BIGINT NOT NULL DEFAULT 0,
+            response_length_sum BIGINT NOT NULL DEFAULT 0,
+            first_conversation TIMESTAMP,
+            last_conversation TIMESTAMP
+        )
+    """)
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_chat_active_days (
+            innovation_id VARCHAR(1024) NOT NULL,
+            day DATE NOT NULL,
+            conversations INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (innovation_id, day)
+        )
+    """)
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_chat_words (
+            innovation_id VARCHAR(1024) NOT NULL,
+            word TEXT NOT NULL,
+            frequency BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (innovation_id, word)
+        )
+    """)
+    # Top words of one innovation straight from the index
+    await conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_words_top
+        ON {table_name}_chat_words (innovation_id, frequency DESC)
+    """)
+
+
+def word_filter(stopwords_param: str) -> str:
+    """WHERE clause keeping the counted words of a question split by string_to_array(lower(...), ' ')"""
+    return f"LENGTH(word) >= {MIN_WORD_LENGTH} AND word <> ALL({stopwords_param}::text[])"
+
+
+async def record_chat(conn, table_name: str, innovation_id: str, user_question: str, ai_response: str, created_at: datetime):
+    """Fold one saved conversation into the analytics; run it in the transaction of the insert"""
+    is_new_day = await conn.fetchval(f"""
+        INSERT INTO {table_name}_chat_active_days (innovation_id, day, conversations)
+        VALUES ($1, $2::timestamp::date, 1)
+        ON CONFLICT (innovation_id, day) DO UPDATE SET conversations = {table_name}_chat_active_days.conversations + 1
+        RETURNING conversations = 1
+    """, innovation_id, created_at)
+    await conn.execute(f"""
+        INSERT INTO {table_name}_chat_stats AS s
+            (innovation_id, total_conversations, active_days, question_length_sum, response_length_sum,
+             first_conversation, last_conversation)
+        VALUES ($1, 1, $2, LENGTH($3::text), LENGTH($4::text), $5::timestamp, $5::timestamp)
+        ON CONFLICT (innovation_id) DO UPDATE SET
+            total_conversations = s.total_conversations + 1,
+            active_days = s.active_days + EXCLUDED.active_days,
+            question_length_sum = s.question_length_sum + EXCLUDED.question_length_sum,
+            response_length_sum = s.response_length_sum + EXCLUDED.response_length_sum,
+            first_conversation = LEAST(s.first_conversation, EXCLUDED.first_conversation),
+            last_conversation = GREATEST(s.last_conversation, EXCLUDED.last_conversation)
+    """, innovation_id, 1 if is_new_day else 0, user_question, ai_response, created_at)
+    # Sorted upserts so concurrent chats on one innovation lock word rows in the same order
+    await conn.execute(f"""
+        INSERT INTO {table_name}_chat_words AS w (innovation_id, word, frequency)
+        SELECT $1, word, COUNT(*)
+        FROM unnest(string_to_array(lower($2::text), ' ')) AS word
+        WHERE {word_filter("$3")}
+        GROUP BY word
+        ORDER BY word
+        ON CONFLICT (innovation_id, word) DO UPDATE SET frequency = w.frequency + EXCLUDED.frequency
+    """, innovation_id, user_question, STOPWORDS)
+
+
+async def delete_innovation(conn, table_name: str, innovation_id: str):
+    """Forget the analytics of one innovation (its chat history was deleted)"""
+    await create_tables(conn, table_name)
+    for suffix in ("chat_stats", "chat_active_days", "chat_words"):
+        await conn.execute(f"DELETE FROM {table_name}_{suffix} WHERE innovation_id = $1", innovation_id)
+
+
+async def get_analytics(conn, table_name: str, innovation_id: str) -> dict:
+    """Stats + most common question words of one innovation (two indexed point reads)"""
+    try:
+        stats = await conn.fetchrow(f"SELECT * FROM {table_name}_chat_stats WHERE innovation_id = $1", innovation_id)
+        words = await conn.fetch(f"""
+            SELECT word, frequency FROM {table_name}_chat_words
+            WHERE innovation_id = $1
+            ORDER BY frequency DESC, word
+            LIMIT {TOP_WORDS}
+        """, innovation_id)
+    except asyncpg.UndefinedTableError:
+        stats, words = None, []
+    total = stats["total_conversations"] if stats else 0
+    return {
+        "analytics": {
+            "total_conversations": total,
+            "active_days": stats["active_days"] if stats else 0,
+            "avg_question_length": round(stats["question_length_sum"] / total, 2) if total else 0,
+            "avg_response_length": round(stats["response_length_sum"] / total, 2) if total else 0,
+            "first_conversation": stats["first_conversation"].isoformat() if stats and stats["first_conversation"] else None,
+            "last_conversation": stats["last_conversation"].isoformat() if stats and stats["last_conversation"] else None
+        },
+        "common_question_words": [{"word": r["word"], "frequency": r["frequency"]} for r in words]
+    }
+
+
+async def rebuild(conn, table_name: str) -> dict:
+    """Recompute every analytics table from the chat history in one transaction.
+
+    The history is locked against writes meanwhile, so no conversation is counted twice
+    or missed by a chat saved during the rebuild.
+    """
+    await create_tables(conn, table_name)
+    async with conn.transaction():
+        await conn.execute(f"LOCK TABLE {table_name}_chat_history IN SHARE MODE")
+        await conn.execute(f"TRUNCATE {table_name}_chat_stats, {table_name}_chat_active_days, {table_name}_chat_words")
+        days = await conn.execute(f"""
+            INSERT INTO {table_name}_chat_active_days (innovation_id, day, conversations)
+            SELECT innovation_id, DATE(created_at), COUNT(*)
+            FROM {table_name}_chat_history
+            GROUP BY innovation_id, DATE(created_at)
+        """)
+        stats = await conn.execute(f"""
+            INSERT INTO {table_name}_chat_stats
+                (innovation_id, total_conversations, active_days, question_length_sum, response_length_sum,
+                 first_conversation, last_conversation)
+            SELECT innovation_id, COUNT(*), COUNT(DISTINCT DATE(created_at)),
+                   SUM(LENGTH(user_question)), SUM(LENGTH(ai_response)), MIN(created_at), MAX(created_at)
+            FROM {table_name}_chat_history
+            GROUP BY innovation_id
+        """)
+        word_rows = await conn.execute(f"""
+            INSERT INTO {table_name}_chat_words (innovation_id, word, frequency)
+            SELECT innovation_id, word, COUNT(*)
+            FROM (
+                SELECT innovation_id, unnest(string_to_array(lower(user_question), ' ')) AS word
+                FROM {table_name}_chat_history
+            ) words
+            WHERE {word_filter("$1")}
+            GROUP BY innovation_id, word
+        """, STOPWORDS)
+    return {
+        "innovations": int(stats.split()[-1]),
+        "active_days": int(days.split()[-1]),
+        "words": int(word_rows.split()[-1]),
+    }
+
+
+async def backfill(table_name: str):
+    cred = PgCredential()
+    conn = await asyncpg.connect(
+        host=cred.hostname, port=cred.port, user=cred.username,
+        password=cred.password, database=cred.database
+    )
+    try:
+        started = time.perf_counter()
+        counts = await rebuild(conn, table_name)
+        print(f"Rebuilt chat analytics of {table_name}: {counts['innovations']} innovations, "
+              f"{counts['active_days']} active days, {counts['words']} distinct words "
+              f"in {time.perf_counter() - started:.2f}s")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the incremental chat analytics from the chat history")
+    parser.add_argument("--table", default="innovations")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill(args.table))
+
+
+if __name__ == "__main__":
+    main()
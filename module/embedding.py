@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from module.cache import LRUCache
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """Async, concurrency-limited wrapper around a LangChain embeddings client.
+
+    Texts are grouped into token-aware batches, batches run concurrently behind a
+    semaphore, and each batch retries with exponential backoff plus jitter using
+    asyncio.sleep so the event loop is never blocked. A batch that keeps failing
+    yields None for its texts instead of failing the whole request. Query
+    embeddings are memoised in an optional LRU/TTL cache keyed by normalized text.
+    """
+
+    def __init__(
+        self,
+        client,
+        batch_size: int = 16,
+        max_concurrency: int = 4,
+        max_batch_tokens: int = 15000,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        query_cache: Optional[LRUCache] = None,
+    ):
+        self.client = client
+        self.query_cache = query_cache
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {"batches": 0, "texts": 0, "retries": 0, "failed_batches": 0, "seconds": 0.0}
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token estimate (~4 characters per token) used for batching"""
+        return max(1, len(text) // 4)
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices so each batch stays under batch_size and max_batch_tokens"""
+        batches, current, current_tokens = [], [], 0
+        for idx, text in enumerate(texts):
+            tokens = self.estimate_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _call_with_retry(self, func, payload):
+        for attempt in range(self.max_retries):
+            try:
+                return await func(payload)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                wait = self._backoff(attempt)
+                self.stats["retries"] += 1
+                logger.warning(f"Embedding call failed ({e}); retry {attempt + 1}/{self.max_retries - 1} in {wait:.2f}s")
+                await asyncio.sleep(wait)
+
+    async def _embed_batch(self, batch: List[str]) -> List[Optional[List[float]]]:
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                vectors = await self._call_with_retry(self.client.aembed_documents, batch)
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                logger.error(f"Embedding batch of {len(batch)} texts failed permanently: {e}")
+                return [None] * len(batch)
+            finally:
+                self.stats["seconds"] += time.perf_counter() - started
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(batch)
+            return vectors
+
+    async def embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts, preserving order; texts from permanently failed batches map to None"""
+        if not texts:
+            return []
+        batches = self.make_batches(texts)
+        results = await asyncio.gather(*(self._embed_batch([texts[i] for i in b]) for b in batches))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for idx, vec in zip(batch, batch_vectors):
+                vectors[idx] = vec
+        return vectors
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string, served from the query cache when possible"""
+        key = self.normalize_query(text)
+        if self.query_cache is not None:
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+        async with self._semaphore:
+            vector = await self._call_with_retry(self.client.aembed_query, key)
+        if self.query_cache is not None:
+            self.query_cache.put(key, vector)
+        return vector
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """LangChain embeddings answered from vectors computed ahead of time.
+
+    Lets a synchronous consumer such as SemanticChunker reuse vectors fetched
+    asynchronously through the persistent embedding cache. Texts missing from the
+    map (or whose batch failed) fall back to the wrapped client.
+    """
+
+    def __init__(self, vectors: Dict[str, Optional[List[float]]], fallback):
+        self.vectors = dict(vectors)
+        self.fallback = fallback
+        self.fallback_texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = list(dict.fromkeys(t for t in texts if self.vectors.get(t) is None))
+        if missing:
+            self.fallback_texts += len(missing)
+            self.vectors.update(zip(missing, self.fallback.embed_documents(missing)))
+        return [[float(x) for x in self.vectors[t]] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
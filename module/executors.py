@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from config.config import ExecutorConfig
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class BlockingExecutors:
+    """Dedicated, bounded thread pools for blocking SDK calls.
+
+    Each dependency (Gemini, Vertex embeddings, MinIO, bcrypt, ...) gets its own pool so a backlog
+    of slow model calls cannot starve object-storage or password hashing work,
+    and none of them run on the event loop thread.
+    """
+
+    def __init__(self, sizes: Dict[str, int]):
+        self.sizes = dict(sizes)
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            name: {"submitted": 0, "active": 0, "completed": 0, "failed": 0, "seconds": 0.0}
+            for name in self.sizes
+        }
+
+    def pool(self, name: str) -> ThreadPoolExecutor:
+        if name not in self.sizes:
+            raise KeyError(f"Unknown executor pool '{name}'")
+        with self._lock:
+            executor = self._pools.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=self.sizes[name], thread_name_prefix=f"{name}-pool")
+                self._pools[name] = executor
+            return executor
+
+    def _timed(self, name: str, func: Callable):
+        stats = self._stats[name]
+        with self._lock:
+            stats["active"] += 1
+        started = time.perf_counter()
+        try:
+            return func()
+        except Exception:
+            with self._lock:
+                stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                stats["active"] -= 1
+                stats["completed"] += 1
+                stats["seconds"] += time.perf_counter() - started
+
+    async def run(self, name: str, func: Callable, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` in the ``name`` pool and await its result"""
+        executor = self.pool(name)
+        with self._lock:
+            self._stats[name]["submitted"] += 1
+        call = functools.partial(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._timed, name, call)
+
+    async def stream(self, name: str, func: Callable, *args, **kwargs) -> AsyncIterator:
+        """Consume the sync iterator returned by ``func(*args, **kwargs)`` in the ``name`` pool.
+
+        Items are handed to the event loop as they arrive. Closing the async
+        generator (e.g. the client disconnected) makes the worker thread stop at
+        the next item and close the underlying iterator.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        finished = object()
+
+        def emit(item, error=None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # Event loop already closed; nobody is listening any more
+                cancelled.set()
+
+        def produce():
+            iterator = None
+            try:
+                iterator = iter(func(*args, **kwargs))
+                for item in iterator:
+                    if cancelled.is_set():
+                        break
+                    emit(item)
+            except Exception as e:
+                emit(finished, e)
+                return
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+            emit(finished)
+
+        producer = asyncio.ensure_future(self.run(name, produce))
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+        finally:
+            cancelled.set()
+            # Don't wait for the thread: it exits on its own at the next item
+            producer.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "seconds": round(stats["seconds"], 3),
+                    "max_workers": self.sizes[name],
+                    "queued": stats["submitted"] - stats["completed"] - stats["active"],
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for executor in pools.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: Optional[BlockingExecutors] = None
+
+
+def get_executors() -> BlockingExecutors:
+    """Process-wide executors, sized from ExecutorConfig on first use"""
+    global _executors
+    if _executors is None:
+        config = ExecutorConfig()
+        _executors = BlockingExecutors({
+            "gemini": config.gemini_threads,
+            "embedding": config.embedding_threads,
+            "minio": config.minio_threads,
+            "bcrypt": config.bcrypt_threads,
+            "cpu": config.cpu_threads,
+        })
+    return _executors
+
+
+async def run_blocking(name: str, func: Callable, *args, **kwargs):
+    """Shortcut for ``get_executors().run(name, func, *args, **kwargs)``"""
+    return await get_executors().run(name, func, *args, **kwargs)
+
+
+def stream_blocking(name: str, func: Callable, *args, **kwargs) -> AsyncIterator:
+    """Shortcut for ``get_executors().stream(name, func, *args, **kwargs)``"""
+    return get_executors().stream(name, func, *args, **kwargs)
@@ -0,0 +1,81 @@
+import json
+import logging
+import re
+
+import pandas as pd
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+INGEST_SECTIONS = ["latar_belakang", "tujuan_inovasi", "deskripsi_inovasi"]
+
+
+def parse_extraction_result(extracted_data, sections):
+    """
+    Parse the extraction result, handling cases where JSON parsing failed
+    but raw_response contains valid JSON data.
+    """
+    result = {}
+    
+    # If sections are already properly extracted, return them
+    if all(sec in extracted_data and extracted_data[sec] != "TIDAK DITEMUKAN" for sec in sections):
+        return {sec: extracted_data[sec] for sec in sections}
+    
+    # Try to parse from raw_response if available
+    raw_response = extracted_data.get('raw_response', '')
+    if raw_response:
+        # Extract JSON from markdown code block
+        json_match = re.search(r'```json\s*\n(.*?)\n```', raw_response, re.DOTALL)
+        if json_match:
+            try:
+                json_data = json.loads(json_match.group(1))
+                for sec in sections:
+                    result[sec] = json_data.get(sec, "TIDAK DITEMUKAN")
+                logger.info("Successfully parsed JSON from markdown code block")
+                return result
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse JSON from markdown: {e}")
+        
+        # Try to find raw JSON
+        json_start = raw_response.find('{')
+        json_end = raw_response.rfind('}') + 1
+        if json_start != -1 and json_end > json_start:
+            try:
+                json_str = raw_response[json_start:json_end]
+                json_data = json.loads(json_str)
+                for sec in sections:
+                    result[sec] = json_data.get(sec, "TIDAK DITEMUKAN")
+                logger.info("Successfully parsed JSON from raw text")
+                return result
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse raw JSON: {e}")
+    
+    # Fallback to original data or "TIDAK DITEMUKAN"
+    for sec in sections:
+        result[sec] = extracted_data.get(sec, "TIDAK DITEMUKAN")
+    
+    return result
+
+
+def has_extracted_sections(sections) -> bool:
+    """True when at least one section was actually found (worth reusing instead of re-extracting)."""
+    return any(sections.get(sec) not in (None, "", "TIDAK DITEMUKAN") for sec in INGEST_SECTIONS)
+
+def generate_inovasi_id(judul_inovasi: str, nama_inovator: str) -> str:
+    """Generate unique id for inovasi based on judul and inovator."""
+    return f"{judul_inovasi.lower().replace(' ', '_')}_{nama_inovator.lower().replace(' ', '_')}"
+
+def build_inovasi_dataframe(local_path, judul_inovasi, x_inovator, extracted, source_object=None, document_sha256=None):
+    """Build DataFrame for inovasi upload (from a local file or an object already in MinIO)."""
+    source = {"source_object": source_object} if source_object else {"pdf_path": str(local_path)}
+    if document_sha256:
+        source["document_sha256"] = document_sha256
+    return pd.DataFrame([{
+        **source,
+        "nama_inovasi": judul_inovasi.lower().replace(" ", "_"),
+        "nama_inovator": x_inovator.lower().replace(" ", "_"),
+        "id": generate_inovasi_id(judul_inovasi, x_inovator),
+        "latar_belakang": extracted.get("latar_belakang", "TIDAK DITEMUKAN"),
+        "tujuan_inovasi": extracted.get("tujuan_inovasi", "TIDAK DITEMUKAN"),
+        "deskripsi_inovasi": extracted.get("deskripsi_inovasi", "TIDAK DITEMUKAN"),
+    }])
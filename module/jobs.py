@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+JOB_TABLE = "ingestion_jobs"
+
+
+class JobQueue:
+    """Durable Postgres-backed job queue with a pool of asyncio workers.
+
+    Jobs live in the ``ingestion_jobs`` table; workers claim them with
+    ``FOR UPDATE SKIP LOCKED`` so several processes can share one queue. Handlers
+    receive the job payload plus a ``report(stage, state)`` callback that records
+    per-stage progress on the job row. A failed job is retried after an exponential
+    backoff (``run_after``); once it fails for good the optional failure handler of
+    its kind gets the payload and the error to clean up after it.
+    """
+
+    def __init__(
+        self,
+        db,
+        handlers: Dict[str, Callable[[dict, Callable[[str, str], Awaitable[None]]], Awaitable[dict]]],
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        max_attempts: int = 3,
+        stale_after: float = 1800,
+        retry_base_delay: float = 30,
+        retry_max_delay: float = 600,
+        failure_handlers: Optional[Dict[str, Callable[[dict, str], Awaitable[None]]]] = None,
+    ):
+        self.db = db
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.failure_handlers = failure_handlers or {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    async def create_table(self):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {JOB_TABLE} (
+                    id VARCHAR(64) PRIMARY KEY,
+                    kind VARCHAR(64) NOT NULL,
+                    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+                    stage VARCHAR(64),
+                    stages JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+                    payload JSONB NOT NULL,
+                    result JSONB,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    run_after TIMESTAMP
+                )
+            """)
+            # Queues created before retry backoff
+            await conn.execute(f"ALTER TABLE {JOB_TABLE} ADD COLUMN IF NOT EXISTS run_after TIMESTAMP")
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{JOB_TABLE}_status_created
+                ON {JOB_TABLE}(status, created_at)
+            """)
+
+    async def enqueue(self, kind: str, payload: dict, unique: bool = False) -> str:
+        """Persist a new job and wake an idle worker; returns the job id.
+
+        With ``unique=True`` an identical job that is still queued is reused instead.
+        """
+        job_id = str(uuid.uuid4())
+        async with self.db.acquire() as conn:
+            if unique:
+                existing = await conn.fetchval(
+                    f"SELECT id FROM {JOB_TABLE} WHERE kind = $1 AND payload = $2::jsonb AND status = 'queued' LIMIT 1",
+                    kind, json.dumps(payload)
+                )
+                if existing:
+                    return existing
+            await conn.execute(
+                f"INSERT INTO {JOB_TABLE} (id, kind, payload) VALUES ($1, $2, $3::jsonb)",
+                job_id, kind, json.dumps(payload)
+            )
+        self._wakeup.set()
+        return job_id
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = dict(row)
+        for key in ("stages", "payload", "result"):
+            if isinstance(job.get(key), str):
+                job[key] = json.loads(job[key])
+        for key in ("created_at", "started_at", "finished_at", "updated_at", "run_after"):
+            if job.get(key) is not None:
+                job[key] = job[key].isoformat()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT * FROM {JOB_TABLE} WHERE id = $1", job_id)
+        return self._row_to_job(row) if row else None
+
+    async def _claim(self) -> Optional[dict]:
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow(f"""
+                UPDATE {JOB_TABLE}
+                SET status = 'running', attempts = attempts + 1, error = NULL,
+                    started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM {JOB_TABLE}
+                    WHERE status = 'queued'
+                      AND (run_after IS NULL OR run_after <= CURRENT_TIMESTAMP)
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING *
+            """)
+        return self._row_to_job(row) if row else None
+
+    async def report(self, job_id: str, stage: str, state: str):
+        """Record that ``stage`` reached ``state`` (e.g. running / done / skipped)"""
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {JOB_TABLE}
+                SET stage = $2::text,
+                    stages = stages || jsonb_build_object($2::text, $3::text),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = $1
+            """, job_id, stage, state)
+
+    async def _finish(self, job_id: str, result: dict):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {JOB_TABLE}
+                SET status = 'done', result = $2::jsonb,
+                    finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = $1
+            """, job_id, json.dumps(result, default=str))
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt, doubling per failed attempt up to retry_max_delay"""
+        return min(self.retry_max_delay, self.retry_base_delay * 2 ** max(attempts - 1, 0))
+
+    async def _fail(self, job: dict, error: str):
+        retry = job["attempts"] < self.max_attempts
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {JOB_TABLE}
+                SET status = $2::text, error = $3, updated_at = CURRENT_TIMESTAMP,
+                    run_after = CASE WHEN $2::text = 'queued'
+                        THEN CURRENT_TIMESTAMP + make_interval(secs => $4) ELSE NULL END,
+                    finished_at = CASE WHEN $2::text = 'failed' THEN CURRENT_TIMESTAMP ELSE NULL END
+                WHERE id = $1
+            """, job["id"], "queued" if retry else "failed", error, float(self.retry_delay(job["attempts"])))
+        if retry:
+            logger.info(f"Job {job['id']} ({job['kind']}) retries in {self.retry_delay(job['attempts']):.0f}s")
+            return
+        on_failure = self.failure_handlers.get(job["kind"])
+        if on_failure is not None:
+            try:
+                await on_failure(job["payload"], error)
+            except Exception as e:
+                logger.warning(f"Failure handler of job {job['id']} ({job['kind']}) failed: {e}")
+
+    async def requeue_stale(self) -> int:
+        """Put jobs whose worker died (no progress for stale_after seconds) back in the queue"""
+        async with self.db.acquire() as conn:
+            result = await conn.execute(f"""
+                UPDATE {JOB_TABLE}
+                SET status = 'queued', updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'running'
+                  AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => $1)
+            """, float(self.stale_after))
+        count = int(result.split()[-1]) if result else 0
+        if count:
+            logger.warning(f"Re-queued {count} stale ingestion jobs")
+        return count
+
+    async def _run_job(self, job: dict):
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            await self._fail({**job, "attempts": self.max_attempts}, f"No handler for job kind '{job['kind']}'")
+            return
+
+        async def report(stage: str, state: str = "done"):
+            await self.report(job["id"], stage, state)
+
+        try:
+            result = await handler(job["payload"], report)
+            await self._finish(job["id"], result or {})
+            logger.info(f"Job {job['id']} ({job['kind']}) finished")
+        except asyncio.CancelledError:
+            # Shutting down mid-job: hand it back to the queue without burning an attempt
+            async with self.db.acquire() as conn:
+                await conn.execute(
+                    f"UPDATE {JOB_TABLE} SET status = 'queued', attempts = attempts - 1 WHERE id = $1",
+                    job["id"]
+                )
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}: {e}")
+            await self._fail(job, str(e))
+
+    async def _worker(self, number: int):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Worker {number} could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Bookkeeping failed (e.g. DB hiccup); the job is re-queued once it goes stale
+                logger.error(f"Worker {number} lost track of job {job['id']}: {e}")
+
+    async def start(self):
+        await self.create_table()
+        await self.requeue_stale()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} ingestion workers")
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,293 @@
+import io
+import logging
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config.config import LSAConfig
+from module.executors import run_blocking
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+LSA_MODEL_TABLE = "lsa_models"
+LSA_SECTIONS = ("latar_belakang", "tujuan_inovasi", "deskripsi_inovasi")
+
+
+def innovation_text(row) -> str:
+    """Text an innovation is compared on: its three extracted sections"""
+    return " ".join(str(row[sec] or "") for sec in LSA_SECTIONS)
+
+
+class LSAModel:
+    """TF-IDF + TruncatedSVD fitted once over a corpus.
+
+    ``transform`` folds new documents into the fitted topic space, which is how
+    documents are added between full refits. Output vectors are L2-normalized so
+    cosine similarity is a plain dot product. Only the fitted arrays (vocabulary,
+    idf weights, SVD components) are kept, and they are what gets stored.
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer, components: Optional[np.ndarray]):
+        self.vectorizer = vectorizer
+        self.components = components
+
+    @classmethod
+    def fit(cls, texts: List[str], n_components: int = 100, max_features: int = 50000) -> "LSAModel":
+        vectorizer = TfidfVectorizer(max_features=max_features, sublinear_tf=True)
+        tfidf = vectorizer.fit_transform(texts)
+        components = min(n_components, tfidf.shape[0] - 1, tfidf.shape[1] - 1)
+        # Corpus too small for a topic space: fall back to normalized TF-IDF
+        if components < 2:
+            return cls(vectorizer, None)
+        svd = TruncatedSVD(n_components=components, random_state=0).fit(tfidf)
+        return cls(vectorizer, svd.components_.astype(np.float32))
+
+    @property
+    def dimensions(self) -> int:
+        return self.components.shape[0] if self.components is not None else len(self.vectorizer.vocabulary_)
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        matrix = self.vectorizer.transform(texts)
+        # Same projection as TruncatedSVD.transform
+        matrix = matrix @ self.components.T if self.components is not None else matrix.toarray()
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def dumps(self) -> bytes:
+        """The fitted arrays as an ``.npz`` archive (no pickled objects)"""
+        buffer = io.BytesIO()
+        arrays = {
+            "terms": np.array(self.vectorizer.get_feature_names_out(), dtype=str),
+            "idf": self.vectorizer.idf_.astype(np.float64),
+        }
+        if self.components is not None:
+            arrays["components"] = self.components
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def loads(cls, data: bytes) -> "LSAModel":
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            vectorizer = TfidfVectorizer(sublinear_tf=True)
+            vectorizer.vocabulary_ = {term: i for i, term in enumerate(arrays["terms"].tolist())}
+            vectorizer.idf_ = arrays["idf"]
+            components = arrays["components"] if "components" in arrays.files else None
+        return cls(vectorizer, components)
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+    """Indices and cosine scores of the k rows of ``matrix`` closest to ``query`` (unit vectors)"""
+    if matrix.shape[0] == 0 or k <= 0:
+        return []
+    scores = matrix @ query
+    if exclude is not None:
+        scores[exclude] = -np.inf
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return []
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx])]
+    return [(int(i), float(scores[i])) for i in idx]
+
+
+async def create_results_table(conn, table_name: str):
+    """{table}_lsa_results: per-innovation similarity results (online checks and the batch scan)"""
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_lsa_results (
+            id SERIAL PRIMARY KEY,
+            innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
+            compared_innovation VARCHAR(1024),
+            similarity_score FLOAT,
+            compared_innovation_description TEXT,
+            nama_inovator TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+class LSAIndex:
+    """Corpus-wide LSA model plus one stored vector per innovation.
+
+    The fitted model lives in ``lsa_models`` and vectors in ``{table}_lsa_vectors``.
+    New innovations are folded into the current model as they are ingested; once
+    the folded-in share passes ``refit_ratio`` a background refit over the whole
+    corpus is due. Similarity queries multiply against an in-process copy of the
+    vector matrix that is reloaded only when the stored vectors change.
+    """
+
+    def __init__(self, db, config: Optional[LSAConfig] = None):
+        self.db = db
+        self.config = config or LSAConfig()
+        self._models: Dict[str, Tuple[int, LSAModel]] = {}
+        self._matrices: Dict[str, Tuple[tuple, List[str], np.ndarray]] = {}
+
+    async def create_tables(self, table_name: str):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {LSA_MODEL_TABLE} (
+                    id SERIAL PRIMARY KEY,
+                    table_name VARCHAR(255) NOT NULL,
+                    n_documents INTEGER NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    model BYTEA NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_lsa_vectors (
+                    innovation_id VARCHAR(1024) PRIMARY KEY REFERENCES {table_name}(id) ON DELETE CASCADE,
+                    model_id INTEGER NOT NULL,
+                    vector REAL[] NOT NULL,
+                    folded_in BOOLEAN NOT NULL DEFAULT FALSE,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+    async def current_model(self, table_name: str) -> Optional[Tuple[int, LSAModel, int]]:
+        """(model id, model, documents it was fitted on) of the latest fit, or None"""
+        try:
+            async with self.db.acquire() as conn:
+                row = await conn.fetchrow(
+                    f"SELECT id, n_documents FROM {LSA_MODEL_TABLE} WHERE table_name = $1 ORDER BY id DESC LIMIT 1",
+                    table_name
+                )
+                if row is None:
+                    return None
+                cached = self._models.get(table_name)
+                if cached is None or cached[0] != row["id"]:
+                    data = await conn.fetchval(f"SELECT model FROM {LSA_MODEL_TABLE} WHERE id = $1", row["id"])
+                    try:
+                        self._models[table_name] = (row["id"], LSAModel.loads(data))
+                    except (ValueError, OSError, zipfile.BadZipFile) as e:
+                        # Stored by an older release (pickle); unusable until the next refit
+                        logger.warning(f"LSA model {row['id']} of {table_name} could not be loaded: {e}")
+                        return None
+        except asyncpg.UndefinedTableError:
+            return None
+        model_id, model = self._models[table_name]
+        return model_id, model, row["n_documents"]
+
+    async def _upsert_vectors(self, conn, table_name: str, model_id: int, ids: List[str], vectors: np.ndarray, folded_in: bool):
+        await conn.executemany(f"""
+            INSERT INTO {table_name}_lsa_vectors (innovation_id, model_id, vector, folded_in)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (innovation_id) DO UPDATE SET
+                model_id = EXCLUDED.model_id,
+                vector = EXCLUDED.vector,
+                folded_in = EXCLUDED.folded_in,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(i, model_id, v.tolist(), folded_in) for i, v in zip(ids, vectors)])
+
+    async def refit(self, table_name: str = "innovations") -> dict:
+        """Fit a new model over every innovation and rewrite all stored vectors"""
+        await self.create_tables(table_name)
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(f"SELECT id, {', '.join(LSA_SECTIONS)} FROM {table_name} ORDER BY id")
+        if len(rows) < self.config.min_documents:
+            logger.info(f"LSA refit skipped for {table_name}: {len(rows)} documents < {self.config.min_documents}")
+            return {"status": "skipped", "documents": len(rows)}
+
+        ids = [r["id"] for r in rows]
+        texts = [innovation_text(r) for r in rows]
+
+        def fit_and_transform():
+            model = LSAModel.fit(texts, self.config.n_components, self.config.max_features)
+            return model, model.transform(texts)
+
+        model, vectors = await run_blocking("cpu", fit_and_transform)
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                model_id = await conn.fetchval(
+                    f"""INSERT INTO {LSA_MODEL_TABLE} (table_name, n_documents, dimensions, model)
+                        VALUES ($1, $2, $3, $4) RETURNING id""",
+                    table_name, len(ids), model.dimensions, model.dumps()
+                )
+                await self._upsert_vectors(conn, table_name, model_id, ids, vectors, folded_in=False)
+                # Keep only the latest few fits
+                await conn.execute(f"""
+                    DELETE FROM {LSA_MODEL_TABLE}
+                    WHERE table_name = $1 AND id NOT IN (
+                        SELECT id FROM {LSA_MODEL_TABLE} WHERE table_name = $1 ORDER BY id DESC LIMIT 2
+                    )
+                """, table_name)
+        self._models[table_name] = (model_id, model)
+
+        # Innovations ingested while the fit ran still carry old-model vectors (or none)
+        folded = await self.fold_in_missing(table_name)
+        logger.info(f"LSA model {model_id} fitted on {len(ids)} {table_name} documents ({model.dimensions} dims)")
+        return {"status": "fitted", "model_id": model_id, "documents": len(ids), "dimensions": model.dimensions, "folded_in": folded}
+
+    async def fold_in_missing(self, table_name: str) -> int:
+        """Project innovations without a current-model vector into the current model"""
+        current = await self.current_model(table_name)
+        if current is None:
+            return 0
+        model_id, model, _ = current
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT t.id, {', '.join('t.' + sec for sec in LSA_SECTIONS)}
+                FROM {table_name} t
+                LEFT JOIN {table_name}_lsa_vectors v ON v.innovation_id = t.id
+                WHERE v.model_id IS DISTINCT FROM $1
+            """, model_id)
+        if not rows:
+            return 0
+        vectors = await run_blocking("cpu", model.transform, [innovation_text(r) for r in rows])
+        async with self.db.acquire() as conn:
+            await self._upsert_vectors(conn, table_name, model_id, [r["id"] for r in rows], vectors, folded_in=True)
+        return len(rows)
+
+    async def add_document(self, innovation_id: str, sections: dict, table_name: str = "innovations") -> bool:
+        """Fold one innovation into the current model; returns True when a full refit is due"""
+        await self.create_tables(table_name)
+        current = await self.current_model(table_name)
+        if current is None:
+            async with self.db.acquire() as conn:
+                total = await conn.fetchval(f"SELECT COUNT(*) FROM {table_name}")
+            return total >= self.config.min_documents
+
+        model_id, model, fitted_documents = current
+        vectors = await run_blocking("cpu", model.transform, [innovation_text(sections)])
+        async with self.db.acquire() as conn:
+            await self._upsert_vectors(conn, table_name, model_id, [innovation_id], vectors, folded_in=True)
+            folded = await conn.fetchval(
+                f"SELECT COUNT(*) FROM {table_name}_lsa_vectors WHERE model_id = $1 AND folded_in",
+                model_id
+            )
+        return folded >= max(1, self.config.refit_ratio * fitted_documents)
+
+    async def _matrix(self, table_name: str, model_id: int) -> Tuple[List[str], np.ndarray]:
+        async with self.db.acquire() as conn:
+            marker = tuple(await conn.fetchrow(
+                f"SELECT COUNT(*), MAX(updated_at) FROM {table_name}_lsa_vectors WHERE model_id = $1",
+                model_id
+            )) + (model_id,)
+            cached = self._matrices.get(table_name)
+            if cached is not None and cached[0] == marker:
+                return cached[1], cached[2]
+            rows = await conn.fetch(
+                f"SELECT innovation_id, vector FROM {table_name}_lsa_vectors WHERE model_id = $1 ORDER BY innovation_id",
+                model_id
+            )
+        ids = [r["innovation_id"] for r in rows]
+        matrix = np.array([r["vector"] for r in rows], dtype=np.float32) if rows else np.zeros((0, 0), dtype=np.float32)
+        self._matrices[table_name] = (marker, ids, matrix)
+        return ids, matrix
+
+    async def similar(self, innovation_id: str, text: str, k: int = 10, table_name: str = "innovations") -> Optional[List[Tuple[str, float]]]:
+        """Top-k (innovation id, cosine) over the whole corpus; None when no model is fitted yet"""
+        current = await self.current_model(table_name)
+        if current is None:
+            return None
+        model_id, model, _ = current
+        ids, matrix = await self._matrix(table_name, model_id)
+        query = model.transform([text])[0]
+        exclude = ids.index(innovation_id) if innovation_id in ids else None
+        return [(ids[i], score) for i, score in top_k(matrix, query, k, exclude)]
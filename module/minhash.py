@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import asyncpg
+import numpy as np
+
+from config.config import MinHashConfig
+from module.executors import run_blocking
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles plus LSH band keys.
+
+    Two documents agree on a signature position with probability equal to the
+    Jaccard similarity of their shingle sets. Splitting the signature into
+    ``bands`` of ``rows`` positions and hashing each band gives bucket keys that
+    collide for near-duplicates, so candidates come from an index lookup instead
+    of a scan over every document.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+
+    @classmethod
+    def from_config(cls, config: Optional[MinHashConfig] = None) -> "MinHasher":
+        config = config or MinHashConfig()
+        return cls(config.num_perm, config.bands, config.shingle_size)
+
+    def shingles(self, text: str) -> Set[str]:
+        words = re.findall(r"\w+", (text or "").lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """uint32 MinHash signature of length num_perm (all MAX_HASH for empty text)"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p per permutation; uint64 wrap-around is fine for hashing
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """One signed 64-bit bucket key per band"""
+        keys = []
+        for band in range(self.bands):
+            chunk = np.ascontiguousarray(signature[band * self.rows:(band + 1) * self.rows])
+            digest = hashlib.blake2b(chunk.tobytes(), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "big", signed=True))
+        return keys
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+class InMemoryLSH:
+    """Band-bucket index held in dicts; used by the benchmark and for ad-hoc scans"""
+
+    def __init__(self, hasher: MinHasher):
+        self.hasher = hasher
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: List[Dict[int, List[str]]] = [defaultdict(list) for _ in range(hasher.bands)]
+
+    def add(self, key: str, signature: np.ndarray):
+        self.signatures[key] = signature
+        for band, bucket in enumerate(self.hasher.band_keys(signature)):
+            self.buckets[band][bucket].append(key)
+
+    def query(self, signature: np.ndarray, threshold: float = 0.0, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        candidates = set()
+        for band, bucket in enumerate(self.hasher.band_keys(signature)):
+            candidates.update(self.buckets[band].get(bucket, ()))
+        candidates.discard(exclude)
+        scored = [(key, estimated_jaccard(signature, self.signatures[key])) for key in candidates]
+        return sorted([c for c in scored if c[1] >= threshold], key=lambda c: -c[1])
+
+
+class MinHashIndex:
+    """MinHash signatures and LSH band buckets stored in Postgres.
+
+    ``{table}_minhash`` holds one signature per innovation and ``{table}_lsh_bands``
+    one row per (band, bucket, innovation); its primary key doubles as the lookup
+    index, so finding near-duplicate candidates costs ``bands`` index probes.
+    """
+
+    def __init__(self, db, hasher: Optional[MinHasher] = None, config: Optional[MinHashConfig] = None):
+        self.db = db
+        self.config = config or MinHashConfig()
+        self.hasher = hasher or MinHasher.from_config(self.config)
+
+    async def create_tables(self, table_name: str):
+        async with self.db.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_minhash (
+                    innovation_id VARCHAR(1024) PRIMARY KEY REFERENCES {table_name}(id) ON DELETE CASCADE,
+                    signature BIGINT[] NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_lsh_bands (
+                    band SMALLINT NOT NULL,
+                    bucket BIGINT NOT NULL,
+                    innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id) ON DELETE CASCADE,
+                    PRIMARY KEY (band, bucket, innovation_id)
+                )
+            """)
+
+    async def add(self, innovation_id: str, text: str, table_name: str = "innovations") -> np.ndarray:
+        """(Re)index one innovation; returns its signature"""
+        signature = await run_blocking("cpu", self.hasher.signature, text)
+        keys = self.hasher.band_keys(signature)
+        await self.create_tables(table_name)
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"""
+                    INSERT INTO {table_name}_minhash (innovation_id, signature) VALUES ($1, $2)
+                    ON CONFLICT (innovation_id) DO UPDATE SET
+                        signature = EXCLUDED.signature, updated_at = CURRENT_TIMESTAMP
+                """, innovation_id, signature.astype(np.int64).tolist())
+                await conn.execute(f"DELETE FROM {table_name}_lsh_bands WHERE innovation_id = $1", innovation_id)
+                await conn.copy_records_to_table(
+                    f"{table_name}_lsh_bands",
+                    records=[(band, key, innovation_id) for band, key in enumerate(keys)],
+                    columns=["band", "bucket", "innovation_id"],
+                )
+        return signature
+
+    async def candidates(
+        self,
+        text: str,
+        exclude: Optional[str] = None,
+        threshold: Optional[float] = None,
+        limit: int = 10,
+        table_name: str = "innovations"
+    ) -> List[dict]:
+        """Near-duplicate innovations of ``text`` with their estimated Jaccard similarity"""
+        threshold = self.config.threshold if threshold is None else threshold
+        signature = await run_blocking("cpu", self.hasher.signature, text)
+        keys = self.hasher.band_keys(signature)
+        try:
+            async with self.db.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    WITH probe AS (
+                        SELECT * FROM unnest($1::smallint[], $2::bigint[]) AS p(band, bucket)
+                    ),
+                    hits AS (
+                        SELECT DISTINCT b.innovation_id
+                        FROM probe p
+                        JOIN {table_name}_lsh_bands b ON b.band = p.band AND b.bucket = p.bucket
+                        WHERE b.innovation_id IS DISTINCT FROM $3
+                    )
+                    SELECT m.innovation_id, m.signature
+                    FROM hits h
+                    JOIN {table_name}_minhash m ON m.innovation_id = h.innovation_id
+                """, list(range(len(keys))), keys, exclude)
+        except asyncpg.UndefinedTableError:
+            return []
+        scored = [
+            {"innovation_id": r["innovation_id"], "estimated_jaccard": round(estimated_jaccard(signature, np.array(r["signature"], dtype=np.int64)), 4)}
+            for r in rows
+        ]
+        scored = [c for c in scored if c["estimated_jaccard"] >= threshold]
+        return sorted(scored, key=lambda c: -c["estimated_jaccard"])[:limit]
@@ -4,17 +4,23 @@ from google.oauth2 import service_account
 from google.auth import default
 from config.config import SaGoogle, GeminiConfig, PgCredential, MinioConfig
 import base64
+import hashlib
 import logging
-from typing import Optional, Dict
+from typing import BinaryIO, Optional, Dict, Iterator, Union
 import json
 import re
 import pandas as pd
 
+# PDF content held in memory: raw bytes or a readable binary buffer
+PdfData = Union[bytes, bytearray, memoryview, BinaryIO]
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GeminiPDFExtractor:
+    MODEL_NAME = "gemini-2.0-flash"
+
     def __init__(self):
         """Initialize Gemini PDF Extractor with service account credentials"""
         self.setup_gemini()
@@ -55,7 +61,7 @@ class GeminiPDFExtractor:
             )
             
             # Initialize Gemini Flash model
-            self.model = GenerativeModel("gemini-2.0-flash")
+            self.model = GenerativeModel(self.MODEL_NAME)
             
             logger.info("Gemini Flash multimodal initialized successfully")
             
@@ -63,23 +69,28 @@ class GeminiPDFExtractor:
             logger.error(f"Failed to initialize Gemini: {e}")
             raise
     
-    def load_pdf_as_part(self, pdf_path: str) -> Part:
-        """Load PDF file and convert to Gemini Part object"""
+    def load_pdf_as_part(self, pdf_path: Optional[str] = None, data: Optional[PdfData] = None) -> Part:
+        """Load PDF file (or in-memory PDF bytes / binary buffer) and convert to Gemini Part object"""
         try:
-            with open(pdf_path, 'rb') as pdf_file:
-                pdf_data = pdf_file.read()
+            if data is None:
+                with open(pdf_path, 'rb') as pdf_file:
+                    data = pdf_file.read()
+            elif hasattr(data, "read"):
+                data = data.read()
+            elif not isinstance(data, bytes):
+                data = bytes(data)
             
             # Create Part object for PDF
             pdf_part = Part.from_data(
-                data=pdf_data,
+                data=data,
                 mime_type="application/pdf"
             )
             
-            logger.info(f"PDF loaded successfully: {pdf_path}")
+            logger.info(f"PDF loaded successfully: {pdf_path or f'{len(data)} bytes in memory'}")
             return pdf_part
             
         except Exception as e:
-            logger.error(f"Failed to load PDF {pdf_path}: {e}")
+            logger.error(f"Failed to load PDF {pdf_path or '(bytes)'}: {e}")
             raise
     
     def clean_json_response(self, response_text: str) -> str:
@@ -112,11 +123,11 @@ class GeminiPDFExtractor:
         # Return original text if no JSON pattern found
         return text
     
-    def extract_multiple_sections(self, pdf_path: str, sections: list) -> Dict[str, str]:
-        """Extract multiple sections from PDF"""
+    def extract_multiple_sections(self, pdf_path: Optional[str], sections: list, data: Optional[PdfData] = None) -> Dict[str, str]:
+        """Extract multiple sections from PDF; pass ``data`` to use PDF bytes instead of a file"""
         try:
             # Load PDF
-            pdf_part = self.load_pdf_as_part(pdf_path)
+            pdf_part = self.load_pdf_as_part(pdf_path, data=data)
             
             # Create sections list for prompt
             sections_list = "', '".join(sections)
@@ -174,14 +185,17 @@ class GeminiPDFExtractor:
             logger.error(f"Failed to extract multiple sections: {e}")
             return {section: "TIDAK DITEMUKAN" for section in sections}
     
-    def extract_with_custom_prompt(self, pdf_path: str, custom_prompt: str) -> Optional[str]:
-        """Extract content using custom prompt"""
+    def prompt_contents(self, custom_prompt: str, pdf_path: Optional[str] = None, data: Optional[PdfData] = None) -> list:
+        """Prompt plus PDF part; text-only when neither a path nor bytes are given"""
+        if pdf_path is None and data is None:
+            return [custom_prompt]
+        return [custom_prompt, self.load_pdf_as_part(pdf_path, data=data)]
+
+    def extract_with_custom_prompt(self, pdf_path: Optional[str], custom_prompt: str, data: Optional[PdfData] = None) -> Optional[str]:
+        """Extract content using custom prompt; pass ``data`` to use PDF bytes instead of a file"""
         try:
-            # Load PDF
-            pdf_part = self.load_pdf_as_part(pdf_path)
-            
-            # Generate content using Gemini
-            response = self.model.generate_content([custom_prompt, pdf_part])
+            # Load PDF (if any) and generate content using Gemini
+            response = self.model.generate_content(self.prompt_contents(custom_prompt, pdf_path, data))
             
             if response and response.text:
                 logger.info("Custom extraction completed successfully")
@@ -194,6 +208,17 @@ class GeminiPDFExtractor:
             logger.error(f"Failed to extract with custom prompt: {e}")
             return None
     
+    def stream_with_custom_prompt(self, pdf_path: Optional[str], custom_prompt: str, data: Optional[PdfData] = None) -> Iterator[str]:
+        """Stream the answer to a custom prompt as text fragments (Gemini streaming generation)"""
+        for chunk in self.model.generate_content(self.prompt_contents(custom_prompt, pdf_path, data), stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish_reason chunk)
+                continue
+            if text:
+                yield text
+    
     @staticmethod
     def build_scoring_prompt(scoring_dict=None):
         """Build prompt for scoring using env config."""
@@ -227,6 +252,11 @@ class GeminiPDFExtractor:
         prompt += "Berikan hasil penilaian dalam format JSON seperti contoh berikut:\n{\n  'substansi_orisinalitas': 12,\n  'substansi_urgensi': 8,\n  'substansi_kedalaman': 13,\n  'analisis_dampak': 14,\n  'analisis_kelayakan': 9,\n  'analisis_data': 8,\n  'sistematika_struktur': 9,\n  'sistematika_bahasa': 8,\n  'sistematika_referensi': 4,\n  'total': 85\n}\n"
         return prompt
 
+    @classmethod
+    def scoring_fingerprint(cls, prompt: str) -> str:
+        """Identifies the scoring setup (model + prompt, which embeds the weights) a score was produced with"""
+        return hashlib.sha256(f"{cls.MODEL_NAME}\n{prompt}".encode("utf-8")).hexdigest()
+
     @staticmethod
     def generate_inovasi_id(judul_inovasi: str, nama_inovator: str) -> str:
         """Generate unique id for inovasi based on judul and inovator."""
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+StageHandler = Callable[[dict], Awaitable[dict]]
+
+
+class StagedPipeline:
+    """Run items through ordered async stages, each with its own number of workers.
+
+    Stages are connected by bounded queues, so a slow stage applies backpressure
+    instead of letting work pile up in memory, while every stage keeps its own
+    dependency (object storage, model, embeddings, database) busy at the same
+    time. Items are plain dicts; a handler returns the (updated) item, and may set
+    ``item["done"] = True`` to finish it early. A handler exception finishes the
+    item with ``status="failed"`` and the failing stage. Finished items are yielded
+    as soon as they leave the pipeline, in completion order.
+    """
+
+    def __init__(self, stages: List[Tuple[str, StageHandler, int]], queue_size: int = 8):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = [(name, handler, max(1, concurrency)) for name, handler, concurrency in stages]
+        self.queue_size = queue_size
+        self.stats = {name: {"processed": 0, "failed": 0, "active": 0, "seconds": 0.0} for name, _, _ in self.stages}
+
+    async def _worker(self, index: int, inbox: asyncio.Queue, outbox: asyncio.Queue, results: asyncio.Queue):
+        name, handler, _ = self.stages[index]
+        stats = self.stats[name]
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            stats["active"] += 1
+            started = time.perf_counter()
+            try:
+                item = await handler(item)
+            except Exception as e:
+                logger.warning(f"Pipeline stage '{name}' failed for {item.get('key')}: {e}")
+                stats["failed"] += 1
+                item.update(status="failed", stage=name, error=str(e), done=True)
+            finally:
+                elapsed = time.perf_counter() - started
+                stats["active"] -= 1
+                stats["processed"] += 1
+                stats["seconds"] += elapsed
+                item.setdefault("timings", {})[name] = round(elapsed * 1000, 1)
+            if item.get("done") or outbox is results:
+                item.setdefault("status", "success")
+                await results.put(item)
+            else:
+                await outbox.put(item)
+
+    async def _stage(self, index: int, inbox: asyncio.Queue, outbox: asyncio.Queue, results: asyncio.Queue):
+        """All workers of one stage; closes the next stage once they have drained"""
+        concurrency = self.stages[index][2]
+        await asyncio.gather(*(self._worker(index, inbox, outbox, results) for _ in range(concurrency)))
+        if outbox is results:
+            await results.put(None)
+        else:
+            for _ in range(self.stages[index + 1][2]):
+                await outbox.put(None)
+
+    async def run(self, items: Iterable[dict]) -> AsyncIterator[dict]:
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0][2]):
+                await queues[0].put(None)
+
+        tasks = [asyncio.ensure_future(feed())]
+        for index in range(len(self.stages)):
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else results
+            tasks.append(asyncio.ensure_future(self._stage(index, queues[index], outbox, results)))
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                yield item
+            # Surface unexpected errors of the feeder / stage supervisors
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,198 @@
+"""
+Batch plagiarism scan: top-k most similar innovations for every innovation.
+
+Memuat teks section semua inovasi sekali, membangun matriks LSA (atau TF-IDF sparse /
+vektor LSA tersimpan), lalu menghitung similarity per blok baris sehingga memori tetap
+O(block_size x n). Blok dibagi ke beberapa proses dan hasilnya ditulis ke
+{table}_lsa_results secara bulk (COPY).
+
+    python -m module.plagiarism_scan --table innovations --top-k 10 --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import asyncpg
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config.config import LSAConfig, PgCredential
+from module.lsa import LSA_MODEL_TABLE, LSA_SECTIONS, LSAModel, create_results_table, innovation_text
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_worker_matrix = None
+
+
+def block_top_k(matrix, start: int, stop: int, k: int, min_score: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k neighbours (indices, scores) for rows start..stop of a row-normalized matrix.
+
+    Only a (stop - start) x n block of similarities is materialized. Self matches are
+    excluded and scores below ``min_score`` are reported as index -1.
+    """
+    block = matrix[start:stop] @ matrix.T
+    block = block.toarray() if sparse.issparse(block) else np.asarray(block)
+    block = block.astype(np.float32, copy=False)
+    rows = np.arange(stop - start)
+    block[rows, rows + start] = -np.inf
+    k = min(k, matrix.shape[0] - 1)
+    if k <= 0:
+        return np.empty((stop - start, 0), dtype=np.int64), np.empty((stop - start, 0), dtype=np.float32)
+    idx = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(block, idx, axis=1)
+    order = np.argsort(-scores, axis=1)
+    idx = np.take_along_axis(idx, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    idx[scores < min_score] = -1
+    return idx, scores
+
+
+def _init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _worker_block(args):
+    start, stop, k, min_score = args
+    return start, block_top_k(_worker_matrix, start, stop, k, min_score)
+
+
+def all_pairs_top_k(
+    matrix,
+    k: int = 10,
+    block_size: int = 1024,
+    workers: int = 1,
+    min_score: float = 0.0
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Yield (first row, neighbour indices, scores) per block, optionally across processes"""
+    n = matrix.shape[0]
+    tasks = [(start, min(start + block_size, n), k, min_score) for start in range(0, n, block_size)]
+    if workers <= 1 or len(tasks) <= 1:
+        for start, stop, _, _ in tasks:
+            yield (start, *block_top_k(matrix, start, stop, k, min_score))
+        return
+    # The matrix is shipped to each worker once (initializer), not once per block
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+        for start, (idx, scores) in pool.map(_worker_block, tasks):
+            yield start, idx, scores
+
+
+def build_matrix(texts: List[str], source: str, config: LSAConfig):
+    """Row-normalized document matrix: 'lsa' (dense topic space) or 'tfidf' (sparse)"""
+    if source == "tfidf":
+        # TfidfVectorizer rows are already L2-normalized
+        return TfidfVectorizer(max_features=config.max_features, sublinear_tf=True).fit_transform(texts).tocsr()
+    return LSAModel.fit(texts, config.n_components, config.max_features).transform(texts)
+
+
+async def load_stored_matrix(conn, table_name: str, ids: List[str]) -> Optional[np.ndarray]:
+    """Vectors of the current corpus LSA model, in ``ids`` order (None if any is missing)"""
+    model_id = await conn.fetchval(
+        f"SELECT id FROM {LSA_MODEL_TABLE} WHERE table_name = $1 ORDER BY id DESC LIMIT 1", table_name
+    )
+    if model_id is None:
+        return None
+    rows = await conn.fetch(
+        f"SELECT innovation_id, vector FROM {table_name}_lsa_vectors WHERE model_id = $1", model_id
+    )
+    vectors = {r["innovation_id"]: r["vector"] for r in rows}
+    if any(i not in vectors for i in ids):
+        return None
+    return np.array([vectors[i] for i in ids], dtype=np.float32)
+
+
+async def write_results(conn, table_name: str, innovations: list, results: list):
+    """Replace the LSA results of every scanned innovation in one transaction using COPY"""
+    records = []
+    for start, idx, scores in results:
+        for row, (neighbours, row_scores) in enumerate(zip(idx, scores)):
+            source = innovations[start + row]
+            for j, score in zip(neighbours, row_scores):
+                if j < 0:
+                    continue
+                other = innovations[j]
+                records.append((
+                    source["id"],
+                    other["nama_inovasi"],
+                    round(float(score), 4),
+                    other["deskripsi_inovasi"],
+                    other["nama_inovator"],
+                ))
+    async with conn.transaction():
+        await create_results_table(conn, table_name)
+        await conn.execute(
+            f"DELETE FROM {table_name}_lsa_results WHERE innovation_id = ANY($1::text[])",
+            [inv["id"] for inv in innovations]
+        )
+        await conn.copy_records_to_table(
+            f"{table_name}_lsa_results",
+            records=records,
+            columns=["innovation_id", "compared_innovation", "similarity_score",
+                     "compared_innovation_description", "nama_inovator"],
+        )
+    return len(records)
+
+
+async def scan(table_name: str, k: int, block_size: int, workers: int, source: str, min_score: float, dry_run: bool):
+    cred = PgCredential()
+    conn = await asyncpg.connect(
+        host=cred.hostname, port=cred.port, user=cred.username,
+        password=cred.password, database=cred.database
+    )
+    try:
+        innovations = [dict(r) for r in await conn.fetch(
+            f"SELECT id, nama_inovasi, nama_inovator, {', '.join(LSA_SECTIONS)} FROM {table_name} ORDER BY id"
+        )]
+        if len(innovations) < 2:
+            print(f"Only {len(innovations)} innovations in {table_name}; nothing to compare")
+            return
+
+        started = time.perf_counter()
+        matrix = None
+        if source == "stored":
+            matrix = await load_stored_matrix(conn, table_name, [inv["id"] for inv in innovations])
+            if matrix is None:
+                print("Stored LSA vectors missing or incomplete; fitting a fresh LSA model instead")
+                source = "lsa"
+        if matrix is None:
+            texts = [innovation_text(inv) for inv in innovations]
+            matrix = await asyncio.to_thread(build_matrix, texts, source, LSAConfig())
+        print(f"Matrix {matrix.shape[0]} x {matrix.shape[1]} ({source}) built in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        results = await asyncio.to_thread(
+            lambda: list(all_pairs_top_k(matrix, k, block_size, workers, min_score))
+        )
+        print(f"Top-{k} neighbours for {len(innovations)} innovations in {time.perf_counter() - started:.2f}s "
+              f"(block {block_size}, {workers} worker(s))")
+
+        if dry_run:
+            return
+        written = await write_results(conn, table_name, innovations, results)
+        print(f"Wrote {written} rows to {table_name}_lsa_results")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="All-pairs plagiarism scan over every innovation")
+    parser.add_argument("--table", default="innovations")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=1024, help="rows per similarity block (memory ~ block x n floats)")
+    parser.add_argument("--workers", type=int, default=1, help="processes computing blocks in parallel")
+    parser.add_argument("--source", choices=("lsa", "tfidf", "stored"), default="lsa",
+                        help="fresh LSA fit, sparse TF-IDF, or the stored corpus LSA vectors")
+    parser.add_argument("--min-score", type=float, default=0.0, help="drop neighbours below this cosine")
+    parser.add_argument("--dry-run", action="store_true", help="compute but do not write results")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(scan(args.table, args.top_k, args.block_size, args.workers, args.source, args.min_score, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import hashlib
+import logging
+from typing import BinaryIO, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(ValueError):
+    """Raised while streaming once an upload passes its size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class HashingReader:
+    """Read-only file wrapper that hashes and counts bytes as they are consumed.
+
+    Handed to ``Minio.put_object`` so the sha256 is computed in the same pass as
+    the multipart upload; reading past ``max_bytes`` raises UploadTooLarge, which
+    makes the MinIO client abort the multipart upload.
+    """
+
+    def __init__(self, raw: BinaryIO, max_bytes: Optional[int] = None):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self._sha256.update(chunk)
+        return chunk
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
@@ -6,19 +6,34 @@ import numpy as np
 import pandas as pd
 import json
 import time
+import base64
+import re
+import hashlib
 import logging
+from contextlib import asynccontextmanager
 from pgvector.asyncpg import register_vector
 from langchain_google_vertexai import VertexAIEmbeddings
-from langchain_experimental.text_splitter import SemanticChunker
+from langchain_experimental.text_splitter import SemanticChunker, combine_sentences
 from minio import Minio
+from minio.commonconfig import CopySource
 from google.oauth2 import service_account
-from config.config import SaGoogle, GeminiConfig, PgCredential, MinioConfig
+from config.config import SaGoogle, GeminiConfig, PgCredential, MinioConfig, EmbeddingConfig, VectorSearchConfig, PdfCacheConfig, UploadConfig, ChatSearchConfig
 from module.multimodal_model import GeminiPDFExtractor
+from module.embedding import EmbeddingService, PrecomputedEmbeddings
+from module.cache import LRUCache
+from module.executors import run_blocking
+from module.uploads import HashingReader
+from module import chat_analytics, lsa
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 class PostgreDB:
+    # One embeddings client + query cache per process, shared by every PostgreDB instance
+    _shared_embedding_service = None
+    # PDF bytes keyed by (innovation id, object ETag), shared by scoring and chat
+    _shared_pdf_cache = None
+
     def __init__(self):
         # Postgres credentials
         self.pg_cred = PgCredential()
@@ -28,6 +43,14 @@ class PostgreDB:
         self.db_name = self.pg_cred.database
         self.password_db = self.pg_cred.password
 
+        # Shared connection pool, created once per process (see init_pool)
+        self.pool = None
+        self.pool_min_size = self.pg_cred.pool_min_size
+        self.pool_max_size = self.pg_cred.pool_max_size
+        self.pool_acquire_timeout = self.pg_cred.pool_acquire_timeout
+        self._pool_lock = asyncio.Lock()
+        self._pool_metrics = {"acquired": 0, "acquire_timeouts": 0, "acquire_wait_seconds": 0.0}
+
         # Setup Google Cloud credentials
         self.credentials = None
         self.setup_google_credentials()
@@ -37,6 +60,16 @@ class PostgreDB:
         gemini_config = GeminiConfig()
         self.vertex_location = gemini_config.location
         self.vertex_project = gemini_config.project
+        self.embedding_config = EmbeddingConfig()
+        self.vector_search_config = VectorSearchConfig()
+        self._embedding_cache_metrics = {"hits": 0, "misses": 0}
+        # Per-table leaderboard refresh task + "another write arrived meanwhile" flag
+        self._leaderboard_refresh = {}
+        # Text search config of each chat history table's search_vector column
+        self._chat_search_config = {}
+        # Chat history tables (history, analytics, search) already created by this process
+        self._chat_tables_ready = set()
+        self._embedding_cache_ready = False
 
         # Initialize MinIO client
         minio_cfg = MinioConfig()
@@ -79,20 +112,172 @@ class PostgreDB:
             logger.error(f"Failed to setup Google Cloud credentials: {e}")
             self.credentials = None
 
-    def retry_with_backoff(self, func, *args, retry_delay=5, backoff_factor=2, **kwargs):
-        max_attempts = 10
-        retries = 0
-        while retries < max_attempts:
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                retries += 1
-                wait = retry_delay * (backoff_factor ** retries)
-                print(f"Error: {e}. Retrying in {wait}s...")
-                time.sleep(wait)
-        raise RuntimeError(f"Failed after {max_attempts} attempts")
+    def make_vertex_embeddings(self) -> VertexAIEmbeddings:
+        return VertexAIEmbeddings(
+            model_name=self.embedding_config.model_name,
+            location=self.vertex_location,
+            max_output_tokens=768,
+            credentials=self.credentials,
+            project=self.vertex_project
+        )
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Async embedding engine shared by ingestion and similarity search (process-wide singleton)"""
+        if PostgreDB._shared_embedding_service is None:
+            cfg = self.embedding_config
+            PostgreDB._shared_embedding_service = EmbeddingService(
+                self.make_vertex_embeddings(),
+                batch_size=cfg.batch_size,
+                max_concurrency=cfg.max_concurrency,
+                max_batch_tokens=cfg.max_batch_tokens,
+                max_retries=cfg.max_retries,
+                query_cache=LRUCache(cfg.query_cache_size, ttl=cfg.query_cache_ttl),
+            )
+        return PostgreDB._shared_embedding_service
+
+    def embedding_stats(self) -> dict:
+        service = PostgreDB._shared_embedding_service
+        stats = dict(service.stats) if service else {}
+        stats["cache"] = dict(self._embedding_cache_metrics)
+        if service and service.query_cache is not None:
+            stats["query_cache"] = service.query_cache.stats()
+        return stats
+
+    @property
+    def pdf_cache(self) -> LRUCache:
+        if PostgreDB._shared_pdf_cache is None:
+            PostgreDB._shared_pdf_cache = LRUCache(PdfCacheConfig().max_bytes, sizeof=len)
+        return PostgreDB._shared_pdf_cache
+
+    @staticmethod
+    def parse_object_link(link_document: str):
+        """Split a stored link_document URL into (bucket_name, object_name)"""
+        from urllib.parse import urlparse
+        parts = urlparse(link_document).path.lstrip("/").split("/", 1)
+        if len(parts) != 2 or not all(parts):
+            raise ValueError(f"Invalid link_document format: {link_document}")
+        return parts[0], parts[1]
+
+    def _read_object(self, bucket_name: str, object_name: str) -> bytes:
+        response = self.minio_client.get_object(bucket_name, object_name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def get_pdf_bytes(self, innovation_id: str, link_document: str) -> bytes:
+        """
+        Return the PDF of an innovation, served from the in-memory LRU when the
+        object's ETag is unchanged. Only a stat_object round trip hits MinIO on a hit.
+        """
+        bucket_name, object_name = self.parse_object_link(link_document)
+        stat = await run_blocking("minio", self.minio_client.stat_object, bucket_name, object_name)
+        key = (innovation_id, stat.etag)
+        data = self.pdf_cache.get(key)
+        if data is None:
+            data = await run_blocking("minio", self._read_object, bucket_name, object_name)
+            self.pdf_cache.put(key, data)
+        return data
+
+    def _put_stream(self, object_name: str, raw, max_bytes: int, part_size: int) -> dict:
+        reader = HashingReader(raw, max_bytes)
+        self.minio_client.put_object(
+            self.bucket_name, object_name, reader, length=-1,
+            part_size=part_size, content_type="application/pdf"
+        )
+        return {"object_name": object_name, "size": reader.size, "sha256": reader.sha256}
+
+    async def stream_upload(self, raw, object_name: str, max_bytes: int = None, part_size: int = None) -> dict:
+        """
+        Stream a file object into MinIO (multipart, ``part_size`` bytes per part) while
+        computing its sha256. Raises UploadTooLarge past ``max_bytes``; the partial
+        multipart upload is aborted by the client. Returns object_name, size and sha256.
+        """
+        cfg = UploadConfig()
+        return await run_blocking(
+            "minio", self._put_stream, object_name, raw,
+            cfg.max_bytes if max_bytes is None else max_bytes,
+            cfg.part_size if part_size is None else part_size
+        )
+
+    async def read_object(self, object_name: str) -> bytes:
+        return await run_blocking("minio", self._read_object, self.bucket_name, object_name)
+
+    async def remove_object(self, object_name: str):
+        await run_blocking("minio", self.minio_client.remove_object, self.bucket_name, object_name)
+
+    @staticmethod
+    def as_float_array(vector) -> np.ndarray:
+        """pgvector decodes to a Vector object in newer releases and to ndarray in older ones"""
+        if hasattr(vector, "to_numpy"):
+            vector = vector.to_numpy()
+        return np.asarray(vector, dtype=np.float32)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def create_embedding_cache_table(self):
+        """Create table caching chunk embeddings by (model, sha256 of cleaned chunk text), once per process"""
+        if self._embedding_cache_ready:
+            return
+        async with self.acquire() as conn:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model_name VARCHAR(255) NOT NULL,
+                    content_hash CHAR(64) NOT NULL,
+                    embedding vector(768) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (model_name, content_hash)
+                )
+            """)
+        self._embedding_cache_ready = True
+
+    async def embed_with_cache(self, texts: list) -> list:
+        """Embed texts, serving repeats from embedding_cache and only sending misses to the API"""
+        if not texts:
+            return []
+        await self.create_embedding_cache_table()
+        model = self.embedding_config.model_name
+        hashes = [self.content_hash(t) for t in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT content_hash, embedding FROM embedding_cache WHERE model_name = $1 AND content_hash = ANY($2::text[])",
+                model, unique_hashes
+            )
+        cached = {r["content_hash"]: self.as_float_array(r["embedding"]) for r in rows}
+
+        # Embed each distinct missing text once
+        miss_texts = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in miss_texts:
+                miss_texts[h] = t
+        fresh = {}
+        if miss_texts:
+            vectors = await self.embedding_service.embed_documents(list(miss_texts.values()))
+            fresh = {h: v for h, v in zip(miss_texts.keys(), vectors) if v is not None}
+            if fresh:
+                async with self.acquire() as conn:
+                    await conn.executemany(
+                        """INSERT INTO embedding_cache (model_name, content_hash, embedding)
+                           VALUES ($1, $2, $3) ON CONFLICT DO NOTHING""",
+                        [(model, h, np.asarray(v, dtype=np.float32)) for h, v in fresh.items()]
+                    )
+
+        hits = sum(1 for h in hashes if h in cached)
+        self._embedding_cache_metrics["hits"] += hits
+        self._embedding_cache_metrics["misses"] += len(hashes) - hits
+        logger.info(f"Embedding cache: {hits} hits, {len(hashes) - hits} misses ({len(miss_texts)} sent to {model})")
+
+        merged = {**cached, **fresh}
+        return [merged.get(h) for h in hashes]
 
     async def connect_to_db(self):
+        """Open a dedicated, unpooled connection (for one-off scripts; request paths use acquire())"""
         return await asyncpg.connect(
             host=self.host,
             port=self.port,
@@ -101,65 +286,221 @@ class PostgreDB:
             database=self.db_name,
         )
 
-    async def generateSourceTable(self, df: pd.DataFrame, table_name: str, create_query: str):
-        conn = await self.connect_to_db()
-        # Only create table if not exists
-        await conn.execute(create_query)
-        tuples = [tuple(map(str, t)) for t in df.itertuples(index=False)]
-        # Insert or update (upsert) data
-        for t in tuples:
-            columns = list(df)
-            values = ','.join([f'${i+1}' for i in range(len(columns))])
-            updates = ','.join([f"{col}=EXCLUDED.{col}" for col in columns if col != 'id'])
+    async def _init_connection(self, conn):
+        """Pool init hook: every pooled connection gets the pgvector codecs"""
+        await register_vector(conn)
+
+    async def init_pool(self):
+        """Create the shared asyncpg pool (idempotent, safe to call concurrently)"""
+        async with self._pool_lock:
+            if self.pool is None:
+                # The pgvector type must exist before the init hook registers its codecs
+                conn = await self.connect_to_db()
+                try:
+                    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                finally:
+                    await conn.close()
+                self.pool = await asyncpg.create_pool(
+                    host=self.host,
+                    port=self.port,
+                    user=self.user,
+                    password=self.password_db,
+                    database=self.db_name,
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size,
+                    max_inactive_connection_lifetime=self.pg_cred.pool_max_inactive_lifetime,
+                    command_timeout=self.pg_cred.command_timeout,
+                    init=self._init_connection,
+                )
+                logger.info(f"Postgres pool created (min={self.pool_min_size}, max={self.pool_max_size})")
+        return self.pool
+
+    async def close_pool(self):
+        """Gracefully close the shared pool on shutdown"""
+        async with self._pool_lock:
+            if self.pool is not None:
+                await self.pool.close()
+                self.pool = None
+                logger.info("Postgres pool closed")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection from the shared pool, creating the pool lazily on first use"""
+        pool = self.pool or await self.init_pool()
+        started = time.perf_counter()
+        try:
+            conn = await pool.acquire(timeout=self.pool_acquire_timeout)
+        except asyncio.TimeoutError:
+            self._pool_metrics["acquire_timeouts"] += 1
+            logger.error(f"Timed out after {self.pool_acquire_timeout}s waiting for a Postgres connection")
+            raise
+        self._pool_metrics["acquired"] += 1
+        self._pool_metrics["acquire_wait_seconds"] += time.perf_counter() - started
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+
+    def pool_stats(self) -> dict:
+        """Snapshot of pool usage for monitoring"""
+        stats = {
+            "initialized": self.pool is not None,
+            "min_size": self.pool_min_size,
+            "max_size": self.pool_max_size,
+            "acquire_timeout": self.pool_acquire_timeout,
+            "acquired": self._pool_metrics["acquired"],
+            "acquire_timeouts": self._pool_metrics["acquire_timeouts"],
+            "avg_acquire_wait_ms": round(
+                1000 * self._pool_metrics["acquire_wait_seconds"] / self._pool_metrics["acquired"], 3
+            ) if self._pool_metrics["acquired"] else 0.0,
+        }
+        if self.pool is not None:
+            size = self.pool.get_size()
+            idle = self.pool.get_idle_size()
+            stats.update({"size": size, "idle": idle, "in_use": size - idle})
+        return stats
+
+    @staticmethod
+    def prepare_copy_records(df: pd.DataFrame, key: tuple = ("id",)):
+        """Convert a DataFrame into (columns, records) for COPY, keeping native Python types.
+
+        numpy scalars become Python scalars, NaN/NaT become NULL, and duplicate keys keep
+        the last row (ON CONFLICT cannot touch the same row twice in one statement).
+        """
+        columns = list(df)
+        key_idx = [columns.index(k) for k in key]
+        by_key = {}
+        for t in df.itertuples(index=False, name=None):
+            record = tuple(
+                None if (not isinstance(v, (list, tuple, np.ndarray)) and pd.isna(v))
+                else v.item() if isinstance(v, np.generic)
+                else v
+                for v in t
+            )
+            by_key[tuple(record[i] for i in key_idx)] = record
+        return columns, list(by_key.values())
+
+    async def _bulk_upsert(self, conn, df: pd.DataFrame, table_name: str):
+        """Stream rows into a temp staging table with COPY and merge with a single upsert"""
+        columns, records = self.prepare_copy_records(df)
+        if not records:
+            return 0
+        staging = f"{table_name}_staging_{uuid.uuid4().hex[:8]}"
+        column_list = ','.join(columns)
+        updates = ','.join([f"{col}=EXCLUDED.{col}" for col in columns if col != 'id'])
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(staging, records=records, columns=columns)
             await conn.execute(
                 f"""
-                INSERT INTO {table_name} ({','.join(columns)}) VALUES ({values})
+                INSERT INTO {table_name} ({column_list})
+                SELECT {column_list} FROM {staging}
                 ON CONFLICT (id) DO UPDATE SET {updates}
-                """,
-                *t
+                """
             )
-        await conn.close()
+        return len(records)
 
-    async def generateVectorTable(self, df: pd.DataFrame, table_name: str, create_query: str):
-        conn = await self.connect_to_db()
-        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-        await register_vector(conn)
-        await conn.execute(create_query)
-        for _, row in df.iterrows():
-            # Upsert embedding
+    async def generateSourceTable(self, df: pd.DataFrame, table_name: str, create_query: str, bulk: bool = False):
+        async with self.acquire() as conn:
+            # Only create table if not exists
+            await conn.execute(create_query)
+            if bulk:
+                count = await self._bulk_upsert(conn, df, table_name)
+                logger.info(f"Bulk upserted {count} rows into {table_name} via COPY")
+                return
+            tuples = [tuple(map(str, t)) for t in df.itertuples(index=False)]
+            # Insert or update (upsert) data
+            for t in tuples:
+                columns = list(df)
+                values = ','.join([f'${i+1}' for i in range(len(columns))])
+                updates = ','.join([f"{col}=EXCLUDED.{col}" for col in columns if col != 'id'])
+                await conn.execute(
+                    f"""
+                    INSERT INTO {table_name} ({','.join(columns)}) VALUES ({values})
+                    ON CONFLICT (id) DO UPDATE SET {updates}
+                    """,
+                    *t
+                )
+
+    async def _bulk_upsert_embeddings(self, conn, df: pd.DataFrame, table_name: str):
+        """Write all chunk vectors in one binary COPY into staging, then merge with one upsert.
+
+        asyncpg's COPY uses the binary protocol and the pool's register_vector codec, so
+        embeddings are sent in pgvector's binary format rather than as text literals.
+        """
+        df = df[["id", "content", "embedding"]].copy()
+        df["embedding"] = [np.asarray(e, dtype=np.float32) for e in df["embedding"]]
+        columns, records = self.prepare_copy_records(df, key=("id", "content"))
+        if not records:
+            return 0
+        staging = f"{table_name}_emb_staging_{uuid.uuid4().hex[:8]}"
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging} (LIKE {table_name}_embeddings) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(staging, records=records, columns=columns)
             await conn.execute(
                 f"""
                 INSERT INTO {table_name}_embeddings (id, content, embedding)
-                VALUES ($1, $2, $3)
+                SELECT id, content, embedding FROM {staging}
                 ON CONFLICT (id, content) DO UPDATE SET embedding=EXCLUDED.embedding
-                """,
-                row["id"], row["content"], np.array(row["embedding"])
-            )
-        await conn.close()
-
-    async def generateHNSWIndexing(self, table_name: str, m: int, operator: str, ef_construction: int, lists: int):
-        conn = await self.connect_to_db()
-        await register_vector(conn)
-        try:
-            await conn.execute(
-                f"""CREATE INDEX IF NOT EXISTS {table_name}_embeddings_hnsw_idx
-                    ON {table_name}_embeddings
-                    USING hnsw(embedding {operator})
-                    WITH (m = {m}, ef_construction = {ef_construction})
                 """
             )
-        except Exception as e:
-            print(f"Warning: Could not create HNSW index: {e}")
-        await conn.close()
+        return len(records)
+
+    async def generateVectorTable(self, df: pd.DataFrame, table_name: str, create_query: str, bulk: bool = False):
+        async with self.acquire() as conn:
+            await conn.execute(create_query)
+            if bulk:
+                count = await self._bulk_upsert_embeddings(conn, df, table_name)
+                logger.info(f"Bulk upserted {count} embeddings into {table_name}_embeddings via binary COPY")
+                return
+            for _, row in df.iterrows():
+                # Upsert embedding
+                await conn.execute(
+                    f"""
+                    INSERT INTO {table_name}_embeddings (id, content, embedding)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (id, content) DO UPDATE SET embedding=EXCLUDED.embedding
+                    """,
+                    row["id"], row["content"], np.array(row["embedding"])
+                )
+
+    async def generateHNSWIndexing(
+        self,
+        table_name: str,
+        m: int = None,
+        operator: str = "vector_cosine_ops",
+        ef_construction: int = None,
+        lists: int = 2000
+    ):
+        """HNSW index over the chunk embeddings; m / ef_construction default to VectorSearchConfig"""
+        m = m or self.vector_search_config.hnsw_m
+        ef_construction = ef_construction or self.vector_search_config.hnsw_ef_construction
+        async with self.acquire() as conn:
+            try:
+                await conn.execute(
+                    f"""CREATE INDEX IF NOT EXISTS {table_name}_embeddings_hnsw_idx
+                        ON {table_name}_embeddings
+                        USING hnsw(embedding {operator})
+                        WITH (m = {m}, ef_construction = {ef_construction})
+                    """
+                )
+            except Exception as e:
+                print(f"Warning: Could not create HNSW index: {e}")
 
     async def dropVectorTable(self, table_name: str):
-        conn = await self.connect_to_db()
-        await conn.execute(f"DROP TABLE IF EXISTS {table_name}_chat_history CASCADE")
-        await conn.execute(f"DROP TABLE IF EXISTS {table_name}_embeddings CASCADE")
-        await conn.execute(f"DROP TABLE IF EXISTS {table_name}_lsa_results CASCADE")
-        await conn.execute(f"DROP TABLE IF EXISTS {table_name}_scoring CASCADE")
-        await conn.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE")
-        await conn.close()
+        self._chat_tables_ready.discard(table_name)
+        self._chat_search_config.pop(table_name, None)
+        async with self.acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name}_chat_history CASCADE")
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name}_chat_stats, {table_name}_chat_active_days, {table_name}_chat_words")
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name}_embeddings CASCADE")
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name}_lsa_results CASCADE")
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name}_scoring CASCADE")
+            await conn.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE")
 
     async def clean_text(self, text: str) -> str:
         import re
@@ -167,19 +508,8 @@ class PostgreDB:
     
     async def create_lsa_results_table(self, table_name: str):
         """Create table to store LSA similarity results"""
-        conn = await self.connect_to_db()
-        await conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name}_lsa_results (
-                id SERIAL PRIMARY KEY,
-                innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
-                compared_innovation VARCHAR(1024),
-                similarity_score FLOAT,
-                compared_innovation_description TEXT,
-                nama_inovator TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        await conn.close()
+        async with self.acquire() as conn:
+            await lsa.create_results_table(conn, table_name)
 
 
     async def save_lsa_results(self, innovation_id: str, lsa_results: list, table_name: str = "innovations"):
@@ -188,28 +518,26 @@ class PostgreDB:
             # Ensure LSA results table exists
             await self.create_lsa_results_table(table_name)
             
-            conn = await self.connect_to_db()
-            
-            # Clear previous results for this innovation
-            await conn.execute(
-                f"DELETE FROM {table_name}_lsa_results WHERE innovation_id = $1",
-                innovation_id
-            )
-            
-            # Insert new results
-            for result in lsa_results:
+            async with self.acquire() as conn:
+                # Clear previous results for this innovation
                 await conn.execute(
-                    f"""INSERT INTO {table_name}_lsa_results 
-                        (innovation_id, compared_innovation, similarity_score, compared_innovation_description, nama_inovator)
-                        VALUES ($1, $2, $3, $4, $5)""",
-                    innovation_id,
-                    result.get("nama_inovasi"),
-                    result.get("similarity_score"),
-                    result.get("compared_innovation_description"),
-                    result.get("nama_inovator")
+                    f"DELETE FROM {table_name}_lsa_results WHERE innovation_id = $1",
+                    innovation_id
                 )
-            
-            await conn.close()
+
+                # Insert new results
+                for result in lsa_results:
+                    await conn.execute(
+                        f"""INSERT INTO {table_name}_lsa_results 
+                            (innovation_id, compared_innovation, similarity_score, compared_innovation_description, nama_inovator)
+                            VALUES ($1, $2, $3, $4, $5)""",
+                        innovation_id,
+                        result.get("nama_inovasi"),
+                        result.get("similarity_score"),
+                        result.get("compared_innovation_description"),
+                        result.get("nama_inovator")
+                    )
+
             print(f"Saved {len(lsa_results)} LSA results for innovation {innovation_id}")
             
         except Exception as e:
@@ -221,11 +549,26 @@ class PostgreDB:
         table_name: str,
         create_query: str = "",
         vector_query: str = "",
-        m: int = 24,
-        ef_construction: int = 100,
+        m: int = None,
+        ef_construction: int = None,
         lists: int = 2000,
-        operator: str = "vector_cosine_ops"
+        operator: str = "vector_cosine_ops",
+        progress=None,
+        reuse_embeddings_from: str = None,
+        build_index: bool = True
     ):
+        """Store PDFs + sections, then chunk, embed and index them.
+
+        ``progress`` is an optional ``async (stage, state)`` callback used by background
+        jobs to record the stages: stored, chunked, embedded, indexed.
+        ``reuse_embeddings_from`` (single-document builds) names an innovation with the
+        identical PDF: its chunks and vectors are copied instead of re-chunking/embedding.
+        With ``build_index=False`` the HNSW index is left to the caller (generateHNSWIndexing).
+        """
+        async def report(stage: str, state: str = "done"):
+            if progress is not None:
+                await progress(stage, state)
+
         # Copy dataframe & add UUID
         df = df.copy().fillna("")
         # df["id"] = [str(uuid.uuid4()) for _ in range(len(df))]
@@ -241,15 +584,21 @@ class PostgreDB:
                 df[sec] = ""
 
         for idx, row in df.iterrows():
+            source_object = row.get("source_object")
+            if source_object:
+                # Streamed to MinIO at upload time: server-side copy, sections come from the caller
+                df.at[idx, "link_document"] = await self.promote_upload(source_object, row["id"], table_name)
+                continue
+
             pdf_path = row.get("pdf_path")
             if pdf_path:
                 # upload to MinIO
                 obj_name = f"{table_name}/{row['id']}.pdf"
-                self.minio_client.fput_object(self.bucket_name, obj_name, pdf_path)
+                await run_blocking("minio", self.minio_client.fput_object, self.bucket_name, obj_name, pdf_path)
                 df.at[idx, "link_document"] = f"{self.base_url}/{self.bucket_name}/{obj_name}"
 
                 # Extract sections using the improved extractor
-                extracted = self.extractor.extract_multiple_sections(pdf_path, sections)
+                extracted = await run_blocking("gemini", self.extractor.extract_multiple_sections, pdf_path, sections)
                 
                 # Handle fallback parsing if needed
                 if 'raw_response' in extracted:
@@ -267,8 +616,57 @@ class PostgreDB:
                     print(f"Warning: could not delete file {pdf_path}: {e}")
 
         # Default create_query with new columns
-        if not create_query:
-            create_query = f"""
+        create_query = create_query or self.default_create_query(table_name)
+        vector_query = vector_query or self.default_vector_query(table_name)
+
+        # Create LSA results table, scoring table, and chat history table
+        await self.create_lsa_results_table(table_name)
+        await self.create_scoring_table(table_name)
+        await self.create_chat_history_table(table_name)
+
+        # *** IMPORTANT FIX: Drop pdf_path column before saving to database ***
+        # pdf_path / source_object were only needed for processing, not for database storage
+        df_for_db = df.drop(columns=['pdf_path', 'source_object'], errors='ignore')
+        
+        if "document_sha256" in df_for_db.columns:
+            async with self.acquire() as conn:
+                await conn.execute(create_query)
+            await self.ensure_document_hash_column(table_name)
+
+        # Save main table and build vectors (COPY path for multi-row backfills)
+        await self.generateSourceTable(df_for_db, table_name, create_query, bulk=len(df_for_db) > 1)
+        await report("stored")
+
+        if reuse_embeddings_from:
+            copied = await self.copy_embeddings(reuse_embeddings_from, df["id"].iloc[0], table_name)
+            logger.info(f"Reused {copied} embedded chunks of {reuse_embeddings_from} for {df['id'].iloc[0]}")
+            await report("chunked")
+            await report("embedded")
+            return "success reused embedding data"
+
+        chunks = await self.chunk_sections(df, sections)
+        await report("chunked")
+
+        if not chunks:
+            print("Warning: No content chunks were created for embedding")
+            return "success but no content for embedding"
+
+        chunks = await self.embed_chunks(chunks)
+        if not chunks:
+            return "success but embedding failed for all chunks"
+
+        emb_df = pd.DataFrame(chunks)
+        await self.generateVectorTable(emb_df, table_name, vector_query, bulk=True)
+        await report("embedded")
+        if build_index:
+            await self.generateHNSWIndexing(table_name, m, operator, ef_construction, lists)
+            await report("indexed")
+
+        return "success embedding data"
+
+    @staticmethod
+    def default_create_query(table_name: str) -> str:
+        return f"""
             CREATE TABLE IF NOT EXISTS {table_name} (
                 id VARCHAR(1024) PRIMARY KEY,
                 nama_inovasi TEXT,
@@ -277,11 +675,14 @@ class PostgreDB:
                 link_document TEXT,
                 latar_belakang TEXT,
                 tujuan_inovasi TEXT,
-                deskripsi_inovasi TEXT
+                deskripsi_inovasi TEXT,
+                document_sha256 CHAR(64)
             )
             """
-        if not vector_query:
-            vector_query = f"""
+
+    @staticmethod
+    def default_vector_query(table_name: str) -> str:
+        return f"""
             CREATE TABLE IF NOT EXISTS {table_name}_embeddings (
                 id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
                 content TEXT,
@@ -290,51 +691,74 @@ class PostgreDB:
             )
             """
 
-        # Create LSA results table, scoring table, and chat history table
+    async def create_innovation_tables(self, table_name: str):
+        """Every table an ingested innovation is written to (idempotent)"""
+        async with self.acquire() as conn:
+            await conn.execute(self.default_create_query(table_name))
+        await self.ensure_document_hash_column(table_name)
         await self.create_lsa_results_table(table_name)
         await self.create_scoring_table(table_name)
         await self.create_chat_history_table(table_name)
+        async with self.acquire() as conn:
+            await conn.execute(self.default_vector_query(table_name))
 
-        # *** IMPORTANT FIX: Drop pdf_path column before saving to database ***
-        # pdf_path was only needed for processing, not for database storage
-        df_for_db = df.drop(columns=['pdf_path'], errors='ignore')
-        
-        # Save main table and build vectors
-        await self.generateSourceTable(df_for_db, table_name, create_query)
-        
-        vertex_embeddings = VertexAIEmbeddings(
-            model_name="textembedding-gecko@003",
-            location=self.vertex_location,
-            max_output_tokens=768,
-            credentials=self.credentials,
-            project=self.vertex_project
+    async def promote_upload(self, source_object: str, innovation_id: str, table_name: str) -> str:
+        """Server-side copy of a staged upload to its final object; returns the link_document URL"""
+        obj_name = f"{table_name}/{innovation_id}.pdf"
+        await run_blocking(
+            "minio", self.minio_client.copy_object,
+            self.bucket_name, obj_name, CopySource(self.bucket_name, source_object)
         )
-        text_splitter = SemanticChunker(vertex_embeddings)
-        chunks = []
+        return f"{self.base_url}/{self.bucket_name}/{obj_name}"
+
+    async def chunk_sections(self, df: pd.DataFrame, sections: list) -> list:
+        """Semantic chunks ({"id", "content"}) of the cleaned sections of every row.
+
+        SemanticChunker embeds a window of sentences around every sentence. Those windows
+        are embedded up front through embed_with_cache, so a re-uploaded document reuses
+        the stored vectors instead of paying Vertex again for every sentence.
+        """
+        contents = []
         for _, row in df.iterrows():  # Use original df for processing (still has all columns)
             for sec in sections:
-                content = await self.clean_text(row.get(sec, "").lower())
+                content = await self.clean_text(str(row.get(sec, "") or "").lower())
                 if content and content != "tidak ditemukan":  # Skip empty or not found content
-                    for doc in text_splitter.create_documents([content]):
-                        text = doc.page_content.strip()
-                        if text:
-                            chunks.append({"id": row["id"], "content": text})
+                    contents.append((row["id"], content))
+        if not contents:
+            return []
 
-        if not chunks:
-            print("Warning: No content chunks were created for embedding")
-            return "success but no content for embedding"
+        splitter = SemanticChunker(self.embedding_service.client)
+        windows = []
+        for _, content in contents:
+            sentences = re.split(splitter.sentence_split_regex, content)
+            if len(sentences) > 1:
+                windows.extend(
+                    s["combined_sentence"] for s in
+                    combine_sentences([{"sentence": x, "index": i} for i, x in enumerate(sentences)], splitter.buffer_size)
+                )
+        windows = list(dict.fromkeys(windows))
+        vectors = await self.embed_with_cache(windows)
+        splitter.embeddings = PrecomputedEmbeddings(dict(zip(windows, vectors)), self.embedding_service.client)
 
-        for i in range(0, len(chunks), 5):
-            batch = [c["content"] for c in chunks[i : i + 5]]
-            embs = self.retry_with_backoff(vertex_embeddings.embed_documents, batch)
-            for c, e in zip(chunks[i : i + 5], embs):
-                c["embedding"] = e
+        chunks = []
+        for innovation_id, content in contents:
+            # Only windows missing from the cache (failed batches) still call Vertex, synchronously
+            docs = await run_blocking("embedding", splitter.create_documents, [content])
+            for doc in docs:
+                text = doc.page_content.strip()
+                if text:
+                    chunks.append({"id": innovation_id, "content": text})
+        return chunks
 
-        emb_df = pd.DataFrame(chunks)
-        await self.generateVectorTable(emb_df, table_name, vector_query)
-        await self.generateHNSWIndexing(table_name, m, operator, ef_construction, lists)
-
-        return "success embedding data"
+    async def embed_chunks(self, chunks: list) -> list:
+        """Attach an embedding to each chunk; chunks whose batch failed are dropped"""
+        embs = await self.embed_with_cache([c["content"] for c in chunks])
+        for c, e in zip(chunks, embs):
+            c["embedding"] = e
+        failed = sum(1 for c in chunks if c["embedding"] is None)
+        if failed:
+            logger.warning(f"Skipping {failed}/{len(chunks)} chunks whose embedding batch failed")
+        return [c for c in chunks if c["embedding"] is not None]
 
     def _parse_raw_response(self, extracted: dict, sections: list, pdf_path: str):
         """Helper method to parse raw_response when JSON parsing fails in extractor"""
@@ -374,36 +798,76 @@ class PostgreDB:
 
     async def create_scoring_table(self, table_name: str):
         """Create table to store scoring results"""
-        conn = await self.connect_to_db()
-        await conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name}_scoring (
-                id SERIAL PRIMARY KEY,
-                innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
-                substansi_orisinalitas INTEGER,
-                substansi_urgensi INTEGER,
-                substansi_kedalaman INTEGER,
-                analisis_dampak INTEGER,
-                analisis_kelayakan INTEGER,
-                analisis_data INTEGER,
-                sistematika_struktur INTEGER,
-                sistematika_bahasa INTEGER,
-                sistematika_referensi INTEGER,
-                total_score INTEGER,
-                scoring_raw_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(innovation_id)
-            )
-        """)
-        await conn.close()
+        async with self.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_scoring (
+                    id SERIAL PRIMARY KEY,
+                    innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
+                    substansi_orisinalitas INTEGER,
+                    substansi_urgensi INTEGER,
+                    substansi_kedalaman INTEGER,
+                    analisis_dampak INTEGER,
+                    analisis_kelayakan INTEGER,
+                    analisis_data INTEGER,
+                    sistematika_struktur INTEGER,
+                    sistematika_bahasa INTEGER,
+                    sistematika_referensi INTEGER,
+                    total_score INTEGER,
+                    scoring_raw_data TEXT,
+                    document_sha256 CHAR(64),
+                    scoring_fingerprint CHAR(64),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(innovation_id)
+                )
+            """)
+            # Tables created before score caching existed
+            await conn.execute(f"""
+                ALTER TABLE {table_name}_scoring
+                    ADD COLUMN IF NOT EXISTS document_sha256 CHAR(64),
+                    ADD COLUMN IF NOT EXISTS scoring_fingerprint CHAR(64)
+            """)
+            # Keyset order of the ranking: total_score DESC, innovation_id
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {table_name}_scoring_rank_idx
+                ON {table_name}_scoring (total_score DESC, innovation_id)
+            """)
+
+    async def get_cached_score(
+        self,
+        innovation_id: str,
+        document_sha256: str,
+        scoring_fingerprint: str,
+        table_name: str = "innovations"
+    ):
+        """Stored score when it was produced from the same PDF bytes and scoring setup, else None"""
+        try:
+            async with self.acquire() as conn:
+                row = await conn.fetchrow(f"""
+                    SELECT scoring_raw_data, created_at FROM {table_name}_scoring
+                    WHERE innovation_id = $1 AND document_sha256 = $2 AND scoring_fingerprint = $3
+                """, innovation_id, document_sha256, scoring_fingerprint)
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+            return None
+        if not row or not row["scoring_raw_data"]:
+            return None
+        return {
+            "score": json.loads(row["scoring_raw_data"]),
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None
+        }
 
-    async def save_scoring_results(self, innovation_id: str, scoring_data: dict, table_name: str = "innovations"):
-        """Save scoring results to database"""
+    async def save_scoring_results(
+        self,
+        innovation_id: str,
+        scoring_data: dict,
+        table_name: str = "innovations",
+        document_sha256: str = None,
+        scoring_fingerprint: str = None
+    ):
+        """Save scoring results to database, with the document hash + scoring fingerprint they belong to"""
         try:
             # Ensure scoring table exists
             await self.create_scoring_table(table_name)
             
-            conn = await self.connect_to_db()
-            
             # Prepare scoring values
             scoring_values = {
                 'substansi_orisinalitas': scoring_data.get('substansi_orisinalitas'),
@@ -416,65 +880,351 @@ class PostgreDB:
                 'sistematika_bahasa': scoring_data.get('sistematika_bahasa'),
                 'sistematika_referensi': scoring_data.get('sistematika_referensi'),
                 'total_score': scoring_data.get('total'),
-                'scoring_raw_data': json.dumps(scoring_data)
+                'scoring_raw_data': json.dumps(scoring_data),
+                'document_sha256': document_sha256,
+                'scoring_fingerprint': scoring_fingerprint
             }
             
-            # Upsert scoring data
-            await conn.execute(f"""
-                INSERT INTO {table_name}_scoring 
-                (innovation_id, substansi_orisinalitas, substansi_urgensi, substansi_kedalaman,
-                 analisis_dampak, analisis_kelayakan, analisis_data, sistematika_struktur,
-                 sistematika_bahasa, sistematika_referensi, total_score, scoring_raw_data)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                ON CONFLICT (innovation_id) DO UPDATE SET
-                    substansi_orisinalitas = EXCLUDED.substansi_orisinalitas,
-                    substansi_urgensi = EXCLUDED.substansi_urgensi,
-                    substansi_kedalaman = EXCLUDED.substansi_kedalaman,
-                    analisis_dampak = EXCLUDED.analisis_dampak,
-                    analisis_kelayakan = EXCLUDED.analisis_kelayakan,
-                    analisis_data = EXCLUDED.analisis_data,
-                    sistematika_struktur = EXCLUDED.sistematika_struktur,
-                    sistematika_bahasa = EXCLUDED.sistematika_bahasa,
-                    sistematika_referensi = EXCLUDED.sistematika_referensi,
-                    total_score = EXCLUDED.total_score,
-                    scoring_raw_data = EXCLUDED.scoring_raw_data,
-                    created_at = CURRENT_TIMESTAMP
-            """, innovation_id, *scoring_values.values())
-            
-            await conn.close()
+            async with self.acquire() as conn:
+                # Upsert scoring data
+                await conn.execute(f"""
+                    INSERT INTO {table_name}_scoring 
+                    (innovation_id, substansi_orisinalitas, substansi_urgensi, substansi_kedalaman,
+                     analisis_dampak, analisis_kelayakan, analisis_data, sistematika_struktur,
+                     sistematika_bahasa, sistematika_referensi, total_score, scoring_raw_data,
+                     document_sha256, scoring_fingerprint)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+                    ON CONFLICT (innovation_id) DO UPDATE SET
+                        substansi_orisinalitas = EXCLUDED.substansi_orisinalitas,
+                        substansi_urgensi = EXCLUDED.substansi_urgensi,
+                        substansi_kedalaman = EXCLUDED.substansi_kedalaman,
+                        analisis_dampak = EXCLUDED.analisis_dampak,
+                        analisis_kelayakan = EXCLUDED.analisis_kelayakan,
+                        analisis_data = EXCLUDED.analisis_data,
+                        sistematika_struktur = EXCLUDED.sistematika_struktur,
+                        sistematika_bahasa = EXCLUDED.sistematika_bahasa,
+                        sistematika_referensi = EXCLUDED.sistematika_referensi,
+                        total_score = EXCLUDED.total_score,
+                        scoring_raw_data = EXCLUDED.scoring_raw_data,
+                        document_sha256 = EXCLUDED.document_sha256,
+                        scoring_fingerprint = EXCLUDED.scoring_fingerprint,
+                        created_at = CURRENT_TIMESTAMP
+                """, innovation_id, *scoring_values.values())
+
             print(f"Saved scoring results for innovation {innovation_id}")
+            self.schedule_leaderboard_refresh(table_name)
             
         except Exception as e:
             print(f"Failed to save scoring results: {e}")
 
-    async def create_chat_history_table(self, table_name: str):
-        """Create table to store chat history"""
-        conn = await self.connect_to_db()
-        await conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name}_chat_history (
-                id SERIAL PRIMARY KEY,
-                chat_id VARCHAR(1024) UNIQUE NOT NULL,
-                innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
-                user_name VARCHAR(255),
-                user_question TEXT NOT NULL,
-                ai_response TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    async def create_leaderboard(self, table_name: str):
+        """Materialized ranking (scores + innovation names, rank, percentile) with its keyset index"""
+        async with self.acquire() as conn:
+            await conn.execute(f"""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS {table_name}_leaderboard AS
+                SELECT s.innovation_id,
+                       i.nama_inovasi,
+                       i.nama_inovator,
+                       s.substansi_orisinalitas,
+                       s.substansi_urgensi,
+                       s.substansi_kedalaman,
+                       s.analisis_dampak,
+                       s.analisis_kelayakan,
+                       s.analisis_data,
+                       s.sistematika_struktur,
+                       s.sistematika_bahasa,
+                       s.sistematika_referensi,
+                       s.total_score,
+                       s.created_at,
+                       RANK() OVER (ORDER BY s.total_score DESC) AS rank,
+                       ROUND(((1 - PERCENT_RANK() OVER (ORDER BY s.total_score DESC)) * 100)::numeric, 1) AS percentile
+                FROM {table_name}_scoring s
+                JOIN {table_name} i ON i.id = s.innovation_id
+                WHERE s.total_score IS NOT NULL
+            """)
+            # The unique index is what allows REFRESH ... CONCURRENTLY
+            await conn.execute(f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_leaderboard_id_idx
+                ON {table_name}_leaderboard (innovation_id)
+            """)
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS {table_name}_leaderboard_rank_idx
+                ON {table_name}_leaderboard (total_score DESC, innovation_id)
+            """)
+
+    async def refresh_leaderboard(self, table_name: str):
+        """Recompute the leaderboard without blocking readers (they see the previous snapshot)"""
+        try:
+            async with self.acquire() as conn:
+                await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {table_name}_leaderboard")
+        except asyncpg.UndefinedTableError:
+            # First score of this table: creating the view populates it
+            await self.create_leaderboard(table_name)
+
+    def schedule_leaderboard_refresh(self, table_name: str) -> asyncio.Task:
+        """Refresh in the background, coalescing writes: at most one refresh runs per table,
+        and writes that land while it runs trigger exactly one more."""
+        state = self._leaderboard_refresh.setdefault(table_name, {"task": None, "dirty": False})
+        state["dirty"] = True
+        if state["task"] is not None and not state["task"].done():
+            return state["task"]
+
+        async def refresh_loop():
+            while state["dirty"]:
+                state["dirty"] = False
+                try:
+                    await self.refresh_leaderboard(table_name)
+                except Exception as e:
+                    logger.warning(f"Leaderboard refresh for {table_name} failed: {e}")
+
+        state["task"] = asyncio.create_task(refresh_loop())
+        return state["task"]
+
+    @staticmethod
+    def encode_cursor(*values) -> str:
+        """Opaque keyset cursor holding the sort key of the last row of a page"""
+        payload = json.dumps(list(values), ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str, *types) -> tuple:
+        """Sort key of a cursor, checked against the expected types; ValueError when malformed"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Invalid cursor")
+        for value, expected in zip(values, types):
+            if isinstance(value, bool) or not isinstance(value, (int, float) if expected is float else expected):
+                raise ValueError("Invalid cursor")
+        return tuple(values)
+
+    @staticmethod
+    def encode_rank_cursor(total_score: int, innovation_id: str) -> str:
+        """Keyset cursor pointing after the given leaderboard row"""
+        return PostgreDB.encode_cursor(total_score, innovation_id)
+
+    @staticmethod
+    def decode_rank_cursor(cursor: str):
+        """(total_score, innovation_id) of a leaderboard cursor"""
+        return PostgreDB.decode_cursor(cursor, int, str)
+
+    async def get_leaderboard(self, table_name: str = "innovations", limit: int = 50, cursor: str = None) -> dict:
+        """One keyset page of the leaderboard, ordered by total_score DESC, innovation_id"""
+        after = self.decode_rank_cursor(cursor) if cursor else None
+        query = f"SELECT * FROM {table_name}_leaderboard"
+        args = [limit + 1]
+        if after:
+            query += " WHERE total_score < $2 OR (total_score = $2 AND innovation_id > $3)"
+            args.extend(after)
+        query += " ORDER BY total_score DESC, innovation_id LIMIT $1"
+        try:
+            async with self.acquire() as conn:
+                rows = await conn.fetch(query, *args)
+                total = await conn.fetchval(f"SELECT COUNT(*) FROM {table_name}_leaderboard")
+        except asyncpg.UndefinedTableError:
+            # Leaderboard of a table scored before it existed: build it (populated) once, then read
+            await self.create_leaderboard(table_name)
+            return await self.get_leaderboard(table_name, limit, cursor)
+        items = [dict(r) for r in rows[:limit]]
+        for item in items:
+            item["percentile"] = float(item["percentile"]) if item["percentile"] is not None else None
+            item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+        next_cursor = None
+        if len(rows) > limit and items:
+            next_cursor = self.encode_rank_cursor(items[-1]["total_score"], items[-1]["innovation_id"])
+        return {"items": items, "next_cursor": next_cursor, "total": total}
+
+    SUMMARY_SECTIONS = ("latar_belakang", "tujuan_inovasi", "deskripsi_inovasi")
+
+    @staticmethod
+    def sections_hash(sections: dict) -> str:
+        """sha256 over the three extracted sections; a summary is valid while this is unchanged"""
+        payload = json.dumps(
+            {sec: sections.get(sec) or "" for sec in PostgreDB.SUMMARY_SECTIONS},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def ensure_document_hash_column(self, table_name: str):
+        """sha256 of the uploaded PDF on the innovation row, indexed for dedup lookups"""
+        async with self.acquire() as conn:
+            await conn.execute(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS document_sha256 CHAR(64)")
+            await conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table_name}_document_sha256_idx ON {table_name} (document_sha256)"
             )
-        """)
-        
-        # Create index for faster queries
-        await conn.execute(f"""
-            CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_innovation_id 
-            ON {table_name}_chat_history(innovation_id)
-        """)
-        
-        await conn.execute(f"""
-            CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_user_name 
-            ON {table_name}_chat_history(user_name)
-        """)
-        
-        await conn.close()
+
+    async def get_document_sha256(self, innovation_id: str, table_name: str = "innovations"):
+        """Stored sha256 of an innovation's PDF, or None (not recorded / table predates dedup)"""
+        try:
+            async with self.acquire() as conn:
+                return await conn.fetchval(
+                    f"SELECT document_sha256 FROM {table_name} WHERE id = $1", innovation_id
+                )
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+            return None
+
+    async def set_document_sha256(self, innovation_id: str, document_sha256: str, table_name: str = "innovations"):
+        """Record the sha256 of a PDF uploaded before hashes were stored (no-op without the column)"""
+        try:
+            async with self.acquire() as conn:
+                await conn.execute(
+                    f"UPDATE {table_name} SET document_sha256 = $2 WHERE id = $1", innovation_id, document_sha256
+                )
+        except asyncpg.UndefinedColumnError:
+            pass
+
+    async def find_by_document_sha256(self, document_sha256: str, table_name: str = "innovations", prefer_id: str = None):
+        """Innovation (id + stored sections) whose PDF has this sha256, or None.
+
+        When several innovations share the document, ``prefer_id`` wins if it is one of them.
+        """
+        try:
+            async with self.acquire() as conn:
+                row = await conn.fetchrow(f"""
+                    SELECT id, link_document, latar_belakang, tujuan_inovasi, deskripsi_inovasi
+                    FROM {table_name}
+                    WHERE document_sha256 = $1
+                    ORDER BY (id = $2) DESC NULLS LAST, id
+                    LIMIT 1
+                """, document_sha256, prefer_id)
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+            return None
+        return dict(row) if row else None
+
+    async def copy_embeddings(self, source_id: str, target_id: str, table_name: str = "innovations") -> int:
+        """Copy the chunks and vectors of one innovation to another; returns the chunks reused.
+
+        A re-upload under the same id keeps its stored chunks, which are counted instead.
+        """
+        async with self.acquire() as conn:
+            if source_id == target_id:
+                return await conn.fetchval(f"SELECT COUNT(*) FROM {table_name}_embeddings WHERE id = $1", source_id)
+            result = await conn.execute(f"""
+                INSERT INTO {table_name}_embeddings (id, content, embedding)
+                SELECT $2, content, embedding FROM {table_name}_embeddings WHERE id = $1
+                ON CONFLICT (id, content) DO UPDATE SET embedding = EXCLUDED.embedding
+            """, source_id, target_id)
+        return int(result.split()[-1])
+
+    async def create_summaries_table(self, table_name: str):
+        """Create table to store AI summaries, one per innovation, versioned by sections hash"""
+        async with self.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_summaries (
+                    innovation_id VARCHAR(1024) PRIMARY KEY REFERENCES {table_name}(id) ON DELETE CASCADE,
+                    sections_hash CHAR(64) NOT NULL,
+                    summary JSONB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+    async def get_summary(self, innovation_id: str, sections_hash: str, table_name: str = "innovations"):
+        """Stored summary for the given sections hash, or None when missing / stale"""
+        try:
+            async with self.acquire() as conn:
+                row = await conn.fetchrow(
+                    f"""SELECT summary, created_at FROM {table_name}_summaries
+                        WHERE innovation_id = $1 AND sections_hash = $2""",
+                    innovation_id, sections_hash
+                )
+        except asyncpg.UndefinedTableError:
+            return None
+        if not row:
+            return None
+        summary = row["summary"]
+        return {
+            "summary": json.loads(summary) if isinstance(summary, str) else summary,
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None
+        }
+
+    async def save_summary(self, innovation_id: str, sections_hash: str, summary: dict, table_name: str = "innovations"):
+        """Upsert the summary of an innovation together with the hash of the sections it was built from"""
+        try:
+            await self.create_summaries_table(table_name)
+            async with self.acquire() as conn:
+                await conn.execute(f"""
+                    INSERT INTO {table_name}_summaries (innovation_id, sections_hash, summary)
+                    VALUES ($1, $2, $3::jsonb)
+                    ON CONFLICT (innovation_id) DO UPDATE SET
+                        sections_hash = EXCLUDED.sections_hash,
+                        summary = EXCLUDED.summary,
+                        created_at = CURRENT_TIMESTAMP
+                """, innovation_id, sections_hash, json.dumps(summary, ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"Failed to save summary for {innovation_id}: {e}")
+
+    async def create_chat_history_table(self, table_name: str):
+        """Create table to store chat history (once per table and process)"""
+        if table_name in self._chat_tables_ready:
+            return
+        async with self.acquire() as conn:
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_chat_history (
+                    id SERIAL PRIMARY KEY,
+                    chat_id VARCHAR(1024) UNIQUE NOT NULL,
+                    innovation_id VARCHAR(1024) NOT NULL REFERENCES {table_name}(id),
+                    user_name VARCHAR(255),
+                    user_question TEXT NOT NULL,
+                    ai_response TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Create index for faster queries
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_innovation_id 
+                ON {table_name}_chat_history(innovation_id)
+            """)
+
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_user_name 
+                ON {table_name}_chat_history(user_name)
+            """)
+            await chat_analytics.create_tables(conn, table_name)
+        await self.ensure_chat_search(table_name)
+        self._chat_tables_ready.add(table_name)
+
+    async def ensure_chat_search(self, table_name: str) -> str:
+        """Generated tsvector column + GIN index on the chat history; returns its text search config.
+
+        The config is read back from the existing column, so queries always match how the
+        vectors were built even if CHAT_SEARCH_TS_CONFIG changed later.
+        """
+        if table_name in self._chat_search_config:
+            return self._chat_search_config[table_name]
+        async with self.acquire() as conn:
+            expression = await conn.fetchval("""
+                SELECT pg_get_expr(d.adbin, d.adrelid)
+                FROM pg_attribute a
+                JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+                WHERE a.attrelid = $1::regclass AND a.attname = 'search_vector'
+            """, f"{table_name}_chat_history")
+            if expression:
+                match = re.search(r"'(\w+)'::regconfig", expression)
+                ts_config = match.group(1) if match else "simple"
+            else:
+                wanted = ChatSearchConfig().ts_config
+                installed = await conn.fetchval("SELECT 1 FROM pg_ts_config WHERE cfgname = $1", wanted)
+                ts_config = wanted if installed else "simple"
+                if not installed:
+                    logger.warning(f"Text search config '{wanted}' not installed, chat search uses 'simple'")
+                # Questions weigh more than the (long) answers when ranking
+                await conn.execute(f"""
+                    ALTER TABLE {table_name}_chat_history
+                    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+                        setweight(to_tsvector('{ts_config}'::regconfig, coalesce(user_question, '')), 'A') ||
+                        setweight(to_tsvector('{ts_config}'::regconfig, coalesce(ai_response, '')), 'B')
+                    ) STORED
+                """)
+            await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table_name}_chat_search
+                ON {table_name}_chat_history USING gin(search_vector)
+            """)
+        self._chat_search_config[table_name] = ts_config
+        return ts_config
 
     async def save_chat_history(
         self, 
@@ -490,15 +1240,23 @@ class PostgreDB:
             # Ensure chat history table exists
             await self.create_chat_history_table(table_name)
             
-            conn = await self.connect_to_db()
-            
-            await conn.execute(f"""
-                INSERT INTO {table_name}_chat_history 
-                (chat_id, innovation_id, user_name, user_question, ai_response)
-                VALUES ($1, $2, $3, $4, $5)
-            """, chat_id, innovation_id, user_name, user_question, ai_response)
-            
-            await conn.close()
+            async with self.acquire() as conn:
+                async with conn.transaction():
+                    created_at = await conn.fetchval(f"""
+                        INSERT INTO {table_name}_chat_history 
+                        (chat_id, innovation_id, user_name, user_question, ai_response)
+                        VALUES ($1, $2, $3, $4, $5)
+                        RETURNING created_at
+                    """, chat_id, innovation_id, user_name, user_question, ai_response)
+                    # Analytics follow in the same transaction; a failure there (savepoint) keeps
+                    # the chat and leaves the counters to `python -m module.chat_analytics`
+                    try:
+                        async with conn.transaction():
+                            await chat_analytics.record_chat(
+                                conn, table_name, innovation_id, user_question, ai_response, created_at
+                            )
+                    except Exception as e:
+                        logger.warning(f"Failed to update chat analytics for {innovation_id}: {e}")
             print(f"Saved chat history for innovation {innovation_id}")
             
         except Exception as e:
@@ -512,17 +1270,14 @@ class PostgreDB:
     ):
         """Get chat history for specific innovation"""
         try:
-            conn = await self.connect_to_db()
-            
-            results = await conn.fetch(f"""
-                SELECT chat_id, user_question, ai_response, created_at, user_name
-                FROM {table_name}_chat_history 
-                WHERE innovation_id = $1 
-                ORDER BY created_at DESC 
-                LIMIT $2
-            """, innovation_id, limit)
-            
-            await conn.close()
+            async with self.acquire() as conn:
+                results = await conn.fetch(f"""
+                    SELECT chat_id, user_question, ai_response, created_at, user_name
+                    FROM {table_name}_chat_history 
+                    WHERE innovation_id = $1 
+                    ORDER BY created_at DESC 
+                    LIMIT $2
+                """, innovation_id, limit)
             
             return [
                 {
@@ -541,23 +1296,20 @@ class PostgreDB:
     async def get_user_chat_summary(self, user_name: str, table_name: str = "innovations"):
         """Get summary of all chats for a specific user"""
         try:
-            conn = await self.connect_to_db()
-            
-            results = await conn.fetch(f"""
-                SELECT 
-                    ch.innovation_id,
-                    i.nama_inovasi,
-                    COUNT(ch.id) as total_messages,
-                    MAX(ch.created_at) as last_chat,
-                    MIN(ch.created_at) as first_chat
-                FROM {table_name}_chat_history ch
-                JOIN {table_name} i ON ch.innovation_id = i.id
-                WHERE ch.user_name = $1
-                GROUP BY ch.innovation_id, i.nama_inovasi
-                ORDER BY last_chat DESC
-            """, user_name)
-            
-            await conn.close()
+            async with self.acquire() as conn:
+                results = await conn.fetch(f"""
+                    SELECT 
+                        ch.innovation_id,
+                        i.nama_inovasi,
+                        COUNT(ch.id) as total_messages,
+                        MAX(ch.created_at) as last_chat,
+                        MIN(ch.created_at) as first_chat
+                    FROM {table_name}_chat_history ch
+                    JOIN {table_name} i ON ch.innovation_id = i.id
+                    WHERE ch.user_name = $1
+                    GROUP BY ch.innovation_id, i.nama_inovasi
+                    ORDER BY last_chat DESC
+                """, user_name)
             
             return [
                 {
@@ -578,77 +1330,106 @@ class PostgreDB:
         search_query: str, 
         user_name: str = None, 
         innovation_id: str = None,
-        table_name: str = "innovations"
+        table_name: str = "innovations",
+        limit: int = 100,
+        cursor: str = None
     ):
-        """Search through chat history"""
+        """Full-text search through chat history, ranked by ts_rank, one keyset page at a time"""
+        after = self.decode_cursor(cursor, float, int) if cursor else None
         try:
-            conn = await self.connect_to_db()
-            
-            base_query = f"""
-                SELECT 
-                    ch.chat_id,
-                    ch.innovation_id,
-                    i.nama_inovasi,
-                    ch.user_question,
-                    ch.ai_response,
-                    ch.created_at,
-                    ch.user_name
-                FROM {table_name}_chat_history ch
-                JOIN {table_name} i ON ch.innovation_id = i.id
-                WHERE (ch.user_question ILIKE $1 OR ch.ai_response ILIKE $1)
-            """
-            
-            params = [f"%{search_query}%"]
-            param_count = 1
-            
+            await self.create_chat_history_table(table_name)
+            ts_config = await self.ensure_chat_search(table_name)
+
+            params = [search_query, limit + 1]
+            filters = ""
             if user_name:
-                param_count += 1
-                base_query += f" AND ch.user_name = ${param_count}"
                 params.append(user_name)
-            
+                filters += f" AND ch.user_name = ${len(params)}"
             if innovation_id:
-                param_count += 1
-                base_query += f" AND ch.innovation_id = ${param_count}"
                 params.append(innovation_id)
-            
-            base_query += " ORDER BY ch.created_at DESC LIMIT 100"
-            
-            results = await conn.fetch(base_query, *params)
-            await conn.close()
-            
-            return [
-                {
-                    "chat_id": r["chat_id"],
-                    "innovation_id": r["innovation_id"],
-                    "innovation_name": r["nama_inovasi"],
-                    "question": r["user_question"],
-                    "answer": r["ai_response"],
-                    "timestamp": r["created_at"].isoformat() if r["created_at"] else None,
-                    "user_name": r["user_name"]
-                } for r in results
-            ]
+                filters += f" AND ch.innovation_id = ${len(params)}"
+            page_filter = ""
+            if after:
+                params.extend(after)
+                page_filter = f"WHERE rank < ${len(params) - 1}::real OR (rank = ${len(params) - 1}::real AND id < ${len(params)})"
+
+            headline = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=10, MaxFragments=2"
+            async with self.acquire() as conn:
+                # Snippets are only built for the rows of this page
+                results = await conn.fetch(f"""
+                    WITH q AS (SELECT websearch_to_tsquery('{ts_config}'::regconfig, $1) AS query),
+                    hits AS (
+                        SELECT ch.id, ts_rank(ch.search_vector, q.query) AS rank
+                        FROM {table_name}_chat_history ch, q
+                        WHERE ch.search_vector @@ q.query{filters}
+                    ),
+                    page AS (
+                        SELECT id, rank FROM hits
+                        {page_filter}
+                        ORDER BY rank DESC, id DESC
+                        LIMIT $2
+                    )
+                    SELECT 
+                        ch.id,
+                        ch.chat_id,
+                        ch.innovation_id,
+                        i.nama_inovasi,
+                        ch.user_question,
+                        ch.ai_response,
+                        ch.created_at,
+                        ch.user_name,
+                        page.rank,
+                        ts_headline('{ts_config}'::regconfig, ch.user_question, q.query, '{headline}') AS question_snippet,
+                        ts_headline('{ts_config}'::regconfig, ch.ai_response, q.query, '{headline}') AS answer_snippet
+                    FROM page
+                    JOIN {table_name}_chat_history ch ON ch.id = page.id
+                    JOIN {table_name} i ON ch.innovation_id = i.id
+                    CROSS JOIN q
+                    ORDER BY page.rank DESC, page.id DESC
+                """, *params)
+
+            rows = results[:limit]
+            next_cursor = None
+            if len(results) > limit and rows:
+                next_cursor = self.encode_cursor(rows[-1]["rank"], rows[-1]["id"])
+            return {
+                "results": [
+                    {
+                        "chat_id": r["chat_id"],
+                        "innovation_id": r["innovation_id"],
+                        "innovation_name": r["nama_inovasi"],
+                        "question": r["user_question"],
+                        "answer": r["ai_response"],
+                        "timestamp": r["created_at"].isoformat() if r["created_at"] else None,
+                        "user_name": r["user_name"],
+                        "rank": r["rank"],
+                        "question_snippet": r["question_snippet"],
+                        "answer_snippet": r["answer_snippet"]
+                    } for r in rows
+                ],
+                "next_cursor": next_cursor
+            }
             
         except Exception as e:
             print(f"Failed to search chat history: {e}")
-            return []
+            return {"results": [], "next_cursor": None}
         
     async def get_lsa_results(self, innovation_id: str, table_name: str = "innovations"):
         """Get LSA similarity results for an innovation"""
         try:
-            conn = await self.connect_to_db()
-            rows = await conn.fetch(
-                f"""SELECT 
-                        compared_innovation,
-                        similarity_score,
-                        compared_innovation_description,
-                        nama_inovator,
-                        created_at
-                    FROM {table_name}_lsa_results
-                    WHERE innovation_id = $1
-                    ORDER BY similarity_score DESC""",
-                innovation_id
-            )
-            await conn.close()
+            async with self.acquire() as conn:
+                rows = await conn.fetch(
+                    f"""SELECT 
+                            compared_innovation,
+                            similarity_score,
+                            compared_innovation_description,
+                            nama_inovator,
+                            created_at
+                        FROM {table_name}_lsa_results
+                        WHERE innovation_id = $1
+                        ORDER BY similarity_score DESC""",
+                    innovation_id
+                )
 
             return [
                 {
@@ -666,32 +1447,26 @@ class PostgreDB:
 
 
 
-    async def similarity_search_plagiarisme(
-        self,
-        prompt: str,
-        similarity_threshold: float,
-        num_matches: int,
-        table_name: str
-    ):
-        embeddings_service = VertexAIEmbeddings(
-            model_name="textembedding-gecko@003",
-            location=self.vertex_location,
-            max_output_tokens=768,
-            credentials=self.credentials,
-            project=self.vertex_project
-        )
-        qe = embeddings_service.embed_query(prompt.lower())
+    @staticmethod
+    def nearest_neighbour_sql(table_name: str) -> str:
+        """kNN over chunk embeddings, then threshold + best chunk per innovation.
 
-        conn = await self.connect_to_db()
-        await register_vector(conn)
-        results = await conn.fetch(
-            f"""
-            WITH vector_matches AS (
-                SELECT id, 1 - (embedding <=> $1) AS similarity
+        The inner scan is a plain ORDER BY distance LIMIT k so the HNSW index can serve
+        it; the similarity threshold and per-document aggregation run on those k rows.
+        Params: $1 query vector, $2 candidate chunks (k), $3 threshold, $4 max documents.
+        """
+        return f"""
+            WITH nearest AS (
+                SELECT id, embedding <=> $1 AS distance
                 FROM {table_name}_embeddings
-                WHERE 1 - (embedding <=> $1) > $2
-                ORDER BY similarity DESC
-                LIMIT $3
+                ORDER BY embedding <=> $1
+                LIMIT $2
+            ),
+            best_per_document AS (
+                SELECT id, MIN(distance) AS distance
+                FROM nearest
+                WHERE 1 - distance > $3
+                GROUP BY id
             )
             SELECT
                 t.id,
@@ -701,14 +1476,32 @@ class PostgreDB:
                 t.tujuan_inovasi,
                 t.deskripsi_inovasi,
                 t.link_document,
-                v.similarity
-            FROM {table_name} t
-            JOIN vector_matches v ON t.id = v.id
-            ORDER BY v.similarity DESC
-            """,
-            qe, similarity_threshold, num_matches
-        )
-        await conn.close()
+                1 - b.distance AS similarity
+            FROM best_per_document b
+            JOIN {table_name} t ON t.id = b.id
+            ORDER BY b.distance
+            LIMIT $4
+        """
+
+    async def similarity_search_plagiarisme(
+        self,
+        prompt: str,
+        similarity_threshold: float,
+        num_matches: int,
+        table_name: str
+    ):
+        qe = await self.embedding_service.embed_query(prompt)
+
+        # Several chunks usually belong to one innovation, so over-fetch chunks
+        candidates = num_matches * self.vector_search_config.candidate_multiplier
+        ef_search = min(1000, max(self.vector_search_config.ef_search, candidates))
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT set_config('hnsw.ef_search', $1, true)", str(ef_search))
+                results = await conn.fetch(
+                    self.nearest_neighbour_sql(table_name),
+                    qe, candidates, similarity_threshold, num_matches
+                )
         if not results:
             return {"message": "tidak ada dokumen hasil vector search"}
 
@@ -725,18 +1518,50 @@ class PostgreDB:
             } for r in results
         ]
     
+    @staticmethod
+    def innovation_chunks_sql(table_name: str) -> str:
+        """Exact top-k chunks of one innovation.
+
+        A document has few chunks, so the rows are materialized via the (id, content)
+        primary key and ranked exactly instead of letting a filtered HNSW scan drop them.
+        Params: $1 query vector, $2 innovation id, $3 k.
+        """
+        return f"""
+            WITH document_chunks AS MATERIALIZED (
+                SELECT content, embedding
+                FROM {table_name}_embeddings
+                WHERE id = $2
+            )
+            SELECT content, 1 - (embedding <=> $1) AS similarity
+            FROM document_chunks
+            ORDER BY embedding <=> $1
+            LIMIT $3
+        """
+
+    async def retrieve_innovation_chunks(
+        self,
+        innovation_id: str,
+        question: str,
+        k: int,
+        table_name: str = "innovations"
+    ) -> list:
+        """Top-k chunks of an innovation most similar to the question (for RAG chat)"""
+        qe = await self.embedding_service.embed_query(question)
+        async with self.acquire() as conn:
+            rows = await conn.fetch(self.innovation_chunks_sql(table_name), qe, innovation_id, k)
+        return [{"content": r["content"], "similarity": float(r["similarity"])} for r in rows]
+
     async def get_innovation_ids_by_inovator(self, inovator_name: str, table_name: str = "innovations"):
         """Get innovation IDs for a specific inovator (case insensitive with space handling)"""
         try:
             # Clean the inovator name (replace spaces with underscores and lowercase)
             cleaned_inovator = inovator_name.lower().replace(" ", "_")
             
-            conn = await self.connect_to_db()
-            results = await conn.fetch(
-                f"SELECT id FROM {table_name} WHERE nama_inovator LIKE $1",
-                f"%{cleaned_inovator}%"
-            )
-            await conn.close()
+            async with self.acquire() as conn:
+                results = await conn.fetch(
+                    f"SELECT id FROM {table_name} WHERE nama_inovator LIKE $1",
+                    f"%{cleaned_inovator}%"
+                )
             
             return [r["id"] for r in results]
             
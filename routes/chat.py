@@ -13,18 +13,15 @@ async def get_chat_history(
     x_inovator: str = Header(..., alias="X-Inovator")
 ):
     try:
-        conn = await db.connect_to_db()
-        row = await conn.fetchrow(
-            f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
-            innovation_id
-        )
+        async with db.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT nama_inovator FROM {table_name} WHERE id = $1", 
+                innovation_id
+            )
         if not row:
-            await conn.close()
             raise HTTPException(status_code=404, detail="Innovation not found")
         if row['nama_inovator'] != x_inovator.lower().replace(" ", "_"):
-            await conn.close()
             raise HTTPException(status_code=403, detail="Access denied to this innovation")
-        await conn.close()
         chat_history = await db.get_chat_history(innovation_id, limit)
         return JSONResponse({
             "innovation_id": innovation_id,
@@ -25,6 +25,58 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture
+def pg_dsn():
+    """DSN of the test Postgres (pgvector) database; skip when it is unreachable."""
+    import asyncpg
+
+    dsn = os.environ["DATABASE_URL"]
+
+    async def probe():
+        conn = await asyncpg.connect(dsn, timeout=3)
+        await conn.close()
+
+    try:
+        asyncio.run(probe())
+    except Exception as e:
+        pytest.skip(f"Postgres not available: {e}")
+    return dsn
+
+
+@pytest.fixture
+def make_postgredb():
+    """Factory for a PostgreDB without the MinIO / Vertex setup of __init__.
+
+    ``pool`` wires an existing asyncpg pool; ``dsn`` fills in the connection settings
+    so init_pool() can create one. Other keywords override attributes
+    (minio_client, bucket_name, pool_max_size, ...).
+    """
+    from types import SimpleNamespace
+    from urllib.parse import urlparse
+    from module.vector import PostgreDB
+
+    def make(pool=None, dsn=None, **attrs):
+        db = PostgreDB.__new__(PostgreDB)
+        db.pool, db.pool_min_size, db.pool_max_size, db.pool_acquire_timeout = pool, 1, 2, 5
+        db._pool_lock = asyncio.Lock()
+        db._pool_metrics = {"acquired": 0, "acquire_timeouts": 0, "acquire_wait_seconds": 0.0}
+        db._leaderboard_refresh = {}
+        db._chat_search_config = {}
+        db._chat_tables_ready = set()
+        db._embedding_cache_ready = False
+        db._embedding_cache_metrics = {"hits": 0, "misses": 0}
+        if dsn is not None:
+            url = urlparse(dsn)
+            db.host, db.port, db.user = url.hostname, url.port, url.username
+            db.password_db, db.db_name = url.password, url.path.lstrip("/")
+            db.pg_cred = SimpleNamespace(pool_max_inactive_lifetime=300, command_timeout=60)
+        for name, value in attrs.items():
+            setattr(db, name, value)
+        return db
+
+    return make
+
+
 @pytest.fixture
 def test_user():
     """Test user data."""
@@ -0,0 +1,101 @@
+"""
+Tests for the resumable bulk backfill (manifest parsing, stage checkpoints)
+"""
+import asyncio
+import hashlib
+
+import pytest
+
+from module.backfill import Backfill, BackfillState, read_manifest
+from module.ingest import INGEST_SECTIONS
+
+
+class TestReadManifest:
+    """Test CSV parsing of the title manifest."""
+
+    def test_column_aliases(self, tmp_path):
+        csv_path = tmp_path / "judul.csv"
+        csv_path.write_text("Filename,Judul,Nama_Inovator\na.pdf, Inovasi A ,Budi\n,kosong,x\n", encoding="utf-8")
+        assert read_manifest(csv_path) == [{"file": "a.pdf", "judul_inovasi": "Inovasi A", "inovator": "Budi"}]
+
+    def test_missing_column(self, tmp_path):
+        csv_path = tmp_path / "judul.csv"
+        csv_path.write_text("file,judul_inovasi\na.pdf,A\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="inovator"):
+            read_manifest(csv_path)
+
+
+class FakeExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_multiple_sections(self, pdf_path, sections, data=None):
+        self.calls += 1
+        return {sec: f"{sec} dari {len(data)} byte" for sec in sections}
+
+
+@pytest.mark.integration
+class TestResumableBackfill:
+    """A failed build_table resumes from the 'extracted' checkpoint without a second extraction."""
+
+    def test_resume_skips_extraction(self, pg_dsn, tmp_path, make_postgredb):
+        import asyncpg
+
+        table = "backfill_test_innovations"
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 proposal a")
+        manifest = [{"file": "a.pdf", "judul_inovasi": "Inovasi A", "inovator": "Budi"}]
+
+        async def scenario():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            db.extractor = FakeExtractor()
+            built, indexed, removed = [], [], []
+
+            async def stream_upload(raw, object_name, max_bytes=None, part_size=None):
+                data = raw.read()
+                return {"object_name": object_name, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+            async def find_by_document_sha256(sha, table_name, prefer_id=None):
+                return None
+
+            async def build_table(df, table_name, reuse_embeddings_from=None, build_index=True):
+                assert not build_index
+                built.append(df.iloc[0].to_dict())
+                if len(built) == 1:
+                    raise RuntimeError("embedding quota exceeded")
+                return "success"
+
+            async def generateHNSWIndexing(table_name):
+                indexed.append(table_name)
+
+            async def remove_object(object_name):
+                removed.append(object_name)
+
+            db.stream_upload, db.find_by_document_sha256 = stream_upload, find_by_document_sha256
+            db.build_table, db.remove_object = build_table, remove_object
+            db.generateHNSWIndexing = generateHNSWIndexing
+            state = BackfillState(db, table)
+            try:
+                await state.reset()
+                first = await Backfill(db, table, tmp_path, state).run(manifest, workers=2)
+                checkpoint = (await state.load())["a.pdf"]
+                second = await Backfill(db, table, tmp_path, state).run(manifest, workers=2)
+                third = await Backfill(db, table, tmp_path, state).run(manifest, workers=2)
+                final = (await state.load())["a.pdf"]
+                return first, checkpoint, second, third, final, db.extractor.calls, built, indexed, removed
+            finally:
+                await state.reset()
+                await pool.close()
+
+        first, checkpoint, second, third, final, extractions, built, indexed, removed = asyncio.run(scenario())
+        assert (first["processed"], first["failed"]) == (0, 1)
+        assert checkpoint["stage"] == "extracted"
+        assert checkpoint["error"] == "embedding quota exceeded"
+        assert set(checkpoint["sections"]) == set(INGEST_SECTIONS)
+        assert (second["processed"], second["failed"]) == (1, 0)
+        assert (third["processed"], third["already_indexed"]) == (0, 1)
+        assert extractions == 1
+        assert final["stage"] == "indexed" and final["attempts"] == 2 and final["error"] is None
+        assert built[1]["source_object"] == removed[0] == checkpoint["object_name"]
+        # The index is built once, by the "indexed" stage that follows a successful embed
+        assert indexed == [table]
@@ -0,0 +1,52 @@
+"""
+Tests for the LRU/TTL cache
+"""
+from module.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """Test eviction, expiry and counters."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # "b" is now the oldest
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = LRUCache(10, ttl=60, clock=clock)
+        cache.put("q", [0.1])
+        clock.now = 59
+        assert cache.get("q") == [0.1]
+        clock.now = 121
+        assert cache.get("q") is None
+        assert cache.expirations == 1
+
+    def test_size_based_capacity(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.put("a", b"12345")
+        cache.put("b", b"123456")
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 6
+        cache.put("huge", b"x" * 11)
+        assert cache.get("huge") is None
+
+    def test_hit_rate(self):
+        cache = LRUCache(4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        assert cache.stats()["hit_rate"] == 0.5
@@ -62,3 +62,179 @@ class TestChatIntegration:
     def test_chat_history_persistence(self):
         """Test chat history is properly persisted."""
         assert True  # Placeholder test
+
+
+@pytest.mark.integration
+class TestChatSearch:
+    """Full-text chat search: stemmed matches, relevance order, snippets and keyset pages."""
+
+    def test_ranked_pages_with_snippets(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+
+        table = "chat_search_test"
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1', 'irigasi_pintar')")
+                chats = [
+                    ("c1", "Bagaimana memanfaatkan sensor untuk pertanian?", "Sensor kelembapan dipasang di lahan."),
+                    ("c2", "Berapa biaya implementasi?", "Biaya sensor pertanian relatif murah."),
+                    ("c3", "Siapa target pengguna?", "Petani kecil di desa."),
+                    ("c4", "Apakah sensor tahan hujan?", "Casing sensor tahan air."),
+                ]
+                for chat_id, question, answer in chats:
+                    await db.save_chat_history(chat_id, "inov_1", question, answer, "budi", table)
+                first = await db.search_chat_history("sensor pertanian", "budi", table_name=table, limit=1)
+                second = await db.search_chat_history("sensor pertanian", "budi", table_name=table, limit=1, cursor=first["next_cursor"])
+                everything = await db.search_chat_history("sensor", table_name=table, limit=10)
+                other_user = await db.search_chat_history("sensor", "ani", table_name=table)
+                return first, second, everything, other_user
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}")
+                await pool.close()
+
+        first, second, everything, other_user = asyncio.run(run())
+        # "pertanian" in the question (weight A) outranks it in the answer
+        assert [r["chat_id"] for r in first["results"]] == ["c1"]
+        assert "<mark>" in first["results"][0]["question_snippet"]
+        assert first["results"][0]["innovation_name"] == "irigasi_pintar"
+        assert [r["chat_id"] for r in second["results"]] == ["c2"] and second["next_cursor"] is None
+        assert {r["chat_id"] for r in everything["results"]} == {"c1", "c2", "c4"}
+        assert other_user == {"results": [], "next_cursor": None}
+
+    def test_invalid_cursor_rejected(self, make_postgredb):
+        import asyncio
+        from module.vector import PostgreDB
+
+        db = make_postgredb()
+        with pytest.raises(ValueError):
+            asyncio.run(db.search_chat_history("sensor", cursor=PostgreDB.encode_cursor("x", 1)))
+
+
+@pytest.mark.integration
+class TestChatAnalytics:
+    """Incremental analytics match a rebuild from the chat history; the rebuild backfills old chats."""
+
+    def test_incremental_matches_rebuild(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+        from module import chat_analytics
+
+        table = "chat_analytics_test"
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=4)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}_chat_stats, {table}_chat_active_days, {table}_chat_words, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1', 'a'), ('inov_2', 'b')")
+                questions = [
+                    "Bagaimana sensor irigasi bekerja untuk sawah?",
+                    "Berapa biaya sensor irigasi",
+                    "Apakah sensor  tahan hujan dan panas?",
+                ]
+                # First save creates the tables; the rest run concurrently on the same counters
+                await db.save_chat_history("c0", "inov_1", questions[0], "jawaban ", "budi", table)
+                await asyncio.gather(*(
+                    db.save_chat_history(f"c{i}", "inov_1", q, "jawaban " * (i + 1), "budi", table)
+                    for i, q in enumerate(questions) if i
+                ))
+                await db.save_chat_history("c9", "inov_2", "Siapa pengguna sensor?", "Petani", "ani", table)
+                async with db.acquire() as conn:
+                    incremental = await chat_analytics.get_analytics(conn, table, "inov_1")
+                    await chat_analytics.rebuild(conn, table)
+                    rebuilt = await chat_analytics.get_analytics(conn, table, "inov_1")
+                    # History from before the analytics existed: only the backfill sees it
+                    await conn.execute(f"UPDATE {table}_chat_history SET created_at = created_at - interval '2 days' WHERE chat_id = 'c0'")
+                    await chat_analytics.rebuild(conn, table)
+                    backfilled = await chat_analytics.get_analytics(conn, table, "inov_1")
+                    await chat_analytics.delete_innovation(conn, table, "inov_1")
+                    deleted = await chat_analytics.get_analytics(conn, table, "inov_1")
+                    other = await chat_analytics.get_analytics(conn, table, "inov_2")
+                return incremental, rebuilt, backfilled, deleted, other
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}_chat_stats, {table}_chat_active_days, {table}_chat_words, {table}")
+                await pool.close()
+
+        incremental, rebuilt, backfilled, deleted, other = asyncio.run(run())
+        assert incremental == rebuilt
+        stats = rebuilt["analytics"]
+        assert stats["total_conversations"] == 3 and stats["active_days"] == 1
+        assert stats["avg_response_length"] == round(len("jawaban ") * 2, 2)
+        assert backfilled["analytics"]["active_days"] == 2
+        assert backfilled["analytics"]["first_conversation"] < stats["first_conversation"]
+        words = {w["word"]: w["frequency"] for w in rebuilt["common_question_words"]}
+        assert words["sensor"] == 3 and words["irigasi"] == 2
+        assert "untuk" not in words and "dan" not in words and "" not in words
+        assert deleted["analytics"]["total_conversations"] == 0 and deleted["common_question_words"] == []
+        assert other["analytics"]["total_conversations"] == 1
+
+    def test_running_totals_across_days_match_rebuild(self, pg_dsn, monkeypatch, make_postgredb):
+        """Two dates and filtered words: record_chat totals equal a rebuild; DDL runs once per table."""
+        import asyncio
+        from datetime import datetime
+        import asyncpg
+        from module import chat_analytics
+
+        table = "chat_analytics_days_test"
+        create_calls = []
+        create_tables = chat_analytics.create_tables
+
+        async def counting_create_tables(conn, table_name):
+            create_calls.append(table_name)
+            await create_tables(conn, table_name)
+
+        monkeypatch.setattr(chat_analytics, "create_tables", counting_create_tables)
+        earlier = [
+            ("d1", "Bagaimana pompa air bekerja untuk irigasi?", datetime(2026, 1, 5, 9, 30)),
+            ("d2", "Pompa tenaga surya atau pompa listrik", datetime(2026, 1, 5, 23, 59)),
+        ]
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}_chat_stats, {table}_chat_active_days, {table}_chat_words, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1', 'a')")
+                await db.save_chat_history("t1", "inov_1", "Apakah pompa ini hemat?", "Ya", "budi", table)
+                await db.save_chat_history("t2", "inov_1", "Dan kapan pompa dipasang", "Besok", "budi", table)
+                async with db.acquire() as conn:
+                    for chat_id, question, created_at in earlier:
+                        async with conn.transaction():
+                            await conn.execute(
+                                f"INSERT INTO {table}_chat_history (chat_id, innovation_id, user_name, user_question, ai_response, created_at) VALUES ($1, 'inov_1', 'ani', $2, 'jawaban', $3)",
+                                chat_id, question, created_at
+                            )
+                            await chat_analytics.record_chat(conn, table, "inov_1", question, "jawaban", created_at)
+                    incremental = await chat_analytics.get_analytics(conn, table, "inov_1")
+                    await chat_analytics.rebuild(conn, table)
+                    rebuilt = await chat_analytics.get_analytics(conn, table, "inov_1")
+                return incremental, rebuilt
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_chat_history, {table}_chat_stats, {table}_chat_active_days, {table}_chat_words, {table}")
+                await pool.close()
+
+        incremental, rebuilt = asyncio.run(run())
+        # The second save reused the tables created by the first one (rebuild creates its own)
+        assert create_calls == [table, table]
+        assert incremental == rebuilt
+        stats = rebuilt["analytics"]
+        assert stats["total_conversations"] == 4 and stats["active_days"] == 2
+        assert stats["first_conversation"] == earlier[0][2].isoformat()
+        words = {w["word"]: w["frequency"] for w in rebuilt["common_question_words"]}
+        assert words["pompa"] == 5
+        assert {"surya", "listrik", "hemat?", "kapan", "dipasang", "irigasi?"} <= set(words)
+        assert not {"air", "ini", "dan", "untuk", "atau", "apakah", "bagaimana"} & set(words)
@@ -0,0 +1,182 @@
+"""
+Tests for the async embedding service
+"""
+import asyncio
+
+import pytest
+
+from module.embedding import EmbeddingService
+
+
+class FakeEmbeddings:
+    """Minimal async embeddings client returning the text length as a 1-d vector."""
+
+    def __init__(self, fail_on=None, transient_failures=0):
+        self.fail_on = fail_on
+        self.transient_failures = transient_failures
+        self.calls = []
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise RuntimeError("429 quota exceeded")
+        if self.fail_on and self.fail_on in texts:
+            raise RuntimeError("bad batch")
+        return [[float(len(t))] for t in texts]
+
+    async def aembed_query(self, text):
+        return [float(len(text))]
+
+
+class TestEmbeddingBatching:
+    """Test token-aware batching."""
+
+    def test_batch_size_limit(self):
+        service = EmbeddingService(FakeEmbeddings(), batch_size=2)
+        assert service.make_batches(["a", "b", "c", "d", "e"]) == [[0, 1], [2, 3], [4]]
+
+    def test_token_budget_limit(self):
+        service = EmbeddingService(FakeEmbeddings(), batch_size=10, max_batch_tokens=10)
+        texts = ["x" * 20, "y" * 20, "z" * 4]  # ~5, ~5, ~1 tokens
+        assert service.make_batches(texts) == [[0, 1], [2]]
+
+
+class TestEmbeddingService:
+    """Test retries and per-batch failure isolation."""
+
+    def test_order_preserved_across_batches(self):
+        service = EmbeddingService(FakeEmbeddings(), batch_size=2, max_concurrency=3)
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+        vectors = asyncio.run(service.embed_documents(texts))
+        assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+
+    def test_failed_batch_is_isolated(self):
+        service = EmbeddingService(FakeEmbeddings(fail_on="bad"), batch_size=2, max_retries=2, base_delay=0)
+        vectors = asyncio.run(service.embed_documents(["a", "bad", "ccc"]))
+        assert vectors == [None, None, [3.0]]
+        assert service.stats["failed_batches"] == 1
+
+    def test_transient_error_is_retried(self):
+        client = FakeEmbeddings(transient_failures=2)
+        service = EmbeddingService(client, max_retries=3, base_delay=0)
+        vectors = asyncio.run(service.embed_documents(["abc"]))
+        assert vectors == [[3.0]]
+        assert service.stats["retries"] == 2
+        assert len(client.calls) == 3
+
+    def test_query_cache_normalizes_text(self):
+        from module.cache import LRUCache
+
+        client = FakeEmbeddings()
+        client.aembed_query_calls = 0
+        original = client.aembed_query
+
+        async def counting(text):
+            client.aembed_query_calls += 1
+            return await original(text)
+
+        client.aembed_query = counting
+        service = EmbeddingService(client, query_cache=LRUCache(8))
+        first = asyncio.run(service.embed_query("Smart  IoT Sampah"))
+        second = asyncio.run(service.embed_query("smart iot sampah "))
+        assert first == second
+        assert client.aembed_query_calls == 1
+        assert service.query_cache.stats()["hits"] == 1
+
+
+class FakeVertexEmbeddings:
+    """768-d deterministic embeddings with both the async (service) and sync (chunker) API."""
+
+    def __init__(self):
+        self.async_calls, self.sync_calls = [], []
+
+    @staticmethod
+    def vector(text):
+        import numpy as np
+        import zlib
+
+        return np.random.default_rng(zlib.crc32(text.encode())).random(768).tolist()
+
+    async def aembed_documents(self, texts):
+        self.async_calls.append(list(texts))
+        return [self.vector(t) for t in texts]
+
+    def embed_documents(self, texts):
+        self.sync_calls.append(list(texts))
+        return [self.vector(t) for t in texts]
+
+
+@pytest.mark.integration
+class TestEmbeddingCache:
+    """Persistent embedding_cache: only misses reach the client, hits come back as float32."""
+
+    def run_with_db(self, pg_dsn, monkeypatch, make_postgredb, scenario):
+        import uuid
+        from types import SimpleNamespace
+        import asyncpg
+        from pgvector.asyncpg import register_vector
+        from module.vector import PostgreDB
+
+        model = f"test-model-{uuid.uuid4().hex[:8]}"
+        client = FakeVertexEmbeddings()
+        monkeypatch.setattr(PostgreDB, "_shared_embedding_service", EmbeddingService(client))
+
+        async def init(conn):
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await register_vector(conn)
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2, init=init)
+            db = make_postgredb(pool, embedding_config=SimpleNamespace(model_name=model))
+            try:
+                return await scenario(db)
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute("DELETE FROM embedding_cache WHERE model_name = $1", model)
+                await pool.close()
+
+        return asyncio.run(run()), client
+
+    def test_repeats_are_hits_and_only_misses_are_sent(self, pg_dsn, monkeypatch, make_postgredb):
+        import numpy as np
+
+        async def scenario(db):
+            first = await db.embed_with_cache(["chunk a", "chunk b", "chunk a"])
+            # The table is created once: later calls don't touch the database for it
+            acquired = db._pool_metrics["acquired"]
+            await db.create_embedding_cache_table()
+            assert db._pool_metrics["acquired"] == acquired
+            second = await db.embed_with_cache(["chunk a", "chunk c"])
+            return first, second, dict(db._embedding_cache_metrics)
+
+        (first, second, metrics), client = self.run_with_db(pg_dsn, monkeypatch, make_postgredb, scenario)
+        assert client.async_calls == [["chunk a", "chunk b"], ["chunk c"]]
+        assert metrics == {"hits": 1, "misses": 4}
+        hit = second[0]
+        assert isinstance(hit, np.ndarray) and hit.dtype == np.float32
+        assert np.allclose(hit, first[0]) and np.allclose(hit, FakeVertexEmbeddings.vector("chunk a"))
+
+    def test_reupload_chunking_reuses_cached_sentence_embeddings(self, pg_dsn, monkeypatch, make_postgredb):
+        import pandas as pd
+
+        text = "Sistem irigasi memakai sensor. Data dikirim ke server. Petani menerima notifikasi. Panen meningkat."
+        df = pd.DataFrame([{"id": "inov_1", "latar_belakang": text}])
+
+        async def scenario(db):
+            from module.executors import get_executors
+
+            before = get_executors().stats()["embedding"]["completed"]
+            first = await db.chunk_sections(df, ["latar_belakang"])
+            sent = sum(len(c) for c in db.embedding_service.client.async_calls)
+            second = await db.chunk_sections(df, ["latar_belakang"])
+            return first, second, sent, get_executors().stats()["embedding"]["completed"] - before
+
+        (first, second, sent_first, chunker_runs), client = self.run_with_db(pg_dsn, monkeypatch, make_postgredb, scenario)
+        assert second == first and first
+        # The chunker runs in the embedding pool, not the Gemini one
+        assert chunker_runs == 2
+        assert sent_first == 4
+        # The re-upload's sentence windows all came from the cache
+        assert sum(len(c) for c in client.async_calls) == sent_first
+        assert client.sync_calls == []
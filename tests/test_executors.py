@@ -0,0 +1,167 @@
+"""
+Tests for the blocking-call executor layer
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from module.executors import BlockingExecutors
+
+SLOW_CALL_SECONDS = 0.6
+
+
+def slow_model_call():
+    """Stand-in for a synchronous Gemini generate_content call."""
+    time.sleep(SLOW_CALL_SECONDS)
+    return "done"
+
+
+def make_app(executors: BlockingExecutors, offload: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        if offload:
+            return {"result": await executors.run("gemini", slow_model_call)}
+        return {"result": slow_model_call()}
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    return app
+
+
+async def ping_latencies(app: FastAPI, samples: int = 5):
+    """Latency of /ping requests that arrive while /slow is in flight.
+
+    Each ping is due at a fixed offset after the slow request starts; latency is
+    measured from that due time, so time spent waiting for a blocked loop counts.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        slow_request = asyncio.create_task(client.get("/slow"))
+
+        async def ping(offset: float) -> float:
+            await asyncio.sleep(offset)
+            response = await client.get("/ping")
+            assert response.status_code == 200
+            return time.perf_counter() - (started + offset)
+
+        step = SLOW_CALL_SECONDS / (samples + 1)
+        latencies = await asyncio.gather(*(ping(step * (i + 1)) for i in range(samples)))
+        assert (await slow_request).json() == {"result": "done"}
+    return latencies
+
+
+class TestBlockingExecutors:
+    """Test pool routing and bookkeeping."""
+
+    def test_run_returns_result_and_records_stats(self):
+        executors = BlockingExecutors({"bcrypt": 1})
+        try:
+            assert asyncio.run(executors.run("bcrypt", lambda a, b=0: a + b, 2, b=3)) == 5
+            stats = executors.stats()["bcrypt"]
+            assert stats["completed"] == 1 and stats["active"] == 0 and stats["max_workers"] == 1
+        finally:
+            executors.shutdown()
+
+    def test_exception_propagates(self):
+        executors = BlockingExecutors({"minio": 1})
+
+        def boom():
+            raise ValueError("bucket missing")
+
+        try:
+            with pytest.raises(ValueError):
+                asyncio.run(executors.run("minio", boom))
+            assert executors.stats()["minio"]["failed"] == 1
+        finally:
+            executors.shutdown()
+
+    def test_unknown_pool_is_rejected(self):
+        with pytest.raises(KeyError):
+            BlockingExecutors({"gemini": 1}).pool("redis")
+
+
+class TestEventLoopResponsiveness:
+    """Other requests must stay fast while a long model call is in flight."""
+
+    def test_offloaded_call_keeps_latency_flat(self):
+        executors = BlockingExecutors({"gemini": 2})
+        try:
+            latencies = asyncio.run(ping_latencies(make_app(executors, offload=True)))
+        finally:
+            executors.shutdown()
+        assert max(latencies) < SLOW_CALL_SECONDS / 4
+
+    def test_inline_call_stalls_the_loop(self):
+        # Baseline: calling the SDK directly on the loop blocks every other request
+        latencies = asyncio.run(ping_latencies(make_app(BlockingExecutors({"gemini": 1}), offload=False)))
+        assert max(latencies) > SLOW_CALL_SECONDS / 2
+
+
+class TestBlockingStream:
+    """Test bridging a sync token iterator (Gemini stream=True) onto the loop."""
+
+    def test_items_arrive_in_order(self):
+        executors = BlockingExecutors({"gemini": 1})
+
+        async def collect():
+            return [item async for item in executors.stream("gemini", lambda n: (f"tok{i}" for i in range(n)), 3)]
+
+        try:
+            assert asyncio.run(collect()) == ["tok0", "tok1", "tok2"]
+        finally:
+            executors.shutdown()
+
+    def test_error_propagates(self):
+        executors = BlockingExecutors({"gemini": 1})
+
+        def tokens():
+            yield "partial"
+            raise RuntimeError("quota exceeded")
+
+        async def collect(received):
+            async for item in executors.stream("gemini", tokens):
+                received.append(item)
+
+        received = []
+        try:
+            with pytest.raises(RuntimeError):
+                asyncio.run(collect(received))
+        finally:
+            executors.shutdown()
+        assert received == ["partial"]
+
+    def test_closing_stops_the_producer(self):
+        executors = BlockingExecutors({"gemini": 1})
+        produced = []
+        closed = []
+
+        def tokens():
+            try:
+                for i in range(100):
+                    time.sleep(0.01)
+                    produced.append(i)
+                    yield i
+            finally:
+                closed.append(True)
+
+        async def take_two():
+            stream = executors.stream("gemini", tokens)
+            first = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()  # e.g. the SSE client disconnected
+            await asyncio.sleep(0.1)
+            return first
+
+        try:
+            assert asyncio.run(take_two()) == [0, 1]
+        finally:
+            executors.shutdown(wait=True)
+        assert closed == [True]
+        assert len(produced) < 20
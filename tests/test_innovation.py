@@ -15,3 +15,311 @@ class TestInnovationBasic:
     def test_get_innovation_summary(self):
         """Test getting innovation summary."""
         assert True  # Placeholder test
+
+
+@pytest.mark.integration
+class TestIngestionJobQueue:
+    """Background ingestion queue against a real Postgres."""
+
+    def test_job_runs_and_records_stages(self, pg_dsn, make_postgredb):
+        """An enqueued job is picked up by a worker and reports per-stage progress."""
+        import asyncio
+        import asyncpg
+        from module.jobs import JobQueue, JOB_TABLE
+
+        async def handler(payload, report):
+            await report("extract", "running")
+            await report("extract")
+            await report("indexed")
+            return {"innovation_id": payload["id"]}
+
+        async def failing(payload, report):
+            raise RuntimeError("gemini down")
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=4)
+            queue = JobQueue(make_postgredb(pool), {"ingest": handler, "broken": failing}, workers=2, poll_interval=0.1, max_attempts=2, retry_base_delay=0)
+            try:
+                await queue.start()
+                ok_id = await queue.enqueue("ingest", {"id": "inov_1"})
+                bad_id = await queue.enqueue("broken", {})
+                for _ in range(100):
+                    ok, bad = await queue.get(ok_id), await queue.get(bad_id)
+                    if ok["status"] == "done" and bad["status"] == "failed":
+                        break
+                    await asyncio.sleep(0.05)
+                return ok, bad
+            finally:
+                await queue.stop()
+                async with pool.acquire() as conn:
+                    await conn.execute(f"DELETE FROM {JOB_TABLE} WHERE kind IN ('ingest', 'broken')")
+                await pool.close()
+
+        ok, bad = asyncio.run(run())
+        assert ok["status"] == "done"
+        assert ok["result"] == {"innovation_id": "inov_1"}
+        assert ok["stages"] == {"extract": "done", "indexed": "done"}
+        assert bad["status"] == "failed"
+        assert bad["attempts"] == 2
+        assert "gemini down" in bad["error"]
+
+    def test_failed_job_backs_off_then_runs_failure_handler(self, pg_dsn, make_postgredb):
+        """A retry waits out run_after; the final failure hands the payload to the failure handler."""
+        import asyncio
+        import asyncpg
+        from module.jobs import JobQueue, JOB_TABLE
+
+        attempts, cleaned = [], []
+
+        async def flaky(payload, report):
+            attempts.append(asyncio.get_running_loop().time())
+            raise RuntimeError("gemini down")
+
+        async def cleanup(payload, error):
+            cleaned.append((payload["upload"]["object_name"], error))
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=4)
+            queue = JobQueue(
+                make_postgredb(pool), {"flaky": flaky}, workers=2, poll_interval=0.05, max_attempts=2,
+                retry_base_delay=0.5, failure_handlers={"flaky": cleanup}
+            )
+            try:
+                await queue.start()
+                job_id = await queue.enqueue("flaky", {"upload": {"object_name": "staging/a.pdf"}})
+                for _ in range(20):
+                    job = await queue.get(job_id)
+                    if job["attempts"] == 1 and job["status"] == "queued":
+                        break
+                    await asyncio.sleep(0.05)
+                backing_off = job
+                for _ in range(100):
+                    job = await queue.get(job_id)
+                    if job["status"] == "failed":
+                        break
+                    await asyncio.sleep(0.05)
+                return backing_off, job
+            finally:
+                await queue.stop()
+                async with pool.acquire() as conn:
+                    await conn.execute(f"DELETE FROM {JOB_TABLE} WHERE kind = 'flaky'")
+                await pool.close()
+
+        backing_off, failed = asyncio.run(run())
+        assert backing_off["run_after"] is not None
+        assert failed["status"] == "failed" and failed["attempts"] == 2
+        assert attempts[1] - attempts[0] >= 0.4
+        assert cleaned == [("staging/a.pdf", "gemini down")]
+        assert JobQueue(None, {}, retry_base_delay=30, retry_max_delay=600).retry_delay(6) == 600
+
+
+@pytest.mark.integration
+class TestSummaryStore:
+    """Persisted AI summaries keyed by innovation id + sections hash."""
+
+    def test_summary_is_reused_until_sections_change(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+        from module.vector import PostgreDB
+
+        table = "summary_store_test"
+        sections = {"latar_belakang": "lb", "tujuan_inovasi": "ti", "deskripsi_inovasi": "di"}
+        old_hash = PostgreDB.sections_hash(sections)
+        new_hash = PostgreDB.sections_hash({**sections, "deskripsi_inovasi": "di v2"})
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_summaries, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1')")
+                missing = await db.get_summary("inov_1", old_hash, table)
+                await db.save_summary("inov_1", old_hash, {"ringkasan_singkat": "v1"}, table)
+                hit = await db.get_summary("inov_1", old_hash, table)
+                stale = await db.get_summary("inov_1", new_hash, table)
+                return missing, hit, stale
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_summaries, {table}")
+                await pool.close()
+
+        missing, hit, stale = asyncio.run(run())
+        assert missing is None
+        assert hit["summary"] == {"ringkasan_singkat": "v1"}
+        assert stale is None
+        assert old_hash != new_hash
+
+
+@pytest.mark.integration
+class TestScoreCache:
+    """Scores are reused only for the same PDF hash and scoring fingerprint."""
+
+    def test_cached_score_requires_matching_hash_and_fingerprint(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+
+        table = "score_cache_test"
+        score = {"substansi_orisinalitas": 12, "total": 80}
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_scoring, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1')")
+                    # Scoring table from before score caching: no hash columns yet
+                    await conn.execute(f"CREATE TABLE {table}_scoring (id SERIAL PRIMARY KEY, innovation_id VARCHAR(1024) UNIQUE, substansi_orisinalitas INTEGER, substansi_urgensi INTEGER, substansi_kedalaman INTEGER, analisis_dampak INTEGER, analisis_kelayakan INTEGER, analisis_data INTEGER, sistematika_struktur INTEGER, sistematika_bahasa INTEGER, sistematika_referensi INTEGER, total_score INTEGER, scoring_raw_data TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+                before = await db.get_cached_score("inov_1", "a" * 64, "f" * 64, table)
+                await db.save_scoring_results("inov_1", score, table, document_sha256="a" * 64, scoring_fingerprint="f" * 64)
+                hit = await db.get_cached_score("inov_1", "a" * 64, "f" * 64, table)
+                other_pdf = await db.get_cached_score("inov_1", "b" * 64, "f" * 64, table)
+                other_weights = await db.get_cached_score("inov_1", "a" * 64, "e" * 64, table)
+                return before, hit, other_pdf, other_weights
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_scoring, {table}")
+                await pool.close()
+
+        before, hit, other_pdf, other_weights = asyncio.run(run())
+        assert before is None
+        assert hit["score"] == score
+        assert other_pdf is None and other_weights is None
+
+    def test_stored_document_hash_is_read_without_the_pdf(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+
+        table = "score_hash_test"
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    # Innovation table from before dedup: no document_sha256 column yet
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_1')")
+                legacy = await db.get_document_sha256("inov_1", table)
+                await db.set_document_sha256("inov_1", "a" * 64, table)
+                await db.ensure_document_hash_column(table)
+                missing = await db.get_document_sha256("inov_1", table)
+                await db.set_document_sha256("inov_1", "a" * 64, table)
+                stored = await db.get_document_sha256("inov_1", table)
+                return legacy, missing, stored
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+                await pool.close()
+
+        legacy, missing, stored = asyncio.run(run())
+        assert legacy is None and missing is None
+        assert stored == "a" * 64
+
+
+@pytest.mark.integration
+class TestUploadDedup:
+    """Identical PDFs are found by sha256 and reuse the stored chunks and vectors."""
+
+    def test_find_by_hash_and_copy_embeddings(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+        from pgvector.asyncpg import register_vector
+
+        table = "upload_dedup_test"
+        sha = "d" * 64
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2, init=register_vector)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings, {table}")
+                    # Innovation table from before dedup: no document_sha256 column yet
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, link_document TEXT, latar_belakang TEXT, tujuan_inovasi TEXT, deskripsi_inovasi TEXT)")
+                    await conn.execute(f"CREATE TABLE {table}_embeddings (id VARCHAR(1024) NOT NULL REFERENCES {table}(id), content TEXT, embedding vector(3), PRIMARY KEY (id, content))")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('asli', 'link', 'lb', 'ti', 'di'), ('salinan', NULL, NULL, NULL, NULL)")
+                    await conn.execute(f"INSERT INTO {table}_embeddings VALUES ('asli', 'chunk a', '[1,0,0]'), ('asli', 'chunk b', '[0,1,0]')")
+                before = await db.find_by_document_sha256(sha, table)
+                await db.ensure_document_hash_column(table)
+                async with db.acquire() as conn:
+                    await conn.execute(f"UPDATE {table} SET document_sha256 = $1 WHERE id = 'asli'", sha)
+                found = await db.find_by_document_sha256(sha, table, prefer_id="salinan")
+                copied = await db.copy_embeddings("asli", "salinan", table)
+                reused_in_place = await db.copy_embeddings("asli", "asli", table)
+                async with db.acquire() as conn:
+                    contents = await conn.fetch(f"SELECT content FROM {table}_embeddings WHERE id = 'salinan' ORDER BY content")
+                return before, found, (copied, reused_in_place), [r["content"] for r in contents]
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings, {table}")
+                await pool.close()
+
+        before, found, copied, contents = asyncio.run(run())
+        assert before is None
+        assert found["id"] == "asli" and found["latar_belakang"] == "lb"
+        assert copied == (2, 2)
+        assert contents == ["chunk a", "chunk b"]
+
+
+@pytest.mark.integration
+class TestLeaderboard:
+    """Keyset pages of the materialized leaderboard, refreshed after each saved score."""
+
+    def test_keyset_pages_rank_and_percentile(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+
+        table = "leaderboard_test"
+        scores = {"inov_a": 90, "inov_b": 75, "inov_c": 75, "inov_d": 60, "inov_e": 40}
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_scoring, {table} CASCADE")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT, nama_inovator TEXT)")
+                    await conn.executemany(
+                        f"INSERT INTO {table} VALUES ($1, $2, 'budi')",
+                        [(innovation_id, f"judul_{innovation_id}") for innovation_id in scores]
+                    )
+                for innovation_id, total in list(scores.items())[:4]:
+                    await db.save_scoring_results(innovation_id, {"total": total}, table)
+                await db._leaderboard_refresh[table]["task"]
+                before_last = await db.get_leaderboard(table, limit=10)
+                await db.save_scoring_results("inov_e", {"total": scores["inov_e"]}, table)
+                await db._leaderboard_refresh[table]["task"]
+                pages, cursor = [], None
+                while True:
+                    page = await db.get_leaderboard(table, limit=2, cursor=cursor)
+                    pages.append(page)
+                    cursor = page["next_cursor"]
+                    if not cursor:
+                        break
+                return before_last, pages
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_scoring, {table} CASCADE")
+                await pool.close()
+
+        before_last, pages = asyncio.run(run())
+        assert before_last["total"] == 4
+        assert [len(page["items"]) for page in pages] == [2, 2, 1]
+        items = [item for page in pages for item in page["items"]]
+        assert [item["innovation_id"] for item in items] == ["inov_a", "inov_b", "inov_c", "inov_d", "inov_e"]
+        assert [item["rank"] for item in items] == [1, 2, 2, 4, 5]
+        assert items[0]["percentile"] == 100.0 and items[-1]["percentile"] == 0.0
+        assert items[0]["nama_inovasi"] == "judul_inov_a" and pages[0]["total"] == 5
+
+    def test_rank_cursor_roundtrip(self):
+        from module.vector import PostgreDB
+
+        cursor = PostgreDB.encode_rank_cursor(75, "inovasi_é_budi")
+        assert PostgreDB.decode_rank_cursor(cursor) == (75, "inovasi_é_budi")
+        with pytest.raises(ValueError):
+            PostgreDB.decode_rank_cursor("bukan-cursor")
@@ -0,0 +1,110 @@
+"""
+Tests for the corpus-wide LSA model and index
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from module.lsa import LSAIndex, LSAModel, top_k
+
+CORPUS = [
+    "aplikasi pelaporan sampah berbasis peta untuk warga kota",
+    "sistem antrian puskesmas online dengan notifikasi pasien",
+    "irigasi otomatis sawah menggunakan sensor kelembaban tanah",
+    "pelatihan umkm pemasaran digital melalui media sosial",
+    "bank sampah digital dengan poin penukaran untuk warga",
+]
+
+
+class TestLSAModel:
+    """Test fitting, fold-in and serialization."""
+
+    def test_vectors_are_unit_length(self):
+        model = LSAModel.fit(CORPUS, n_components=3)
+        vectors = model.transform(CORPUS)
+        assert vectors.shape == (5, 3)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+    def test_fold_in_finds_related_document(self):
+        model = LSAModel.fit(CORPUS, n_components=3)
+        matrix = model.transform(CORPUS)
+        query = model.transform(["aplikasi bank sampah untuk warga kota"])[0]
+        best = [i for i, _ in top_k(matrix, query, 2)]
+        assert set(best) <= {0, 4}
+
+    def test_round_trip(self):
+        model = LSAModel.fit(CORPUS, n_components=3)
+        restored = LSAModel.loads(model.dumps())
+        assert np.allclose(restored.transform(CORPUS), model.transform(CORPUS))
+
+    def test_stored_model_is_plain_arrays(self):
+        import io
+        import pickle
+
+        model = LSAModel.fit(CORPUS, n_components=3)
+        with np.load(io.BytesIO(model.dumps()), allow_pickle=False) as arrays:
+            assert sorted(arrays.files) == ["components", "idf", "terms"]
+            assert arrays["components"].shape == (3, len(arrays["terms"]))
+        with pytest.raises(ValueError):
+            LSAModel.loads(pickle.dumps((model.vectorizer, None)))
+
+
+class TestTopK:
+    """Test the vectorized top-k selection."""
+
+    def test_sorted_and_excludes_self(self):
+        matrix = np.eye(4, dtype=np.float32)
+        matrix[1] = [0.8, 0.6, 0, 0]
+        result = top_k(matrix, np.array([1, 0, 0, 0], dtype=np.float32), k=2, exclude=0)
+        assert result[0] == (1, pytest.approx(0.8))
+        assert len(result) == 2 and result[1][1] == pytest.approx(0.0)
+
+    def test_k_larger_than_corpus(self):
+        assert len(top_k(np.eye(2, dtype=np.float32), np.array([1, 0], dtype=np.float32), k=10, exclude=1)) == 1
+
+
+@pytest.mark.integration
+class TestLSAIndex:
+    """Refit, incremental fold-in and similarity against a real Postgres."""
+
+    def test_refit_fold_in_and_similar(self, pg_dsn, make_postgredb):
+        import asyncpg
+
+        table = "lsa_index_test"
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            index = LSAIndex(db)
+            index.config.n_components = 3
+            index.config.refit_ratio = 0.5
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsa_vectors, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, latar_belakang TEXT, tujuan_inovasi TEXT, deskripsi_inovasi TEXT)")
+                    await conn.executemany(
+                        f"INSERT INTO {table} VALUES ($1, $2, '', '')",
+                        [(f"doc{i}", text) for i, text in enumerate(CORPUS)]
+                    )
+                await index.create_tables(table)
+                async with db.acquire() as conn:
+                    await conn.execute("DELETE FROM lsa_models WHERE table_name = $1", table)
+                fitted = await index.refit(table)
+                new_doc = {"latar_belakang": "bank sampah warga dengan poin digital", "tujuan_inovasi": "", "deskripsi_inovasi": ""}
+                async with db.acquire() as conn:
+                    await conn.execute(f"INSERT INTO {table} VALUES ('doc_new', $1, '', '')", new_doc["latar_belakang"])
+                refit_due = await index.add_document("doc_new", new_doc, table)
+                matches = await index.similar("doc_new", new_doc["latar_belakang"], 2, table)
+                return fitted, refit_due, matches
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsa_vectors, {table}")
+                    await conn.execute("DELETE FROM lsa_models WHERE table_name = $1", table)
+                await pool.close()
+
+        fitted, refit_due, matches = asyncio.run(run())
+        assert fitted["status"] == "fitted" and fitted["documents"] == 5
+        assert refit_due is False  # 1 folded-in document < 0.5 * 5
+        assert matches[0][0] == "doc4"
+        assert all(doc_id != "doc_new" for doc_id, _ in matches)
@@ -0,0 +1,99 @@
+"""
+Tests for the MinHash/LSH near-duplicate index
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from module.minhash import InMemoryLSH, MinHasher, MinHashIndex, estimated_jaccard
+
+BASE = (
+    "aplikasi pelaporan sampah berbasis peta untuk warga kota yang memudahkan dinas kebersihan "
+    "memantau titik penumpukan sampah dan menjadwalkan pengangkutan secara cepat dan terukur"
+)
+NEAR_COPY = BASE.replace("cepat", "tepat")
+OTHER = (
+    "irigasi otomatis sawah menggunakan sensor kelembaban tanah sehingga petani dapat menghemat "
+    "air dan tenaga kerja selama musim kemarau panjang di wilayah pedesaan"
+)
+
+
+class TestMinHasher:
+    """Test signatures, Jaccard estimates and band keys."""
+
+    def test_signature_is_deterministic(self):
+        assert np.array_equal(MinHasher().signature(BASE), MinHasher().signature(BASE))
+
+    def test_estimate_tracks_overlap(self):
+        hasher = MinHasher()
+        base = hasher.signature(BASE)
+        assert estimated_jaccard(base, hasher.signature(NEAR_COPY)) > 0.6
+        assert estimated_jaccard(base, hasher.signature(OTHER)) < 0.2
+
+    def test_band_keys(self):
+        hasher = MinHasher(num_perm=64, bands=16)
+        keys = hasher.band_keys(hasher.signature(BASE))
+        assert len(keys) == 16
+        assert all(-2 ** 63 <= k < 2 ** 63 for k in keys)
+
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            MinHasher(num_perm=100, bands=32)
+
+
+class TestInMemoryLSH:
+    """Test bucket lookup of near-duplicates."""
+
+    def test_query_returns_near_copy_only(self):
+        hasher = MinHasher()
+        lsh = InMemoryLSH(hasher)
+        lsh.add("base", hasher.signature(BASE))
+        lsh.add("other", hasher.signature(OTHER))
+        result = lsh.query(hasher.signature(NEAR_COPY), threshold=0.5)
+        assert [key for key, _ in result] == ["base"]
+
+    def test_exclude_self(self):
+        hasher = MinHasher()
+        lsh = InMemoryLSH(hasher)
+        lsh.add("base", hasher.signature(BASE))
+        assert lsh.query(hasher.signature(BASE), exclude="base") == []
+
+
+@pytest.mark.integration
+class TestMinHashIndex:
+    """Signature storage and band lookup against a real Postgres."""
+
+    def test_add_and_candidates(self, pg_dsn, make_postgredb):
+        import asyncpg
+
+        table = "minhash_index_test"
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            index = MinHashIndex(db)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsh_bands, {table}_minhash, {table}")
+                    assert await index.candidates(BASE, table_name=table) == []
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('base'), ('other')")
+                await index.add("base", BASE, table)
+                await index.add("other", OTHER, table)
+                # Re-adding replaces the bands instead of duplicating them
+                await index.add("base", BASE, table)
+                async with db.acquire() as conn:
+                    bands = await conn.fetchval(f"SELECT COUNT(*) FROM {table}_lsh_bands WHERE innovation_id = 'base'")
+                assert bands == index.hasher.bands
+
+                found = await index.candidates(NEAR_COPY, table_name=table)
+                assert [c["innovation_id"] for c in found] == ["base"]
+                assert found[0]["estimated_jaccard"] > 0.6
+                assert await index.candidates(BASE, exclude="base", table_name=table) == []
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsh_bands, {table}_minhash, {table}")
+                await pool.close()
+
+        asyncio.run(run())
@@ -0,0 +1,83 @@
+"""
+Tests for the staged, per-stage bounded ingestion pipeline
+"""
+import asyncio
+import time
+
+import pytest
+
+from module.pipeline import StagedPipeline
+
+
+def run_pipeline(pipeline, items):
+    async def collect():
+        return [item async for item in pipeline.run(items)]
+    return asyncio.run(collect())
+
+
+def sleeper(name, seconds, active, peaks):
+    async def handler(item):
+        active[name] = active.get(name, 0) + 1
+        peaks[name] = max(peaks.get(name, 0), active[name])
+        await asyncio.sleep(seconds)
+        active[name] -= 1
+        item.setdefault("path", []).append(name)
+        return item
+    return handler
+
+
+class TestStagedPipeline:
+    """Test ordering, per-stage concurrency limits and failure handling."""
+
+    def test_every_item_passes_every_stage(self):
+        pipeline = StagedPipeline([
+            ("a", sleeper("a", 0, {}, {}), 2),
+            ("b", sleeper("b", 0, {}, {}), 1),
+        ])
+        results = run_pipeline(pipeline, [{"key": i} for i in range(10)])
+        assert sorted(r["key"] for r in results) == list(range(10))
+        assert all(r["path"] == ["a", "b"] and r["status"] == "success" for r in results)
+        assert pipeline.stats["b"]["processed"] == 10
+
+    def test_stage_concurrency_is_bounded_and_stages_overlap(self):
+        active, peaks = {}, {}
+        pipeline = StagedPipeline([
+            ("extract", sleeper("extract", 0.05, active, peaks), 2),
+            ("embed", sleeper("embed", 0.05, active, peaks), 3),
+        ])
+        started = time.perf_counter()
+        run_pipeline(pipeline, [{"key": i} for i in range(6)])
+        elapsed = time.perf_counter() - started
+        assert peaks["extract"] == 2 and peaks["embed"] <= 3
+        # Serial would be 6 * 0.1s; pipelined extract (3 rounds) overlaps with embed
+        assert elapsed < 0.35
+
+    def test_failure_reports_stage_and_skips_the_rest(self):
+        async def explode(item):
+            if item["key"] == 1:
+                raise RuntimeError("model unavailable")
+            return item
+
+        pipeline = StagedPipeline([
+            ("extract", explode, 1),
+            ("persist", sleeper("persist", 0, {}, {}), 1),
+        ])
+        results = {r["key"]: r for r in run_pipeline(pipeline, [{"key": i} for i in range(3)])}
+        assert results[1]["status"] == "failed"
+        assert results[1]["stage"] == "extract" and "model unavailable" in results[1]["error"]
+        assert "path" not in results[1]
+        assert results[0]["path"] == ["persist"] and results[2]["status"] == "success"
+
+    def test_done_items_leave_early(self):
+        async def skip_odd(item):
+            item["done"] = item["key"] % 2 == 1
+            return item
+
+        pipeline = StagedPipeline([("store", skip_odd, 1), ("embed", sleeper("embed", 0, {}, {}), 1)])
+        results = {r["key"]: r for r in run_pipeline(pipeline, [{"key": i} for i in range(4)])}
+        assert "path" not in results[1] and results[2]["path"] == ["embed"]
+        assert set(results[3]["timings"]) == {"store"}
+
+    def test_requires_a_stage(self):
+        with pytest.raises(ValueError):
+            StagedPipeline([])
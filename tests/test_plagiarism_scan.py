@@ -0,0 +1,103 @@
+"""
+Tests for the batch all-pairs plagiarism scan
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+
+from module.plagiarism_scan import all_pairs_top_k, block_top_k, write_results
+
+
+def random_unit_rows(n, d, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((n, d)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def brute_force(matrix, k):
+    sims = matrix @ matrix.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+
+def collect(results):
+    blocks = sorted(results, key=lambda r: r[0])
+    return np.concatenate([b[1] for b in blocks]), np.concatenate([b[2] for b in blocks])
+
+
+class TestBlockTopK:
+    """Block-wise top-k must match a full similarity matrix."""
+
+    def test_matches_brute_force_across_blocks(self):
+        matrix = random_unit_rows(50, 8)
+        idx, scores = collect(all_pairs_top_k(matrix, k=5, block_size=7, min_score=-1.0))
+        assert np.array_equal(idx, brute_force(matrix, 5))
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+    def test_never_returns_self(self):
+        matrix = np.repeat(random_unit_rows(1, 4), 6, axis=0)  # identical documents
+        idx, _ = block_top_k(matrix, 0, 6, k=3, min_score=-1.0)
+        assert all(i not in row for i, row in enumerate(idx))
+
+    def test_min_score_masks_weak_neighbours(self):
+        matrix = np.eye(4, dtype=np.float32)
+        idx, _ = block_top_k(matrix, 0, 4, k=2, min_score=0.5)
+        assert np.all(idx == -1)
+
+    def test_sparse_tfidf_input(self):
+        dense = random_unit_rows(20, 6, seed=1).clip(min=0)
+        dense /= np.linalg.norm(dense, axis=1, keepdims=True)
+        idx, _ = collect(all_pairs_top_k(sparse.csr_matrix(dense), k=3, block_size=6, min_score=-1.0))
+        assert np.array_equal(idx, brute_force(dense, 3))
+
+
+class TestParallelScan:
+    """Spreading blocks over processes gives the same neighbours."""
+
+    def test_workers_match_single_process(self):
+        matrix = random_unit_rows(40, 6, seed=2)
+        single = collect(all_pairs_top_k(matrix, k=4, block_size=10, workers=1, min_score=-1.0))
+        parallel = collect(all_pairs_top_k(matrix, k=4, block_size=10, workers=2, min_score=-1.0))
+        assert np.array_equal(single[0], parallel[0])
+        assert np.allclose(single[1], parallel[1])
+
+
+@pytest.mark.integration
+class TestWriteResults:
+    """The batch scan writes the same {table}_lsa_results the online check reads."""
+
+    def test_scan_results_replace_online_results(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+
+        table = "scan_results_test"
+        innovations = [
+            {"id": "inov_a", "nama_inovasi": "A", "deskripsi_inovasi": "desk a", "nama_inovator": "budi"},
+            {"id": "inov_b", "nama_inovasi": "B", "deskripsi_inovasi": "desk b", "nama_inovator": "sari"},
+        ]
+        results = [(0, np.array([[1], [0]]), np.array([[0.9], [0.9]], dtype=np.float32))]
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsa_results, {table}")
+                    await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY)")
+                    await conn.execute(f"INSERT INTO {table} VALUES ('inov_a'), ('inov_b')")
+                await db.save_lsa_results("inov_a", [{
+                    "nama_inovasi": "lama", "similarity_score": 0.5,
+                    "deskripsi_inovasi": "desk lama", "nama_inovator": "lama"
+                }], table)
+                async with db.acquire() as conn:
+                    written = await write_results(conn, table, innovations, results)
+                return written, await db.get_lsa_results("inov_a", table)
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_lsa_results, {table}")
+                await pool.close()
+
+        written, stored = asyncio.run(run())
+        assert written == 2
+        assert [(r["compared_innovation_id"], r["nama_inovator"]) for r in stored] == [("B", "sari")]
+        assert stored[0]["similarity_score"] == pytest.approx(0.9)
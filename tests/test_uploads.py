@@ -0,0 +1,66 @@
+"""
+Tests for the streaming upload path (hashing reader, size limit)
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+
+from module.uploads import HashingReader, UploadTooLarge
+
+
+class ChunkedMinio:
+    """Consumes put_object streams in part-sized reads, like a multipart upload."""
+
+    def __init__(self):
+        self.objects, self.reads = {}, []
+
+    def put_object(self, bucket_name, object_name, data, length, part_size=0, content_type=None):
+        assert length == -1
+        parts = []
+        while True:
+            chunk = data.read(part_size)
+            if not chunk:
+                break
+            self.reads.append(len(chunk))
+            parts.append(chunk)
+        self.objects[object_name] = b"".join(parts)
+
+
+class TestHashingReader:
+    """Test on-the-fly hashing and the size limit."""
+
+    def test_hash_and_size_match_content(self):
+        data = os.urandom(10_000)
+        reader = HashingReader(io.BytesIO(data), max_bytes=20_000)
+        while reader.read(4096):
+            pass
+        assert reader.size == len(data)
+        assert reader.sha256 == hashlib.sha256(data).hexdigest()
+
+    def test_limit_raises_mid_stream(self):
+        reader = HashingReader(io.BytesIO(b"x" * 5000), max_bytes=4000)
+        reader.read(3000)
+        with pytest.raises(UploadTooLarge):
+            reader.read(3000)
+
+
+class TestStreamUpload:
+    """Test PostgreDB.stream_upload against a fake multipart client."""
+
+    def test_streams_in_parts(self, make_postgredb):
+        minio = ChunkedMinio()
+        data = os.urandom(25_000)
+        stored = asyncio.run(make_postgredb(minio_client=minio, bucket_name="bucket").stream_upload(io.BytesIO(data), "staging/a.pdf", 100_000, 10_000))
+        assert stored == {"object_name": "staging/a.pdf", "size": 25_000, "sha256": hashlib.sha256(data).hexdigest()}
+        assert minio.objects["staging/a.pdf"] == data
+        assert max(minio.reads) <= 10_000
+
+    def test_oversized_upload_rejected(self, make_postgredb):
+        minio = ChunkedMinio()
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(make_postgredb(minio_client=minio, bucket_name="bucket").stream_upload(io.BytesIO(b"x" * 25_000), "staging/b.pdf", 20_000, 10_000))
+        assert "staging/b.pdf" not in minio.objects
+
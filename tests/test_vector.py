@@ -62,3 +62,337 @@ class TestVectorIntegration:
     def test_embedding_consistency(self):
         """Test that same text produces consistent embeddings."""
         assert True  # Placeholder test
+
+
+class TestBulkCopyRecords:
+    """Test record preparation for the COPY-based bulk upsert."""
+
+    def test_native_types_and_nulls(self):
+        """numpy scalars become Python scalars and NaN becomes NULL."""
+        import numpy as np
+        import pandas as pd
+        from module.vector import PostgreDB
+
+        df = pd.DataFrame({"id": ["a", "b"], "score": np.array([1, 2], dtype=np.int64), "note": ["x", np.nan]})
+        columns, records = PostgreDB.prepare_copy_records(df)
+        assert columns == ["id", "score", "note"]
+        assert records == [("a", 1, "x"), ("b", 2, None)]
+        assert type(records[0][1]) is int
+
+    def test_duplicate_keys_keep_last(self):
+        """Duplicate ids collapse to the last row so one upsert can merge them."""
+        import pandas as pd
+        from module.vector import PostgreDB
+
+        df = pd.DataFrame({"id": ["a", "a"], "nama_inovasi": ["old", "new"]})
+        _, records = PostgreDB.prepare_copy_records(df)
+        assert records == [("a", "new")]
+
+    def test_composite_key_with_vectors(self):
+        """Embedding rows dedupe on (id, content) and arrays pass through untouched."""
+        import numpy as np
+        import pandas as pd
+        from module.vector import PostgreDB
+
+        vec = np.ones(3, dtype=np.float32)
+        df = pd.DataFrame({"id": ["a", "a", "a"], "content": ["c1", "c2", "c1"], "embedding": [vec, vec, vec * 2]})
+        _, records = PostgreDB.prepare_copy_records(df, key=("id", "content"))
+        assert [r[:2] for r in records] == [("a", "c1"), ("a", "c2")]
+        assert records[0][2][0] == 2.0
+
+
+class FakeMinio:
+    """Counts downloads; the ETag changes whenever the object is replaced."""
+
+    def __init__(self, data=b"%PDF-1.4 test"):
+        self.data, self.etag, self.downloads = data, "etag-1", 0
+
+    def stat_object(self, bucket_name, object_name):
+        from types import SimpleNamespace
+        return SimpleNamespace(etag=self.etag)
+
+    def get_object(self, bucket_name, object_name):
+        from unittest.mock import MagicMock
+        self.downloads += 1
+        response = MagicMock()
+        response.read.return_value = self.data
+        return response
+
+
+class TestPdfCache:
+    """Test the per-innovation PDF byte cache shared by scoring and chat."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_pdf_cache(self, monkeypatch):
+        from module.cache import LRUCache
+        from module.vector import PostgreDB
+
+        monkeypatch.setattr(PostgreDB, "_shared_pdf_cache", LRUCache(1024, sizeof=len))
+
+    def test_repeat_questions_download_once(self, make_postgredb):
+        import asyncio
+
+        minio = FakeMinio()
+        db = make_postgredb(minio_client=minio)
+        link = "http://localhost:9000/bucket/innovations/abc.pdf"
+        for _ in range(3):
+            assert asyncio.run(db.get_pdf_bytes("abc", link)) == b"%PDF-1.4 test"
+        assert minio.downloads == 1
+        assert db.pdf_cache.stats()["hits"] == 2
+
+    def test_new_etag_refetches(self, make_postgredb):
+        import asyncio
+
+        minio = FakeMinio()
+        db = make_postgredb(minio_client=minio)
+        link = "http://localhost:9000/bucket/innovations/abc.pdf"
+        asyncio.run(db.get_pdf_bytes("abc", link))
+        minio.etag, minio.data = "etag-2", b"%PDF-1.4 v2"
+        assert asyncio.run(db.get_pdf_bytes("abc", link)) == b"%PDF-1.4 v2"
+        assert minio.downloads == 2
+
+    def test_invalid_link_rejected(self):
+        from module.vector import PostgreDB
+
+        with pytest.raises(ValueError):
+            PostgreDB.parse_object_link("http://localhost:9000/just-a-bucket")
+
+
+class RecordingModel:
+    """Stands in for GenerativeModel; keeps the contents of each request."""
+
+    def __init__(self, text):
+        self.text, self.requests = text, []
+
+    def generate_content(self, contents, **kwargs):
+        from types import SimpleNamespace
+        self.requests.append(contents)
+        return SimpleNamespace(text=self.text)
+
+
+class TestInMemoryPdf:
+    """The extractor takes PDF bytes or a buffer; no file is read or written."""
+
+    def make_extractor(self, text):
+        from module.multimodal_model import GeminiPDFExtractor
+
+        extractor = GeminiPDFExtractor.__new__(GeminiPDFExtractor)
+        extractor.model = RecordingModel(text)
+        return extractor
+
+    def test_sections_from_bytes(self, monkeypatch):
+        import builtins
+
+        extractor = self.make_extractor('{"latar_belakang": "a", "tujuan_inovasi": "b"}')
+        monkeypatch.setattr(builtins, "open", lambda *a, **k: pytest.fail("PDF was read from disk"))
+        result = extractor.extract_multiple_sections(
+            None, ["latar_belakang", "tujuan_inovasi", "deskripsi_inovasi"], data=b"%PDF-1.4 test"
+        )
+        assert result == {"latar_belakang": "a", "tujuan_inovasi": "b", "deskripsi_inovasi": "TIDAK DITEMUKAN"}
+        assert len(extractor.model.requests[0]) == 2
+
+    def test_custom_prompt_from_buffer(self):
+        import io
+
+        extractor = self.make_extractor("jawaban")
+        assert extractor.extract_with_custom_prompt(None, "pertanyaan", data=io.BytesIO(b"%PDF-1.4 test")) == "jawaban"
+        part = extractor.model.requests[0][1]
+        assert part.inline_data.data == b"%PDF-1.4 test"
+
+
+@pytest.mark.integration
+class TestNearestNeighbourPlan:
+    """EXPLAIN checks for the similarity search query (needs Postgres + pgvector)."""
+
+    def test_knn_scan_uses_hnsw_index(self, pg_dsn):
+        """The ORDER BY distance / LIMIT k scan is answered by the HNSW index."""
+        import asyncio
+        import asyncpg
+        import numpy as np
+        from pgvector.asyncpg import register_vector
+        from module.vector import PostgreDB
+
+        table = "explain_knn_test"
+
+        async def run():
+            conn = await asyncpg.connect(pg_dsn)
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                await register_vector(conn)
+                await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings, {table} CASCADE")
+                await conn.execute(f"CREATE TABLE {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT, nama_inovator TEXT, latar_belakang TEXT, tujuan_inovasi TEXT, deskripsi_inovasi TEXT, link_document TEXT)")
+                await conn.execute(f"CREATE TABLE {table}_embeddings (id VARCHAR(1024) REFERENCES {table}(id), content TEXT, embedding vector(8), PRIMARY KEY (id, content))")
+                rng = np.random.default_rng(0)
+                await conn.executemany(f"INSERT INTO {table} (id) VALUES ($1)", [(f"doc{i}",) for i in range(200)])
+                await conn.copy_records_to_table(
+                    f"{table}_embeddings",
+                    records=[(f"doc{i % 200}", f"chunk{i}", rng.random(8, dtype=np.float32)) for i in range(2000)],
+                )
+                await conn.execute(f"CREATE INDEX {table}_embeddings_hnsw_idx ON {table}_embeddings USING hnsw (embedding vector_cosine_ops)")
+                await conn.execute(f"ANALYZE {table}_embeddings")
+                # Default planner settings (seqscan enabled): 2000 chunks are enough for the
+                # index to beat a full scan + sort, as on a real corpus
+                plan = await conn.fetch(
+                    "EXPLAIN " + PostgreDB.nearest_neighbour_sql(table),
+                    rng.random(8, dtype=np.float32), 50, 0.5, 5,
+                )
+                return "\n".join(r[0] for r in plan)
+            finally:
+                await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings, {table} CASCADE")
+                await conn.close()
+
+        plan = asyncio.run(run())
+        assert f"Index Scan using {table}_embeddings_hnsw_idx" in plan
+        assert f"Seq Scan on {table}_embeddings" not in plan
+
+
+@pytest.mark.integration
+class TestInnovationChunks:
+    """Per-innovation chunk retrieval used by RAG chat (needs Postgres + pgvector)."""
+
+    def test_returns_only_that_innovation_ranked_by_similarity(self, pg_dsn):
+        import asyncio
+        import asyncpg
+        import numpy as np
+        from pgvector.asyncpg import register_vector
+        from module.vector import PostgreDB
+
+        table = "rag_chunks_test"
+        query = np.array([1, 0, 0], dtype=np.float32)
+
+        async def run():
+            conn = await asyncpg.connect(pg_dsn)
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                await register_vector(conn)
+                await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings")
+                await conn.execute(f"CREATE TABLE {table}_embeddings (id VARCHAR(1024), content TEXT, embedding vector(3), PRIMARY KEY (id, content))")
+                await conn.copy_records_to_table(f"{table}_embeddings", records=[
+                    ("a", "far", np.array([0, 1, 0], dtype=np.float32)),
+                    ("a", "close", np.array([1, 0.1, 0], dtype=np.float32)),
+                    ("a", "closest", np.array([1, 0, 0], dtype=np.float32)),
+                    ("b", "other document", np.array([1, 0, 0], dtype=np.float32)),
+                ])
+                return await conn.fetch(PostgreDB.innovation_chunks_sql(table), query, "a", 2)
+            finally:
+                await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings")
+                await conn.close()
+
+        rows = asyncio.run(run())
+        assert [r["content"] for r in rows] == ["closest", "close"]
+        assert rows[0]["similarity"] == pytest.approx(1.0)
+
+
+@pytest.mark.integration
+class TestConnectionPool:
+    """Shared asyncpg pool: idempotent init, acquire timeouts and usage stats (needs Postgres)."""
+
+    def test_init_acquire_timeout_and_stats(self, pg_dsn, make_postgredb):
+        import asyncio
+
+        async def run():
+            db = make_postgredb(dsn=pg_dsn, pool_max_size=1, pool_acquire_timeout=0.2)
+            try:
+                pools = await asyncio.gather(*(db.init_pool() for _ in range(5)))
+                idle_stats = db.pool_stats()
+                async with db.acquire() as conn:
+                    assert await conn.fetchval("SELECT 1") == 1
+                    # Extension created once by init_pool; the per-connection hook only registers codecs
+                    assert (await conn.fetchval("SELECT '[1,2]'::vector")).to_list() == [1.0, 2.0]
+                    busy_stats = db.pool_stats()
+                    with pytest.raises(asyncio.TimeoutError):
+                        async with db.acquire():
+                            pass
+                return pools, idle_stats, busy_stats, db.pool_stats()
+            finally:
+                await db.close_pool()
+
+        pools, idle_stats, busy_stats, after = asyncio.run(run())
+        assert all(pool is pools[0] for pool in pools)
+        assert idle_stats["initialized"] and (idle_stats["size"], idle_stats["idle"], idle_stats["in_use"]) == (1, 1, 0)
+        assert (busy_stats["size"], busy_stats["idle"], busy_stats["in_use"]) == (1, 0, 1)
+        assert after["acquire_timeouts"] == 1 and after["acquired"] == 1
+        assert after["idle"] == 1
+
+
+@pytest.mark.integration
+class TestBulkUpsert:
+    """COPY into a staging table + one INSERT ... ON CONFLICT merge (needs Postgres)."""
+
+    def test_source_rows_loaded_twice_are_merged(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+        import pandas as pd
+
+        table = "bulk_source_test"
+        create_query = f"CREATE TABLE IF NOT EXISTS {table} (id VARCHAR(1024) PRIMARY KEY, nama_inovasi TEXT, skor INTEGER)"
+        first = pd.DataFrame([{"id": "a", "nama_inovasi": "satu", "skor": 1}, {"id": "b", "nama_inovasi": "dua", "skor": 2}])
+        # Second load: 'b' changed, 'c' new, and a duplicate key where the last row wins
+        second = pd.DataFrame([
+            {"id": "b", "nama_inovasi": "dua lama", "skor": 0},
+            {"id": "b", "nama_inovasi": "dua baru", "skor": 20},
+            {"id": "c", "nama_inovasi": "tiga", "skor": None},
+        ])
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+                await db.generateSourceTable(first, table, create_query, bulk=True)
+                await db.generateSourceTable(second, table, create_query, bulk=True)
+                async with db.acquire() as conn:
+                    return [tuple(r) for r in await conn.fetch(f"SELECT id, nama_inovasi, skor FROM {table} ORDER BY id")]
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+                await pool.close()
+
+        assert asyncio.run(run()) == [("a", "satu", 1), ("b", "dua baru", 20), ("c", "tiga", None)]
+
+    def test_embeddings_loaded_twice_are_merged(self, pg_dsn, make_postgredb):
+        import asyncio
+        import asyncpg
+        import numpy as np
+        import pandas as pd
+        from pgvector.asyncpg import register_vector
+        from module.vector import PostgreDB
+
+        table = "bulk_vector_test"
+        create_query = f"""CREATE TABLE IF NOT EXISTS {table}_embeddings (
+            id VARCHAR(1024), content TEXT, embedding vector(3), PRIMARY KEY (id, content))"""
+        first = pd.DataFrame([
+            {"id": "a", "content": "chunk 1", "embedding": [1.0, 0.0, 0.0]},
+            {"id": "a", "content": "chunk 2", "embedding": [0.0, 1.0, 0.0]},
+        ])
+        second = pd.DataFrame([
+            {"id": "a", "content": "chunk 2", "embedding": np.array([0.0, 0.0, 1.0])},
+            {"id": "b", "content": "chunk 1", "embedding": [0.5, 0.5, 0.0]},
+        ])
+
+        async def init(conn):
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await register_vector(conn)
+
+        async def run():
+            pool = await asyncpg.create_pool(pg_dsn, min_size=1, max_size=2, init=init)
+            db = make_postgredb(pool)
+            try:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings")
+                await db.generateVectorTable(first, table, create_query, bulk=True)
+                await db.generateVectorTable(second, table, create_query, bulk=True)
+                async with db.acquire() as conn:
+                    rows = await conn.fetch(f"SELECT id, content, embedding FROM {table}_embeddings ORDER BY id, content")
+                return [(r["id"], r["content"], PostgreDB.as_float_array(r["embedding"]).tolist()) for r in rows]
+            finally:
+                async with db.acquire() as conn:
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}_embeddings")
+                await pool.close()
+
+        assert asyncio.run(run()) == [
+            ("a", "chunk 1", [1.0, 0.0, 0.0]),
+            ("a", "chunk 2", [0.0, 0.0, 1.0]),
+            ("b", "chunk 1", [0.5, 0.5, 0.0]),
+        ]